@@ -0,0 +1,69 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Compare the decoding cost of the available JSON backends using the
+payloads of ``contrib/testdata`` scaled up to realistic response sizes.
+
+    python contrib/benchmarks/json_decode.py --scale 2000
+"""
+import os
+import sys
+import glob
+import json
+import argparse
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../..'))
+
+from enigma2_http_api.jsonbackend import available_backends, get_backend
+from enigma2_http_api.streaming import iter_json_array
+
+TD = os.path.abspath(
+    os.path.join(os.path.dirname(__file__), '../testdata'))
+
+RESULT_FMT = '{name:20s} {size:>10s} {backend:12s} {seconds:9.4f}s ' \
+             '{mbps:8.1f} MB/s'
+
+
+def scaled_payloads(scale):
+    for filename in sorted(glob.glob(os.path.join(TD, '*.json'))):
+        (trunk, _) = os.path.splitext(os.path.basename(filename))
+        with open(filename, "rb") as src:
+            data = json.load(src)
+
+        if isinstance(data, dict):
+            (key, items) = [(k, v) for k, v in data.items()
+                            if isinstance(v, list)][0]
+        else:
+            (key, items) = ('events', data)
+
+        payload = {"result": True, key: items * scale}
+        yield trunk, key, json.dumps(payload).encode("utf-8")
+
+
+def run(scale, repeat):
+    for trunk, key, body in scaled_payloads(scale):
+        size = '{:.1f}MB'.format(len(body) / 1024.0 / 1024.0)
+        candidates = [(name, get_backend(name).loads)
+                      for name in available_backends()]
+        candidates.append(
+            ('streaming', lambda x: list(iter_json_array([x], key))))
+
+        for name, func in candidates:
+            seconds = min(timeit.repeat(lambda: func(body), number=1,
+                                        repeat=repeat))
+            print(RESULT_FMT.format(
+                name=trunk, size=size, backend=name, seconds=seconds,
+                mbps=len(body) / 1024.0 / 1024.0 / seconds))
+
+
+if __name__ == '__main__':
+    argparser = argparse.ArgumentParser()
+    argparser.add_argument('--scale', '-s', dest="scale", type=int,
+                           default=1000,
+                           help="payload multiplier, default %(default)s")
+    argparser.add_argument('--repeat', '-r', dest="repeat", type=int,
+                           default=3,
+                           help="repetitions, default %(default)s")
+    args = argparser.parse_args()
+    run(args.scale, args.repeat)
@@ -8,6 +8,7 @@ import pytz
 
 from enigma2_http_api.defaults import REMOTE_ADDR
 from enigma2_http_api.controller import Enigma2APIController
+from enigma2_http_api.controller import DEFAULT_CRAWL_CONCURRENCY
 from enigma2_http_api.utils import parse_servicereference
 from enigma2_http_api.utils import normalise_servicereference
 from enigma2_http_api.utils import set_output_encoding
@@ -63,9 +64,9 @@ class EPGSearch(Enigma2APIController):
     def _update_lookup_map(self):
         st = (SERVICE_TYPE_TV, SERVICE_TYPE_HDTV)
 
-        for servicename, servicereference in self.get_services():
+        for servicename, _, services in self.get_bouquets_services():
             self.log.debug("Evaluating bouquet {!r}".format(servicename))
-            for res in self.get_getservices(servicereference):
+            for res in services:
                 sref = res['servicereference']
                 val = res['servicename']
                 psref = parse_servicereference(sref)
@@ -82,10 +83,10 @@ class EPGSearch(Enigma2APIController):
                                                self.lookup_map[key]))
 
     def filter_search_results(self, data):
-        if (self.args.verbose or self.args.tech_mode) and data:
-            self.log.info("Filtering {:d} result(s)".format(len(data)))
+        count = 0
 
         for item in data:
+            count += 1
             if self.args.verbose > 1:
                 pprint.pprint(item)
 
@@ -93,8 +94,11 @@ class EPGSearch(Enigma2APIController):
 
             yield item
 
+        if (self.args.verbose or self.args.tech_mode) and count:
+            self.log.info("Filtered {:d} result(s)".format(count))
+
     def search(self, what):
-        return self.get_search(what, filter_func=self.filter_search_results)
+        return self.iter_search(what, filter_func=self.filter_search_results)
 
     def zap(self, what):
         zap_to = None
@@ -136,6 +140,13 @@ if __name__ == '__main__':
     argparser.add_argument('--remote-addr', '-a', dest="remote_addr",
                            default=REMOTE_ADDR,
                            help="enigma2 host address, default %(default)s")
+    argparser.add_argument('--replay', dest="replay", metavar="DIRECTORY",
+                           default=None,
+                           help="answer API calls from request dumps")
+    argparser.add_argument('--concurrency', '-j', dest="concurrency",
+                           default=DEFAULT_CRAWL_CONCURRENCY, type=int,
+                           help="concurrent bouquet requests, "
+                                "default %(default)s")
     argparser.add_argument(dest="search_query",
                            help="Search query")
     argparser.add_argument('--timezone', dest="local_timezone",
@@ -145,5 +156,7 @@ if __name__ == '__main__':
     args = argparser.parse_args()
 
     es = EPGSearch(remote_addr=args.remote_addr,
-                   dry_run=args.dry_run, cli_args=args)
+                   dry_run=args.dry_run, cli_args=args,
+                   replay=args.replay,
+                   crawl_concurrency=args.concurrency)
     es.main()
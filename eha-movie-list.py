@@ -35,9 +35,13 @@ if __name__ == '__main__':
     argparser.add_argument('--remote-addr', '-a', dest="remote_addr",
                            default=REMOTE_ADDR,
                            help="enigma2 host address, default %(default)s")
+    argparser.add_argument('--replay', dest="replay", metavar="DIRECTORY",
+                           default=None,
+                           help="answer API calls from request dumps")
 
     args = argparser.parse_args()
 
     moli = MovieLister(remote_addr=args.remote_addr,
-                       dry_run=args.dry_run, cli_args=args)
+                       dry_run=args.dry_run, cli_args=args,
+                       replay=args.replay)
     moli.list()
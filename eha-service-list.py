@@ -4,11 +4,11 @@ import logging
 import sys
 import os
 import argparse
-import json
 import datetime
 
 from enigma2_http_api.defaults import REMOTE_ADDR
 from enigma2_http_api.controller import Enigma2APIController
+from enigma2_http_api.controller import DEFAULT_CRAWL_CONCURRENCY
 from enigma2_http_api.utils import parse_servicereference
 from enigma2_http_api.utils import create_servicereference
 from enigma2_http_api.utils import normalise_servicereference
@@ -57,9 +57,9 @@ class ServiceLister(Enigma2APIController):
             "st={!r} namespace={!r} filter_oid={!r}".format(st, namespace,
                                                             filter_oid))
 
-        for servicename, servicereference in self.get_services():
+        for servicename, _, services in self.get_bouquets_services():
             self.log.info("Evaluating bouquet {!r}".format(servicename))
-            for res in self.get_getservices(servicereference):
+            for res in services:
                 sref = res['servicereference']
                 val = res['servicename']
                 psref = parse_servicereference(sref)
@@ -131,7 +131,7 @@ class ServiceLister(Enigma2APIController):
             data['services'][item_key] = item
 
         with open(self.args.dump_file, "wb") as tgt:
-            json.dump(data, tgt, indent=2)
+            self.json.dump(data, tgt, indent=2)
 
 
 if __name__ == '__main__':
@@ -142,6 +142,13 @@ if __name__ == '__main__':
     argparser.add_argument('--remote-addr', '-a', dest="remote_addr",
                            default=REMOTE_ADDR,
                            help="enigma2 host address, default %(default)s")
+    argparser.add_argument('--replay', dest="replay", metavar="DIRECTORY",
+                           default=None,
+                           help="answer API calls from request dumps")
+    argparser.add_argument('--concurrency', '-j', dest="concurrency",
+                           default=DEFAULT_CRAWL_CONCURRENCY, type=int,
+                           help="concurrent bouquet requests, "
+                                "default %(default)s")
     argparser.add_argument('--dump', dest="dump_file", metavar="FILE",
                            default=None,
                            help="File to dump service information to")
@@ -178,7 +185,9 @@ if __name__ == '__main__':
     args = argparser.parse_args()
 
     sli = ServiceLister(remote_addr=args.remote_addr,
-                        dry_run=args.dry_run, cli_args=args)
+                        dry_run=args.dry_run, cli_args=args,
+                        replay=args.replay,
+                        crawl_concurrency=args.concurrency)
     sli.list()
     if args.dump_file:
         sli.dump()
@@ -71,6 +71,9 @@ if __name__ == '__main__':
     argparser.add_argument('--remote-addr', '-a', dest="remote_addr",
                            default=REMOTE_ADDR,
                            help="enigma2 host address, default %(default)s")
+    argparser.add_argument('--replay', dest="replay", metavar="DIRECTORY",
+                           default=None,
+                           help="answer API calls from request dumps")
     argparser.add_argument('--timezone', dest="local_timezone",
                            default='Europe/Berlin',
                            help="local timezone, default %(default)s")
@@ -79,5 +82,6 @@ if __name__ == '__main__':
     args = argparser.parse_args()
 
     tli = TimerLister(remote_addr=args.remote_addr,
-                      dry_run=args.dry_run, cli_args=args)
+                      dry_run=args.dry_run, cli_args=args,
+                      replay=args.replay)
     tli.list()
@@ -7,8 +7,9 @@ import datetime
 
 import pytz
 
-from enigma2_http_api.defaults import REMOTE_ADDR
+from enigma2_http_api.defaults import REMOTE_ADDR, PROFILE_CACHE
 from enigma2_http_api.controller import Enigma2APIController
+from enigma2_http_api.controller import DEFAULT_CRAWL_CONCURRENCY
 from enigma2_http_api.controller import POWERSTATE_MAP
 from enigma2_http_api.utils import parse_servicereference
 from enigma2_http_api.utils import normalise_servicereference
@@ -56,14 +57,26 @@ class UtilityBelt(Enigma2APIController):
         pprint.pprint(self._apicall(api_call))
 
     def dump_has_rest_result(self):
+        if self.replay is not None:
+            self.log.error("REST support check needs a device, not available "
+                           "when replaying")
+            return
         pprint.pprint(self.has_rest_support())
 
+    def dump_profile(self):
+        if self.replay is not None:
+            self.log.error("Device profiling needs a device, not available "
+                           "when replaying")
+            return
+        pprint.pprint(self.device_profile(
+            refresh=self.args.refresh_profile).as_dict())
+
     def _update_lookup_map(self):
         st = (SERVICE_TYPE_TV, SERVICE_TYPE_HDTV)
 
-        for servicename, servicereference in self.get_services():
+        for servicename, _, services in self.get_bouquets_services():
             self.log.debug("Evaluating bouquet {!r}".format(servicename))
-            for res in self.get_getservices(servicereference):
+            for res in services:
                 sref = res['servicereference']
                 val = res['servicename']
                 psref = parse_servicereference(sref)
@@ -116,6 +129,20 @@ if __name__ == '__main__':
     argparser.add_argument('--remote-addr', '-a', dest="remote_addr",
                            default=REMOTE_ADDR,
                            help="enigma2 host address, default %(default)s")
+    argparser.add_argument('--replay', dest="replay", metavar="DIRECTORY",
+                           default=None,
+                           help="answer API calls from request dumps")
+    argparser.add_argument('--concurrency', '-j', dest="concurrency",
+                           default=DEFAULT_CRAWL_CONCURRENCY, type=int,
+                           help="concurrent bouquet requests, "
+                                "default %(default)s")
+    argparser.add_argument('--profile-cache', dest="profile_cache",
+                           metavar="FILE", default=PROFILE_CACHE,
+                           help="device profile cache, empty to disable, "
+                                "default %(default)s")
+    argparser.add_argument('--refresh-profile', dest="refresh_profile",
+                           action='store_true', default=False,
+                           help="probe device profile again")
     argparser.add_argument('--timezone', dest="local_timezone",
                            default='Europe/Berlin',
                            help="local timezone, default %(default)s")
@@ -129,6 +156,10 @@ if __name__ == '__main__':
                           help='Dump result of REST supported check',
                           action='store_const', const='dump_has_rest_result',
                           default='about', dest="mode")
+    group_op.add_argument('--profile',
+                          help='Dump device profile',
+                          action='store_const', const='dump_profile',
+                          default='about', dest="mode")
     group_op.add_argument('--zap', dest="zap_to_service",
                            default=None,
                            help="ZAP to Service")
@@ -171,6 +202,15 @@ if __name__ == '__main__':
 
     args = argparser.parse_args()
 
+    # replayed responses must neither be validated against nor update
+    # the profiles of real devices
+    profile_cache = args.profile_cache
+    if args.replay:
+        profile_cache = None
+
     ub = UtilityBelt(remote_addr=args.remote_addr,
-                     dry_run=args.dry_run, cli_args=args)
+                     dry_run=args.dry_run, cli_args=args,
+                     replay=args.replay,
+                     profile_cache=profile_cache,
+                     crawl_concurrency=args.concurrency)
     ub.main()
@@ -0,0 +1,182 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Non-blocking controller.
+------------------------
+
+:class:`AsyncEnigma2APIController` mirrors the API call methods of
+:class:`enigma2_http_api.controller.Enigma2APIController` listed in
+:data:`ASYNC_API_CALLS`. Instead of blocking, each method immediately
+returns a
+:class:`multiprocessing.pool.AsyncResult` whose ``get()`` yields exactly
+what the blocking method would have returned.
+
+All controllers share one bounded :class:`Dispatcher` by default so that
+any number of receivers can be polled with a fixed number of threads.
+
+.. note::
+
+    This library targets Python 2 which lacks :mod:`asyncio`; the
+    dispatcher's worker pool takes the role of the event loop.
+"""
+import logging
+import threading
+from multiprocessing.pool import ThreadPool
+
+from controller import Enigma2APIController
+
+#: default number of worker threads of the shared dispatcher
+DEFAULT_DISPATCHER_WORKERS = 32
+
+#: blocking API calls of the controller mirrored as non-blocking methods;
+#: all other attributes (statistics, streaming ``iter_*`` calls, ...) are
+#: passed through unchanged
+ASYNC_API_CALLS = (
+    'get_about',
+    'get_bouquets_services',
+    'get_epgbouquet',
+    'get_epgnext',
+    'get_epgnow',
+    'get_epgservice',
+    'get_epgservices',
+    'get_getallservices',
+    'get_getservices',
+    'get_message',
+    'get_messageanswer',
+    'get_moviedelete',
+    'get_movielist',
+    'get_powerstate',
+    'get_search',
+    'get_services',
+    'get_subservices',
+    'get_timeradd',
+    'get_timeraddbyeventid',
+    'get_timerdelete',
+    'get_timerlist',
+    'get_zap',
+)
+
+_DEFAULT_DISPATCHER = None
+_DEFAULT_DISPATCHER_LOCK = threading.Lock()
+
+
+class Dispatcher(object):
+    """
+    Lazily started, bounded pool of worker threads executing blocking API
+    calls.
+    """
+
+    def __init__(self, workers=DEFAULT_DISPATCHER_WORKERS):
+        self.log = logging.getLogger(__name__)
+        self.workers = workers
+        self._pool = None
+        self._lock = threading.Lock()
+
+    def submit(self, func, *args, **kwargs):
+        """
+        Schedule ``func(*args, **kwargs)`` for execution.
+
+        :param func: callable
+        :return: pending result
+        :rtype: multiprocessing.pool.AsyncResult
+        """
+        with self._lock:
+            if self._pool is None:
+                self.log.debug("Starting dispatcher with {:d} worker(s)".format(
+                    self.workers))
+                self._pool = ThreadPool(self.workers)
+            pool = self._pool
+
+        return pool.apply_async(func, args, kwargs)
+
+    def close(self):
+        """
+        Wait for pending calls and stop all worker threads.
+        """
+        with self._lock:
+            pool, self._pool = self._pool, None
+
+        if pool is not None:
+            pool.close()
+            pool.join()
+
+
+def get_default_dispatcher():
+    """
+    Get the process wide shared dispatcher.
+
+    :return: dispatcher
+    :rtype: Dispatcher
+    """
+    global _DEFAULT_DISPATCHER
+
+    with _DEFAULT_DISPATCHER_LOCK:
+        if _DEFAULT_DISPATCHER is None:
+            _DEFAULT_DISPATCHER = Dispatcher()
+        return _DEFAULT_DISPATCHER
+
+
+def gather(results, timeout=None):
+    """
+    Wait for all *results*.
+
+    :param results: pending results
+    :param timeout: timeout in seconds for each result
+    :return: values in order of *results*
+    :rtype: list
+    """
+    return [result.get(timeout) for result in results]
+
+
+class AsyncEnigma2APIController(object):
+    """
+    Non-blocking Enigma2 Web API Consuming Controller Class
+
+    Positional and keyword arguments are passed to
+    :class:`enigma2_http_api.controller.Enigma2APIController` unless an
+    existing instance is given as *controller*. Results are the same
+    :class:`enigma2_http_api.model.EEvent` items and honour *dry_run* and
+    *dump_requests* exactly as the wrapped controller does.
+
+    >>> eac = AsyncEnigma2APIController(remote_addr='127.0.0.1', dry_run=True)
+    >>> eac.get_zap('1:0:19:7C:6:85:FFFF0000:0:0:0:').get(5)
+    '1:0:19:7C:6:85:FFFF0000:0:0:0:'
+    """
+
+    def __init__(self, *args, **kwargs):
+        self.controller = kwargs.pop("controller", None)
+        self.dispatcher = kwargs.pop("dispatcher",
+                                     None) or get_default_dispatcher()
+
+        if self.controller is None:
+            kwargs.setdefault("pool_size", self.dispatcher.workers)
+            self.controller = Enigma2APIController(*args, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self.controller, name)
+
+    def submit(self, func, *args, **kwargs):
+        """
+        Schedule an arbitrary blocking callable on the dispatcher.
+
+        :param func: callable
+        :return: pending result
+        :rtype: multiprocessing.pool.AsyncResult
+        """
+        return self.dispatcher.submit(func, *args, **kwargs)
+
+
+def _async_method(name):
+    def method(self, *args, **kwargs):
+        return self.dispatcher.submit(getattr(self.controller, name),
+                                      *args, **kwargs)
+
+    method.__name__ = name
+    method.__doc__ = "Non-blocking :meth:`Enigma2APIController.{:s}`.".format(
+        name)
+    return method
+
+
+for _name in ASYNC_API_CALLS:
+    setattr(AsyncEnigma2APIController, _name, _async_method(_name))
+del _name
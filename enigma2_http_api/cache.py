@@ -0,0 +1,327 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Response caching.
+-----------------
+
+In-memory cache for decoded API responses with a time to live per endpoint
+and least recently used eviction as well as coalescing of identical
+concurrent API calls.
+"""
+import sys
+import copy
+import time
+import threading
+from collections import OrderedDict
+
+from resilience import DeadlineExceeded
+
+#: default time to live (seconds) of cacheable endpoints
+DEFAULT_CACHE_TTL = {
+    'about': 600,
+    'epgnext': 60,
+    'epgnow': 60,
+    'getallservices': 300,
+    'getservices': 300,
+    'movielist': 60,
+}
+
+#: default maximum number of cached responses
+DEFAULT_CACHE_SIZE = 128
+
+#: endpoints altering the enigma2 device's state, never cached
+MUTATING_PATHS = frozenset([
+    'message',
+    'messageanswer',
+    'moviedelete',
+    'restarttwisted',
+    'timeradd',
+    'timeraddbyeventid',
+    'timerdelete',
+    'zap',
+])
+
+#: endpoints altering the enigma2 device's state only if one of the given
+#: parameters is present, plain queries otherwise
+MUTATING_PARAMS = {
+    'powerstate': ('newstate',),
+    'vol': ('set',),
+}
+
+#: cached endpoints to be invalidated after a successful mutating API call
+INVALIDATED_BY = {
+    'moviedelete': ('movielist',),
+    'timeradd': ('timerlist',),
+    'timeraddbyeventid': ('timerlist',),
+    'timerdelete': ('timerlist',),
+}
+
+
+def is_mutating(path, params=None):
+    """
+    Check if API call *path* using *params* alters the enigma2 device's
+    state. Mutating calls are neither cached, coalesced nor retried.
+
+    :param path: API path
+    :param params: URL parameters
+    :rtype: bool
+
+    >>> is_mutating('zap', {'sRef': 'x'}), is_mutating('timerlist')
+    (True, False)
+    >>> is_mutating('powerstate'), is_mutating('powerstate', {'newstate': 0})
+    (False, True)
+    >>> is_mutating('vol'), is_mutating('vol', {'set': 'up'})
+    (False, True)
+    """
+    if path in MUTATING_PARAMS:
+        return any(x in (params or ()) for x in MUTATING_PARAMS[path])
+    return path in MUTATING_PATHS
+
+
+def cache_key(path, params=None):
+    """
+    Generate a cache key for API call *path* using *params*.
+
+    :param path: API path
+    :param params: URL parameters
+    :return: hashable key
+
+    >>> cache_key('getservices', {'sRef': 'x'}) == cache_key(
+    ...     'getservices', {'sRef': 'x'})
+    True
+    >>> cache_key('about')
+    ('about', ())
+    """
+    if not params:
+        return path, ()
+    return path, tuple(sorted(params.items()))
+
+
+class TTLCache(object):
+    """
+    Thread safe LRU cache whose entries expire after an endpoint specific
+    time to live.
+
+    >>> cache = TTLCache(ttl={'about': 10}, max_entries=2)
+    >>> cache.is_cacheable('about'), cache.is_cacheable('zap')
+    (True, False)
+    >>> cache.get(('about', ())) is None
+    True
+    >>> cache.put(('about', ()), {'info': 1})
+    >>> cache.get(('about', ()))
+    {'info': 1}
+    >>> sorted(cache.stats().items())
+    [('entries', 1), ('evictions', 0), ('hits', 1), ('misses', 1)]
+    """
+
+    def __init__(self, ttl=None, max_entries=DEFAULT_CACHE_SIZE,
+                 clock=time.time):
+        if ttl is None:
+            ttl = DEFAULT_CACHE_TTL
+        self.ttl = dict(ttl)
+        self.max_entries = max_entries
+        self._clock = clock
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def is_cacheable(self, path, params=None):
+        """
+        Check if responses of API call *path* using *params* may be
+        cached.
+
+        :param path: API path
+        :param params: URL parameters
+        :rtype: bool
+        """
+        if is_mutating(path, params):
+            return False
+        return self.ttl.get(path, 0) > 0
+
+    def get(self, key):
+        """
+        Look up *key*.
+
+        :param key: cache key as returned by :func:`cache_key`
+        :return: cached value or None
+        """
+        now = self._clock()
+        with self._lock:
+            try:
+                expires, value = self._data.pop(key)
+            except KeyError:
+                self.misses += 1
+                return None
+
+            if expires <= now:
+                self.misses += 1
+                return None
+
+            self._data[key] = (expires, value)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        """
+        Store *value* for *key* using the time to live of the key's path.
+
+        :param key: cache key as returned by :func:`cache_key`
+        :param value: value
+        """
+        (path, params) = key
+        if not self.is_cacheable(path, dict(params)):
+            return
+
+        expires = self._clock() + self.ttl[path]
+        with self._lock:
+            self._data.pop(key, None)
+            self._data[key] = (expires, value)
+
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, path=None):
+        """
+        Drop cached entries of API call *path* or all entries.
+
+        :param path: API path
+        """
+        with self._lock:
+            if path is None:
+                self._data.clear()
+                return
+
+            for key in [x for x in self._data if x[0] == path]:
+                del self._data[key]
+
+    def stats(self):
+        """
+        Cache statistics.
+
+        :return: hits, misses, evictions and current number of entries
+        :rtype: dict
+        """
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'entries': len(self._data),
+            }
+
+
+class _Flight(object):
+    def __init__(self):
+        self.event = threading.Event()
+        self.waiters = 0
+        self.value = None
+        self.exc_info = None
+
+
+class SingleFlight(object):
+    """
+    Coalesce concurrent calls sharing the same key: the first caller
+    executes the call while all others wait for and share its result.
+    As callers may alter returned data each one sharing a result receives
+    its own copy created by *copy_func*.
+
+    >>> flights = SingleFlight()
+    >>> flights.do(('about', ()), lambda: {'info': 1})
+    {'info': 1}
+    >>> sorted(flights.stats().items())
+    [('coalesced', 0), ('executed', 1), ('in_flight', 0)]
+    """
+
+    def __init__(self, copy_func=copy.deepcopy):
+        self._copy = copy_func
+        self._lock = threading.Lock()
+        self._flights = dict()
+        self.executed = 0
+        self.coalesced = 0
+
+    def do(self, key, func, *args, **kwargs):
+        """
+        Call ``func(*args, **kwargs)`` unless a call with the same *key* is
+        already in flight, in which case its result is awaited.
+
+        :param key: call key, e.g. as returned by :func:`cache_key`
+        :param func: callable
+        :return: result of the (shared) call
+        """
+        return self.do_until(key, None, func, *args, **kwargs)
+
+    def do_until(self, key, wait_until, func, *args, **kwargs):
+        """
+        Like :meth:`do`, but wait for a call already in flight at most
+        until deadline *wait_until*. The call itself is expected to
+        honour its own deadline.
+
+        :param key: call key, e.g. as returned by :func:`cache_key`
+        :param wait_until: :class:`enigma2_http_api.resilience.Deadline`
+            or None
+        :param func: callable
+        :return: result of the (shared) call
+        :raises DeadlineExceeded: if the deadline passed before the call
+            in flight completed
+        """
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is None:
+                flight = _Flight()
+                self._flights[key] = flight
+                self.executed += 1
+                leader = True
+            else:
+                flight.waiters += 1
+                self.coalesced += 1
+                leader = False
+
+        if not leader:
+            if wait_until is None:
+                flight.event.wait()
+            elif not flight.event.wait(wait_until.remaining()):
+                with self._lock:
+                    flight.waiters -= 1
+                raise DeadlineExceeded(
+                    "deadline exceeded waiting for a call in flight")
+            if flight.exc_info is not None:
+                raise flight.exc_info[0], flight.exc_info[1], flight.exc_info[2]
+            return self._copy(flight.value)
+
+        try:
+            value = func(*args, **kwargs)
+        except Exception:
+            flight.exc_info = sys.exc_info()
+            with self._lock:
+                del self._flights[key]
+            flight.event.set()
+            raise
+
+        with self._lock:
+            del self._flights[key]
+            waiters = flight.waiters
+
+        if waiters:
+            flight.value = value
+            value = self._copy(value)
+
+        flight.event.set()
+        return value
+
+    def stats(self):
+        """
+        Coalescing statistics.
+
+        :return: number of executed calls, number of calls which shared
+            another call's result and calls currently in flight
+        :rtype: dict
+        """
+        with self._lock:
+            return {
+                'executed': self.executed,
+                'coalesced': self.coalesced,
+                'in_flight': len(self._flights),
+            }
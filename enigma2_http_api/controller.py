@@ -3,18 +3,75 @@
 import os
 import logging
 import pprint
-import json
 import codecs
+import copy
+import time
+import threading
+import urlparse
+import uuid
+from collections import namedtuple
+from multiprocessing.pool import ThreadPool
 
 import requests
 
 from model import EEvent
 from utils import parse_servicereference, NORMALISED_SERVICEREFERENCE_FMT
 from utils import create_servicereference
+from jsonbackend import get_backend
+from transport import create_session, ConnectionStats
+from transport import DEFAULT_POOL_SIZE
+from cache import TTLCache, cache_key, DEFAULT_CACHE_TTL, DEFAULT_CACHE_SIZE
+from cache import INVALIDATED_BY, SingleFlight, is_mutating
+from resilience import get_circuit_breaker, backoff_delays
+from resilience import RETRYABLE_EXCEPTIONS, is_connect_error
+from resilience import DEFAULT_BACKOFF_BASE, DEFAULT_BACKOFF_MAX
+from resilience import DEFAULT_FAILURE_THRESHOLD, DEFAULT_RESET_TIMEOUT
+from resilience import DEFAULT_CONNECT_TIMEOUT, DEFAULT_READ_TIMEOUT
+from resilience import Deadline, DeadlineExceeded
+from ratelimit import get_token_bucket, budget_for_path
+from ratelimit import BUDGET_BULK, BUDGET_INTERACTIVE
+from scheduler import get_scheduler, DEFAULT_MAX_CONCURRENCY
+from scheduler import DEFAULT_BULK_CONCURRENCY, DEFAULT_INTERACTIVE_CONCURRENCY
+from streaming import iter_json_array, STREAM_CHUNK_SIZE
+from metrics import RequestMetrics, wire_bytes
+from replay import ReplayTransport, ReplayMissError
+from resolver import get_default_resolver
+from deviceprofile import DeviceProfile, ProfileStore, version_key
+from deviceprofile import PROBED_ENDPOINTS, DEFAULT_PROFILE_MAX_AGE
+from defaults import PROFILE_CACHE
+from webxml import get_web_call, BACKEND_API, BACKEND_WEB
+from dumpwriter import create_dump_writer, DumpRecord
+from dumpwriter import DUMP_FORMAT_FILES, DUMP_FORMAT_ARCHIVE
+from dumpwriter import DEFAULT_ARCHIVE_MAX_BYTES
+from tracelog import TraceLog, TRACE_PHASES
+from warmer import CacheWarmer, DEFAULT_WARM_DATASETS
+from warmer import DEFAULT_WARM_JITTER, DEFAULT_START_SPREAD
+from tracelog import DEFAULT_TRACE_MAX_BYTES, DEFAULT_TRACE_BACKUP_COUNT
+
+#: default number of worker threads used for crawling bouquets
+DEFAULT_CRAWL_CONCURRENCY = 4
+
+#: result of one API call of a batch, see
+#: :meth:`Enigma2APIController.batch`
+BatchResult = namedtuple('BatchResult',
+                         ['path', 'params', 'result', 'error', 'duration'])
+
+#: outcome of one API call as passed to *after_hooks*; *status* and the
+#: byte counts are None if no request was sent by the calling thread
+#: (response cache hit, coalesced call, failure before a response)
+ApiCallRecord = namedtuple('ApiCallRecord',
+                           ['remote_addr', 'path', 'params', 'status',
+                            'wire_bytes', 'decoded_bytes', 'duration',
+                            'error', 'cached'])
 
 #: enigma2 web interface URL format string
 ENIGMA2_URL_FMT = '{scheme}://{remote_addr}/{path}'
 
+#: correlation ID format string (session ID, request number)
+CORRELATION_ID_FMT = '{:s}-{:06d}'
+
+_END = object()
+
 # http://www.opena.tv/howtos/15123-enigma2-shell-befehle.html
 POWERSTATE_TOGGLE_STANDBY = 0
 POWERSTATE_DEEPSTANDBY = 1
@@ -45,6 +102,28 @@ MESSAGETYPES = [
 ]
 
 
+def batch_spec(spec):
+    """
+    Normalise a :meth:`Enigma2APIController.batch` spec.
+
+    :param spec: tuple of (path, params, filter_key), *params* and
+        *filter_key* may be omitted
+    :return: tuple of (path, params, filter_key)
+    :raises ValueError: if *spec* is malformed
+
+    >>> batch_spec(('about', ))
+    ('about', None, None)
+    >>> batch_spec('about')
+    Traceback (most recent call last):
+        ...
+    ValueError: Invalid batch spec 'about'
+    """
+    if not isinstance(spec, (tuple, list)) or not 1 <= len(spec) <= 3 or \
+            not isinstance(spec[0], basestring):
+        raise ValueError("Invalid batch spec {!r}".format(spec))
+    return tuple(spec) + (None, ) * (3 - len(spec))
+
+
 class BlacklistController(object):
     def __init__(self, *args, **kwargs):
         self.log = logging.getLogger(__name__)
@@ -52,6 +131,7 @@ class BlacklistController(object):
         self._blacklist_path = None
         self._pseudo_id_none_warnings = kwargs.get("pseudo_id_none_warnings",
                                                    True)
+        self.json = get_backend(kwargs.get("json_backend"))
 
         if kwargs.get("blacklist_path"):
             self._blacklist_path = kwargs.get("blacklist_path")
@@ -68,7 +148,7 @@ class BlacklistController(object):
 
         try:
             with codecs.open(filename, "rb", "utf-8") as source:
-                data = json.load(source)
+                data = self.json.load(source)
                 self.log.debug(
                     "the blacklist {!r} contains {:d} entrie(s)".format(
                         filename, len(data)))
@@ -111,7 +191,7 @@ class BlacklistController(object):
             filename, len(data)))
 
         with codecs.open(filename, "wb", "utf-8") as target:
-            json.dump(data, target, indent=2)
+            self.json.dump(data, target, indent=2)
 
 
 class Enigma2APIController(BlacklistController):
@@ -127,64 +207,815 @@ class Enigma2APIController(BlacklistController):
         self.movielist = list()
         self.dry_run = kwargs.get("dry_run", False)
         self.dump_requests = kwargs.get("dump_requests")
+        self.backend = kwargs.get("backend", BACKEND_API)
+        if self.backend not in (BACKEND_API, BACKEND_WEB):
+            raise ValueError("Unsupported backend {!r}".format(self.backend))
         self._request_no = 0
+        self._request_no_lock = threading.Lock()
         self.timezone = kwargs.get("timezone")
+        self.pool_size = kwargs.get("pool_size", DEFAULT_POOL_SIZE)
+        self._connection_stats = ConnectionStats()
+        self.compression = kwargs.get("compression", True)
+        self.session = create_session(pool_size=self.pool_size,
+                                      stats=self._connection_stats,
+                                      compression=self.compression)
+        self.metrics = kwargs.get("metrics") or RequestMetrics()
+        self.before_hooks = list(kwargs.get("before_hooks") or [])
+        self.after_hooks = list(kwargs.get("after_hooks") or [])
+        self._transfers = threading.local()
+        self.session_id = kwargs.get("session_id") or uuid.uuid4().hex[:12]
+        self.trace_log = None
+
+        if kwargs.get("trace_log"):
+            self.trace_log = TraceLog(
+                kwargs.get("trace_log"), self.json,
+                max_bytes=kwargs.get("trace_max_bytes",
+                                     DEFAULT_TRACE_MAX_BYTES),
+                backup_count=kwargs.get("trace_backup_count",
+                                        DEFAULT_TRACE_BACKUP_COUNT),
+                sample_rate=kwargs.get("trace_sample_rate", 1.0))
+        self.replay = None
+
+        if kwargs.get("replay"):
+            self.replay = ReplayTransport(kwargs.get("replay"), self.json)
+            self.log.info('%s', "Replaying requests from {!r}".format(
+                kwargs.get("replay")))
+        self.crawl_concurrency = kwargs.get("crawl_concurrency",
+                                            DEFAULT_CRAWL_CONCURRENCY)
+        self.cache = None
+
+        cache_ttl = kwargs.get("cache_ttl")
+        if cache_ttl:
+            if cache_ttl is True:
+                cache_ttl = DEFAULT_CACHE_TTL
+            self.cache = TTLCache(
+                ttl=cache_ttl,
+                max_entries=kwargs.get("cache_size", DEFAULT_CACHE_SIZE))
+
+        self._flights = None
+        if kwargs.get("coalesce_requests", True):
+            self._flights = SingleFlight()
+
+        self.timeout = kwargs.get(
+            "timeout", (DEFAULT_CONNECT_TIMEOUT, DEFAULT_READ_TIMEOUT))
+        self.endpoint_timeouts = kwargs.get("endpoint_timeouts") or dict()
+        self.retries = kwargs.get("retries", 0)
+        self.backoff_base = kwargs.get("backoff_base", DEFAULT_BACKOFF_BASE)
+        self.backoff_max = kwargs.get("backoff_max", DEFAULT_BACKOFF_MAX)
+        self.circuit_breaker = None
+
+        if kwargs.get("circuit_breaker"):
+            self.circuit_breaker = get_circuit_breaker(
+                self.remote_addr,
+                failure_threshold=kwargs.get("failure_threshold",
+                                             DEFAULT_FAILURE_THRESHOLD),
+                reset_timeout=kwargs.get("reset_timeout",
+                                         DEFAULT_RESET_TIMEOUT))
+
+        self.profile_store = None
+        self.profile = None
+        self._profile_verified = False
+        profile_cache = kwargs.get("profile_cache")
+
+        if profile_cache:
+            if profile_cache is True:
+                profile_cache = PROFILE_CACHE
+            self.profile_store = ProfileStore(
+                profile_cache, max_age=kwargs.get("profile_max_age",
+                                                  DEFAULT_PROFILE_MAX_AGE))
+            self.profile = self.profile_store.get(self.remote_addr)
+
+        self.resolver = kwargs.get("resolver")
+        if self.resolver is None and kwargs.get("resolve_names"):
+            self.resolver = get_default_resolver()
+
+        self.rate_limiters = dict()
+
+        if kwargs.get("rate_limit"):
+            self.rate_limiters[BUDGET_BULK] = get_token_bucket(
+                self.remote_addr, BUDGET_BULK, kwargs.get("rate_limit"),
+                burst=kwargs.get("rate_burst"))
+
+        if kwargs.get("interactive_rate_limit"):
+            self.rate_limiters[BUDGET_INTERACTIVE] = get_token_bucket(
+                self.remote_addr, BUDGET_INTERACTIVE,
+                kwargs.get("interactive_rate_limit"),
+                burst=kwargs.get("interactive_rate_burst"))
+        elif BUDGET_BULK in self.rate_limiters:
+            self.rate_limiters[BUDGET_INTERACTIVE] = self.rate_limiters[
+                BUDGET_BULK]
+
+        self.scheduler = kwargs.get("scheduler")
+        if self.scheduler is True:
+            self.scheduler = get_scheduler(
+                self.remote_addr,
+                max_concurrency=kwargs.get("max_concurrency",
+                                           DEFAULT_MAX_CONCURRENCY),
+                bulk_concurrency=kwargs.get("bulk_concurrency",
+                                            DEFAULT_BULK_CONCURRENCY),
+                interactive_concurrency=kwargs.get(
+                    "interactive_concurrency",
+                    DEFAULT_INTERACTIVE_CONCURRENCY))
+
+        self.dump_writer = None
 
         if self.dump_requests:
+            dump_format = kwargs.get("dump_format", DUMP_FORMAT_FILES)
+            dump_options = dict(
+                sample_rate=kwargs.get("dump_sample_rate", 1.0),
+                sample_paths=kwargs.get("dump_sample_paths"))
+            if dump_format == DUMP_FORMAT_ARCHIVE:
+                dump_options.update(
+                    max_bytes=kwargs.get("dump_max_bytes",
+                                         DEFAULT_ARCHIVE_MAX_BYTES),
+                    max_records=kwargs.get("dump_max_records"))
+            self.dump_writer = create_dump_writer(
+                self.dump_requests, self.json, dump_format=dump_format,
+                **dump_options)
             self.log.info('%s',
                           "{!r} will contain request dump files".format(
                               self.dump_requests))
 
-    def _get(self, url, **kwargs):
+        self.warmer = None
+        warm_datasets = kwargs.get("warm_datasets")
+
+        if warm_datasets:
+            if warm_datasets is True:
+                warm_datasets = DEFAULT_WARM_DATASETS
+            if self.cache is None:
+                self.cache = TTLCache(
+                    max_entries=kwargs.get("cache_size", DEFAULT_CACHE_SIZE))
+            self.warmer = CacheWarmer(
+                self, warm_datasets,
+                jitter=kwargs.get("warm_jitter", DEFAULT_WARM_JITTER),
+                start_spread=kwargs.get("warm_start_spread",
+                                        DEFAULT_START_SPREAD)).start()
+
+    def _request(self, method, url, idempotent=True, deadline=None,
+                 **kwargs):
+        """
+        Generic HTTP request.
+        Idempotent requests failing due to connection problems are retried
+        up to *self.retries* times using jittered exponential backoff.
+        Requests are refused without contacting the device while its
+        circuit breaker is open. If *self.resolver* is set, the device's
+        host name is replaced by its cached addresses (see
+        :meth:`_request_addresses`); connection failures cause it to be
+        resolved again.
+
+        Requests using the *bypass_breaker* keyword are sent even while
+        the circuit is open (e.g. readiness probes of a booting device);
+        their failures are not recorded, but a success closes the circuit.
+
+        :param method: HTTP method
+        :param url: URL
+        :param idempotent: request may safely be retried
+        :param deadline: :class:`enigma2_http_api.resilience.Deadline`
+            limiting all attempts and backoff delays
+        :param kwargs: request parameters
+        :return: response
+        :rtype: requests.Response
+        :raises ReplayMissError: if requests are replayed (*self.replay*),
+            replaying never touches the network
+        """
+        if self.replay is not None:
+            raise ReplayMissError("{:s} {!s} cannot be replayed".format(
+                method, url))
+
+        retries = self.retries if idempotent else 0
+        delays = backoff_delays(retries, base=self.backoff_base,
+                                maximum=self.backoff_max)
+        timeout = kwargs.pop("timeout", self.timeout)
+        breaker = self.circuit_breaker
+        if kwargs.pop("bypass_breaker", False):
+            breaker = None
+
+        while True:
+            if deadline is not None:
+                kwargs['timeout'] = deadline.clamp(timeout)
+            else:
+                kwargs['timeout'] = timeout
+
+            if breaker is not None:
+                breaker.before_request()
+
+            try:
+                req = self._request_addresses(method, url, deadline=deadline,
+                                              requested_timeout=timeout,
+                                              **kwargs)
+            except DeadlineExceeded:
+                # running out of time is no failure of the device
+                if breaker is not None:
+                    breaker.release_probe()
+                raise
+            except RETRYABLE_EXCEPTIONS, exc:
+                if breaker is not None:
+                    breaker.record_failure()
+
+                if self.resolver is not None and isinstance(
+                        exc, requests.exceptions.ConnectionError):
+                    self.resolver.invalidate(urlparse.urlsplit(url).hostname)
+
+                delay = next(delays, None)
+                if delay is not None and deadline is not None:
+                    if delay >= deadline.remaining():
+                        delay = None
+
+                if delay is None:
+                    self.log.error("{:s} {!s} failed: {!s}".format(
+                        method, url, exc))
+                    raise
+
+                self.log.warning(
+                    "{:s} {!s} failed: {!s}, retrying in {:.2f}s".format(
+                        method, url, exc, delay))
+                time.sleep(delay)
+                continue
+            except Exception, exc:
+                if breaker is not None:
+                    breaker.release_probe()
+                self.log.error("{:s} {!s} failed: {!s}".format(
+                    method, url, exc))
+                raise
+
+            if self.circuit_breaker is not None:
+                self.circuit_breaker.record_success()
+
+            return req
+
+    def _request_addresses(self, method, url, deadline=None,
+                           requested_timeout=None, **kwargs):
+        """
+        Send a single HTTP request. If *self.resolver* is set, the host
+        name of *url* is replaced by its addresses in turn until a
+        connection could be established; the original host is sent as
+        ``Host`` header and restored in the response's URL.
+
+        :param method: HTTP method
+        :param url: URL
+        :param deadline: deadline
+        :param requested_timeout: timeout to be clamped to *deadline* for
+            each further address
+        :param kwargs: request parameters
+        :return: response
+        :rtype: requests.Response
+        """
+        if self.resolver is None:
+            return self.session.request(method, url, **kwargs)
+
+        parsed = urlparse.urlsplit(url)
+        addresses = self.resolver.resolve_all(parsed.hostname)
+        headers = kwargs.pop('headers', None) or dict()
+
+        for index, address in enumerate(addresses):
+            target_url = url
+            kwargs['headers'] = headers
+            if address != parsed.hostname:
+                target_url = self._address_url(parsed, address)
+                kwargs['headers'] = dict(headers, Host=parsed.netloc)
+
+            try:
+                req = self.session.request(method, target_url, **kwargs)
+            except RETRYABLE_EXCEPTIONS, exc:
+                if index + 1 == len(addresses) or \
+                        not is_connect_error(exc) or \
+                        (deadline is not None and deadline.expired()):
+                    raise
+                self.log.warning('%s', "Connecting to {!s} failed: {!s}, "
+                                 "trying next address".format(address, exc))
+                if deadline is not None:
+                    kwargs['timeout'] = deadline.clamp(requested_timeout)
+                continue
+
+            if target_url != url:
+                target = urlparse.urlsplit(target_url)
+                response_url = urlparse.urlsplit(req.url)
+                if response_url.netloc == target.netloc:
+                    req.url = urlparse.urlunsplit(
+                        response_url._replace(netloc=parsed.netloc))
+            return req
+
+    @staticmethod
+    def _address_url(parsed, address):
+        """
+        Replace the host name of URL *parsed* by *address*.
+
+        :param parsed: :func:`urlparse.urlsplit` result
+        :param address: IP address
+        :return: URL
+        :rtype: str
+        """
+        if ':' in address:
+            address = '[{:s}]'.format(address)
+        if parsed.port is not None:
+            address = '{:s}:{:d}'.format(address, parsed.port)
+        return urlparse.urlunsplit(parsed._replace(netloc=address))
+
+    def _get(self, url, idempotent=True, deadline=None, **kwargs):
         """
         Generic HTTP GET request.
 
         :param url: URL
+        :param idempotent: request may safely be retried
+        :param deadline: deadline
         :param kwargs: URL parameters
-        :return: decoded JSON data
+        :return: response
+        :rtype: requests.Response
+        """
+        return self._request('GET', url, idempotent=idempotent,
+                             deadline=deadline, **kwargs)
+
+    def _timeout_for(self, path):
+        return self.endpoint_timeouts.get(path, self.timeout)
+
+    def close(self):
+        """
+        Stop cache warming, close all pooled connections and write all
+        pending request dumps and trace lines. Requests are not dumped or
+        traced any more afterwards.
+        """
+        if self.warmer is not None:
+            self.warmer.stop()
+        self.session.close()
+        if self.dump_writer is not None:
+            self.dump_writer.close()
+        if self.trace_log is not None:
+            self.trace_log.close()
+
+    def connection_stats(self):
+        """
+        Retrieve connection reuse statistics.
+
+        :return: number of requests, new connects and reused connections
         :rtype: dict
         """
-        self._request_no += 1
-        try:
-            return requests.get(url, **kwargs)
-        except Exception, exc:
-            self.log.error(
-                "Error GETting {!s}: No JSON result? {!s}".format(url, exc))
-            raise
+        return self._connection_stats.as_dict()
+
+    def get_connection_stats(self):
+        """
+        Retrieve connection reuse statistics, same as
+        :meth:`connection_stats`.
+
+        :return: number of requests, new connects and reused connections
+        :rtype: dict
+        """
+        return self.connection_stats()
+
+    def cache_stats(self):
+        """
+        Retrieve response cache statistics.
+
+        :return: hits, misses, evictions and number of entries or None if
+            caching is disabled
+        :rtype: dict
+        """
+        if self.cache is None:
+            return None
+        return self.cache.stats()
+
+    def coalescing_stats(self):
+        """
+        Retrieve statistics of coalesced concurrent API calls.
+
+        :return: executed, coalesced and in flight calls or None if
+            coalescing is disabled
+        :rtype: dict
+        """
+        if self._flights is None:
+            return None
+        return self._flights.stats()
+
+    def transfer_stats(self):
+        """
+        Retrieve bytes transferred per endpoint.
+
+        :return: number of requests, bytes on the wire, bytes after
+            decompression and compression ratio per API path
+        :rtype: dict
+        """
+        return self.metrics.transfer_stats(self.remote_addr)
+
+    def latency_stats(self):
+        """
+        Retrieve API call latencies per endpoint. Calls answered by the
+        response cache are not accounted.
+
+        :return: number of calls, failed calls, total/minimum/maximum
+            duration and 50th, 95th and 99th percentile in seconds per
+            API path
+        :rtype: dict
+        """
+        return self.metrics.latency_stats(self.remote_addr)
+
+    def dump_stats(self):
+        """
+        Retrieve request dump statistics.
+
+        :return: submitted, written, dropped, skipped and failed request
+            dumps or None if request dumping is disabled
+        :rtype: dict
+        """
+        if self.dump_writer is None:
+            return None
+        return self.dump_writer.stats()
+
+    def trace_stats(self):
+        """
+        Retrieve trace log statistics.
+
+        :return: submitted, written, dropped, skipped and failed trace
+            lines and number of rotations or None if tracing is disabled
+        :rtype: dict
+        """
+        if self.trace_log is None:
+            return None
+        return self.trace_log.stats()
+
+    def warmer_stats(self):
+        """
+        Retrieve cache warming statistics.
+
+        :return: refreshes, failures and schedule per dataset or None if
+            cache warming is disabled
+        :rtype: list
+        """
+        if self.warmer is None:
+            return None
+        return self.warmer.stats()
+
+    def resolver_stats(self):
+        """
+        Retrieve name resolution statistics of *self.remote_addr*.
+
+        :return: cache hits, resolutions, failures, invalidations and
+            time spent resolving in seconds or None if name resolution
+            caching is disabled
+        :rtype: dict
+        """
+        if self.resolver is None:
+            return None
+        return self.resolver.stats(
+            urlparse.urlsplit('//' + self.remote_addr).hostname)
+
+    def scheduler_stats(self):
+        """
+        Retrieve request scheduler statistics.
+
+        :return: statistics per priority class or None if scheduling is
+            disabled
+        :rtype: dict
+        """
+        if self.scheduler is None:
+            return None
+        return self.scheduler.stats()
+
+    def rate_limit_stats(self):
+        """
+        Retrieve rate limiter statistics.
+
+        :return: statistics per budget
+        :rtype: dict
+        """
+        return dict((budget, bucket.stats()) for budget, bucket in
+                    self.rate_limiters.items())
 
     def _api(self, path):
         """
-        Generate an API URL.
+        Generate an API URL (of the ``/web`` XML interface if
+        *self.backend* is ``'web'``).
 
         :param path: path
         :return: API URL
         :rtype: str
         """
         return ENIGMA2_URL_FMT.format(remote_addr=self.remote_addr,
-                                      path='api/{:s}'.format(path),
+                                      path='{:s}/{:s}'.format(self.backend,
+                                                              path),
                                       scheme='http')
 
-    def _dump_request(self, req, filter_key=None):
-        dump_filename = 'eha_raw_{:04d}.json'.format(self._request_no)
-        target_filename = os.path.join(self.dump_requests, dump_filename)
-        data = {
-            'url': req.url,
-            '_filter_key': filter_key,
-            'response': req.json(),
-        }
+    def _next_request_no(self):
+        with self._request_no_lock:
+            self._request_no += 1
+            return self._request_no
 
-        if filter_key:
-            data['response'] = data['response'][filter_key]
+    def _map_concurrent(self, func, items, concurrency=None):
+        """
+        Apply *func* to each of *items* using a bounded pool of worker
+        threads.
+
+        :param func: function to be called for each item
+        :param items: items
+        :param concurrency: maximum number of worker threads
+        :return: results in order of *items*
+        :rtype: list
+        """
+        if concurrency is None:
+            concurrency = self.crawl_concurrency
+        concurrency = max(1, min(concurrency, len(items)))
+
+        if concurrency == 1:
+            return [func(x) for x in items]
+
+        pool = ThreadPool(concurrency)
+        try:
+            return pool.map(func, items)
+        finally:
+            pool.close()
+            pool.join()
+
+    def _dump_request(self, req, filter_key=None, request_no=None,
+                      response=None, content=None):
+        """
+        Hand a request dump to *self.dump_writer*. Either the undecoded
+        *content* or the decoded *response* (reduced to *filter_key*) has
+        to be given.
+        """
+        if request_no is None:
+            request_no = self._request_no
+        self.dump_writer.submit(DumpRecord(request_no, req.url, filter_key,
+                                           content, response))
+
+    def _throttle(self, path, deadline=None):
+        bucket = self.rate_limiters.get(budget_for_path(path))
+        if bucket is None:
+            return
+
+        timeout = None
+        if deadline is not None:
+            timeout = deadline.remaining()
+
+        if not bucket.acquire(timeout=timeout):
+            raise DeadlineExceeded(
+                "deadline exceeded waiting for rate limiter")
+
+    def correlation_id(self, request_no):
+        """
+        Correlation ID of request *request_no*. It is unique across
+        controllers and processes, sent as ``X-Request-Id`` header and
+        written to the trace log.
+
+        :param request_no: request number
+        :return: correlation ID
+        :rtype: str
+        """
+        return CORRELATION_ID_FMT.format(self.session_id, request_no)
+
+    def _start_transfer(self):
+        """
+        Create the accounting record of a new request: correlation ID,
+        request number, HTTP status, byte counts and phase durations (see
+        :mod:`enigma2_http_api.tracelog`).
+
+        :rtype: dict
+        """
+        request_no = self._next_request_no()
+        transfer = dict.fromkeys(TRACE_PHASES)
+        transfer.update(id=self.correlation_id(request_no),
+                        request_no=request_no, status=None, wire_bytes=None,
+                        decoded_bytes=None)
+        return transfer
+
+    def _send(self, path, transfer, deadline=None, stream=False, **kwargs):
+        """
+        Send the request of API call *path* and account its connect,
+        time to first byte and (unless *stream* is set) download phases.
+
+        :param path: path
+        :param transfer: accounting record
+        :param deadline: deadline
+        :param stream: do not receive the response body yet
+        :param kwargs: URL parameters
+        :return: response
+        :rtype: requests.Response
+        """
+        headers = dict(kwargs.pop("headers", None) or dict())
+        headers['X-Request-Id'] = transfer['id']
+        self._connection_stats.pop_connect_time()
+        started = time.time()
+        req = self._get(self._api(path),
+                        idempotent=not is_mutating(path,
+                                                   kwargs.get("params")),
+                        deadline=deadline, stream=stream,
+                        timeout=self._timeout_for(path), headers=headers,
+                        **kwargs)
+        elapsed = req.elapsed.total_seconds()
+        transfer['status'] = req.status_code
+        transfer['connect'] = self._connection_stats.pop_connect_time()
+        transfer['ttfb'] = max(0.0, elapsed - (transfer['connect'] or 0.0))
+        if not stream:
+            transfer['download'] = max(0.0, time.time() - started - elapsed)
+        return req
+
+    def _account(self, path, req, transfer, decoded):
+        wire = wire_bytes(req, decoded)
+        self.metrics.record_transfer(self.remote_addr, path, wire, decoded)
+        transfer['wire_bytes'] = wire
+        transfer['decoded_bytes'] = decoded
+
+    def _loads(self, content, transfer):
+        started = time.time()
+        rv = self.json.loads(content)
+        transfer['decode'] = time.time() - started
+        return rv
+
+    def _admit(self, path, deadline=None):
+        """
+        Wait for a request slot of *self.scheduler*.
+
+        :param path: path
+        :param deadline: deadline
+        :return: priority class of the acquired slot (to be passed to
+            :meth:`_dismiss`) or None if scheduling is disabled
+        :raises DeadlineExceeded: if no slot became available in time
+        """
+        if self.scheduler is None:
+            return None
+
+        priority = budget_for_path(path)
+        timeout = None
+        if deadline is not None:
+            timeout = deadline.remaining()
+
+        if not self.scheduler.acquire(priority, timeout=timeout):
+            raise DeadlineExceeded(
+                "deadline exceeded waiting for a request slot")
+        return priority
+
+    def _dismiss(self, priority):
+        if priority is not None:
+            self.scheduler.release(priority)
+
+    def _replayed(self, path, transfer, filter_key=None, **kwargs):
+        """
+        Look up the captured response of API call *path* in *self.replay*.
+
+        :param path: path
+        :param transfer: accounting record
+        :param filter_key: key of interest
+        :param kwargs: URL parameters
+        :return: JSON document
+        :rtype: str
+        """
+        content = self.replay.lookup(path, kwargs.get("params"), filter_key)
+        self.metrics.record_transfer(self.remote_addr, path, len(content),
+                                     len(content))
+        transfer['wire_bytes'] = transfer['decoded_bytes'] = len(content)
+        return content
+
+    def _fetch(self, path, filter_key=None, deadline=None, **kwargs):
+        """
+        Request API call *path* from the enigma2 device.
+
+        :param path: path
+        :param filter_key: key of interest (only used for request dumps)
+        :param deadline: deadline
+        :param kwargs: URL parameters
+        :return: decoded JSON data
+        :rtype: dict
+        """
+        transfer = self._start_transfer()
+        self._transfers.last = transfer
+
+        if self.replay is not None:
+            content = self._replayed(path, transfer, filter_key, **kwargs)
+            return self._loads(content, transfer)
 
-        with open(target_filename, "wb") as target:
-            json.dump(data, target, indent=2)
+        web_call = None
+        if self.backend == BACKEND_WEB:
+            web_call = get_web_call(path)
+
+        self._throttle(path, deadline)
+        priority = self._admit(path, deadline)
+        try:
+            req = self._send(path, transfer, deadline=deadline,
+                             stream=web_call is not None, **kwargs)
+
+            if web_call is not None:
+                return self._decode_web(web_call, path, req, transfer,
+                                        filter_key)
+
+            content = req.content
+        finally:
+            self._dismiss(priority)
+
+        self._account(path, req, transfer, len(content))
+        rv = self._loads(content, transfer)
+
+        # only valid JSON documents may be embedded into archive lines
+        if self.dump_writer is not None and self.dump_writer.accept(path):
+            self._dump_request(req, filter_key, transfer['request_no'],
+                               content=content)
+
+        return rv
+
+    @staticmethod
+    def _iter_content(req, decoded, on_end=None):
+        for chunk in req.iter_content(STREAM_CHUNK_SIZE):
+            decoded[0] += len(chunk)
+            yield chunk
+        if on_end is not None:
+            on_end()
+
+    def _decode_web(self, web_call, path, req, transfer, filter_key=None):
+        """
+        Incrementally parse the ``/web`` XML response *req*.
+
+        :param web_call: mapping of the API call
+        :param path: path
+        :param req: streamed response
+        :param transfer: accounting record
+        :param filter_key: key of interest (only used for request dumps)
+        :return: decoded data
+        :rtype: dict
+        """
+        decoded = [0]
+        started = time.time()
+        try:
+            rv = web_call.decode(self._iter_content(req, decoded))
+        finally:
+            transfer['download'] = time.time() - started
+            self._account(path, req, transfer, decoded[0])
+            req.close()
+
+        if self.dump_writer is not None and self.dump_writer.accept(path):
+            self._dump_request(req, filter_key, transfer['request_no'],
+                               response=rv[filter_key] if filter_key else rv)
+
+        return rv
+
+    def _before_call(self, path, params):
+        self.metrics.call_started(self.remote_addr, path)
+        for hook in self.before_hooks:
+            try:
+                hook(self.remote_addr, path, params)
+            except Exception, exc:
+                self.log.warning('%s', "before hook {!r} failed: {!r}".format(
+                    hook, exc))
+
+    def _after_call(self, path, params, started, error=None, cached=False,
+                    transfer=None, models=None):
+        """
+        Account a finished API call, pass it to *self.after_hooks* and
+        write it to *self.trace_log*.
+
+        :param path: path
+        :param params: URL parameters
+        :param started: start time (UNIX timestamp)
+        :param error: exception raised by the call
+        :param cached: True if the call was answered by the response cache
+        :param transfer: accounting record of the request sent
+        :param models: seconds spent constructing models
+        """
+        duration = time.time() - started
+        transfer = transfer or dict()
+        self.metrics.call_finished(self.remote_addr, path)
+        if not cached:
+            self.metrics.record_latency(self.remote_addr, path, duration,
+                                        error=error is not None)
+
+        if self.after_hooks:
+            record = ApiCallRecord(
+                self.remote_addr, path, params, transfer.get('status'),
+                transfer.get('wire_bytes'), transfer.get('decoded_bytes'),
+                duration, error, cached)
+            for hook in self.after_hooks:
+                try:
+                    hook(record)
+                except Exception, exc:
+                    self.log.warning(
+                        '%s', "after hook {!r} failed: {!r}".format(hook,
+                                                                    exc))
+
+        if self.trace_log is not None and self.trace_log.accept(path):
+            line = dict((key, transfer.get(key)) for key in TRACE_PHASES)
+            line.update(
+                time=started, id=transfer.get('id'), box=self.remote_addr,
+                path=path, params=params, status=transfer.get('status'),
+                wire_bytes=transfer.get('wire_bytes'),
+                decoded_bytes=transfer.get('decoded_bytes'),
+                duration=duration, cached=cached, models=models,
+                error=repr(error) if error is not None else None)
+            self.trace_log.submit(line)
 
     def _apicall(self, path, **kwargs):
         """
         Execute generic API call.
+        Responses of cacheable API calls are served from *self.cache*
+        if response caching is enabled. Identical concurrent calls of
+        non mutating API calls share one request unless
+        *coalesce_requests* is disabled.
+
+        Each call is passed to *self.before_hooks* as (remote_addr, path,
+        params) before and as :data:`ApiCallRecord` to *self.after_hooks*
+        after it finished. Its duration is accounted in *self.metrics*
+        and its phases are written to *self.trace_log*.
 
         :param path: path
-        :param kwargs: URL parameters
+        :param kwargs: URL parameters; *deadline* (seconds or
+            :class:`enigma2_http_api.resilience.Deadline`) limits the
+            call's duration, *convert* is applied to the result (e.g. to
+            construct models), *refresh* bypasses cached responses (the
+            result is cached nevertheless)
         :return: decoded JSON data
         :rtype: dict
         """
@@ -192,27 +1023,267 @@ class Enigma2APIController(BlacklistController):
         if filter_key:
             del kwargs['filter_key']
 
-        req = self._get(self._api(path), **kwargs)
+        convert = kwargs.pop("convert", None)
+        refresh = kwargs.pop("refresh", False)
+        kwargs['deadline'] = Deadline.coerce(kwargs.get("deadline"))
+        params = kwargs.get("params")
 
-        if self.dump_requests:
-            try:
-                self._dump_request(req, filter_key)
-            except Exception, exc:
-                self.log.warning('%s',
-                                 "Request dumping failed: {!r}".format(exc))
+        self._before_call(path, params)
+        self._transfers.last = None
+        started = time.time()
+        rv = None
+        key = None
+        error = None
+        models = None
 
-        rv = req.json()
-        if filter_key:
-            rv = rv[filter_key]
+        try:
+            if self.cache is not None and \
+                    self.cache.is_cacheable(path, params):
+                key = cache_key(path, params)
+                if not refresh:
+                    rv = self.cache.get(key)
+                if rv is not None:
+                    rv = copy.deepcopy(rv)
+
+            cached = rv is not None
+
+            if rv is None:
+                if self._flights is not None and \
+                        not is_mutating(path, params):
+                    rv = self._flights.do_until(
+                        cache_key(path, params), kwargs['deadline'],
+                        self._fetch, path, filter_key, **kwargs)
+                else:
+                    rv = self._fetch(path, filter_key, **kwargs)
+
+                if key is not None:
+                    self.cache.put(key, copy.deepcopy(rv))
+                elif self.cache is not None:
+                    for invalidated_path in INVALIDATED_BY.get(path, ()):
+                        self.cache.invalidate(invalidated_path)
+
+            if filter_key:
+                rv = rv[filter_key]
+
+            if convert is not None:
+                converting = time.time()
+                rv = convert(rv)
+                models = time.time() - converting
+        except Exception, exc:
+            cached = False
+            error = exc
+            raise
+        finally:
+            self._after_call(path, params, started, error=error,
+                             cached=cached, transfer=self._transfers.last,
+                             models=models)
 
         return rv
 
+    def _iter_apicall(self, path, array_key, deadline=None, convert=None,
+                      **kwargs):
+        """
+        Execute generic API call, decoding the items of array *array_key*
+        incrementally while the response is received.
+        Responses are neither cached nor coalesced. Hooks are called as
+        for :meth:`_apicall`, the duration includes the time the caller
+        spent consuming the items.
+
+        The request slot of *self.scheduler* is held while the response
+        is received, i.e. until its last chunk has been read or the
+        generator is closed. Callers consuming the items slowly delay
+        other bulk calls to the device and should rather collect them
+        first; abandoned generators should be closed.
+
+        :param path: path
+        :param array_key: key of the array of interest
+        :param deadline: deadline
+        :param convert: function applied to each item (e.g. to construct
+            models)
+        :param kwargs: URL parameters
+        :return: generator of decoded items
+        """
+        params = kwargs.get("params")
+        self._before_call(path, params)
+        started = time.time()
+        transfer = self._start_transfer()
+        error = None
+        models = None
+        if convert is not None:
+            models = 0.0
+
+        slot = list()
+
+        def release():
+            while slot:
+                self._dismiss(slot.pop())
+
+        try:
+            req = None
+            dumped = None
+            decoded = [0]
+
+            if self.replay is not None:
+                content = self._replayed(path, transfer, array_key, **kwargs)
+                items = iter_json_array([content], array_key)
+                phase = 'decode'
+            else:
+                web_call = None
+                if self.backend == BACKEND_WEB:
+                    web_call = get_web_call(path)
+
+                deadline = Deadline.coerce(deadline)
+                self._throttle(path, deadline)
+                slot.append(self._admit(path, deadline))
+                req = self._send(path, transfer, deadline=deadline,
+                                 stream=True, **kwargs)
+                if self.dump_writer is not None and \
+                        self.dump_writer.accept(path):
+                    dumped = list()
+                chunks = self._iter_content(req, decoded, on_end=release)
+
+                if web_call is not None:
+                    items = web_call.iter_items(chunks)
+                else:
+                    items = iter_json_array(chunks, array_key)
+                phase = 'download'
+
+            transfer[phase] = 0.0
+            try:
+                while True:
+                    receiving = time.time()
+                    item = next(items, _END)
+                    transfer[phase] += time.time() - receiving
+                    if item is _END:
+                        break
+
+                    if dumped is not None:
+                        dumped.append(item)
+                    if convert is not None:
+                        converting = time.time()
+                        item = convert(item)
+                        models += time.time() - converting
+                    yield item
+            finally:
+                if req is not None:
+                    self._account(path, req, transfer, decoded[0])
+                    req.close()
+                release()
+
+            if dumped is not None:
+                self._dump_request(req, array_key, transfer['request_no'],
+                                   response=dumped)
+        except Exception, exc:
+            error = exc
+            raise
+        finally:
+            release()
+            self._after_call(path, params, started, error=error,
+                             transfer=transfer, models=models)
+
+    def _to_event(self, item):
+        return EEvent(item, timezone=self.timezone)
+
+    def _to_events(self, items, filter_func=None):
+        if filter_func is not None:
+            items = filter_func(items)
+        return [self._to_event(x) for x in items]
+
+    def _iter_events(self, path, params, filter_func=None, deadline=None):
+        # the generator's body runs on first iteration, start the clock now
+        events = self._iter_apicall(path, 'events', params=params,
+                                    deadline=Deadline.coerce(deadline),
+                                    convert=self._to_event)
+        if filter_func is not None:
+            return filter_func(events)
+        return events
+
+    def refresh_cache(self, path, params=None, deadline=None):
+        """
+        Fetch API call *path* bypassing the response cache and store the
+        result in it (e.g. to keep a dataset warm).
+
+        :param path: path
+        :param params: URL parameters
+        :param deadline: deadline
+        :return: decoded JSON data
+        :rtype: dict
+        """
+        return self._apicall(path, params=params, deadline=deadline,
+                             refresh=True)
+
+    def batch(self, specs, concurrency=None, deadline=None):
+        """
+        Execute several API calls concurrently.
+
+        Each spec is a tuple of (path, params, filter_key); *params* and
+        *filter_key* may be omitted or None. Failing calls do not affect
+        the others, their exception is returned as the item's *error*;
+        malformed specs result in a :class:`ValueError` *error*.
+
+        :param specs: API call specifications
+        :param concurrency: maximum number of concurrent requests
+            (default: all calls at once, bounded by *self.pool_size*)
+        :param deadline: deadline (seconds or
+            :class:`enigma2_http_api.resilience.Deadline`) for all calls
+        :return: list of :class:`BatchResult` items in order of *specs*
+        :rtype: list
+
+        .. code::
+
+            results = eac.batch([
+                ('about',),
+                ('timerlist', None, 'timers'),
+                ('getservices', {'sRef': bouquet_ref}, 'services'),
+            ])
+        """
+        specs = list(specs)
+        deadline = Deadline.coerce(deadline)
+
+        if concurrency is None:
+            concurrency = min(len(specs), self.pool_size)
+
+        def call(spec):
+            try:
+                (path, params, filter_key) = batch_spec(spec)
+            except ValueError, exc:
+                return BatchResult(None, None, None, exc, 0.0)
+
+            kwargs = dict(deadline=deadline)
+            if params is not None:
+                kwargs['params'] = params
+            if filter_key is not None:
+                kwargs['filter_key'] = filter_key
+
+            started = time.time()
+            try:
+                result = self._apicall(path, **kwargs)
+            except Exception, exc:
+                return BatchResult(path, params, None, exc,
+                                   time.time() - started)
+            return BatchResult(path, params, result, None,
+                               time.time() - started)
+
+        return self._map_concurrent(call, specs, concurrency=concurrency)
+
     def has_rest_support(self):
+        """
+        Check if the device supports the REST file API. The result of
+        the device profile is used if profile caching is enabled.
+
+        :rtype: bool
+        """
+        if self.profile_store is not None:
+            return self.device_profile().rest_support
+        return self._probe_rest_support()
+
+    def _probe_rest_support(self):
         result = False
         target_url = ENIGMA2_URL_FMT.format(scheme='http',
                                             remote_addr=self.remote_addr,
                                             path='file')
-        req = requests.options(target_url)
+        req = self._request('OPTIONS', target_url,
+                            timeout=self._timeout_for('file'))
 
         if req.status_code == 200:
             expected_headers = [
@@ -230,6 +1301,58 @@ class Enigma2APIController(BlacklistController):
 
         return result
 
+    def _probe_endpoint(self, path):
+        try:
+            req = self._request('GET', self._api(path),
+                                timeout=self._timeout_for(path))
+        except RETRYABLE_EXCEPTIONS:
+            return False
+        return req.status_code == 200
+
+    def device_profile(self, refresh=False):
+        """
+        Get the device's capability profile, probing the device unless
+        a valid profile was loaded from *self.profile_store*. A loaded
+        profile is checked against the device's software versions once.
+
+        :param refresh: probe the device even if a profile is available
+        :return: profile
+        :rtype: enigma2_http_api.deviceprofile.DeviceProfile
+        """
+        if self.profile is not None and not self._profile_verified:
+            self.get_about()
+
+        if self.profile is not None and not refresh:
+            return self.profile
+
+        about = self._apicall('about')
+        endpoints = self._map_concurrent(self._probe_endpoint,
+                                         list(PROBED_ENDPOINTS))
+        self.profile = DeviceProfile.from_about(
+            self.remote_addr, about,
+            rest_support=self._probe_rest_support(),
+            endpoints=dict(zip(PROBED_ENDPOINTS, endpoints)))
+        self.log.debug("Probed profile {!r}".format(self.profile.as_dict()))
+        self._profile_verified = True
+
+        if self.profile_store is not None:
+            self.profile_store.put(self.profile)
+        return self.profile
+
+    def _validate_profile(self, about):
+        if self.profile is None:
+            return
+
+        if version_key(about) == self.profile.version_key:
+            self._profile_verified = True
+            return
+
+        self.log.info('%s', "Software of {!r} changed, dropping device "
+                            "profile".format(self.remote_addr))
+        self.profile = None
+        if self.profile_store is not None:
+            self.profile_store.invalidate(self.remote_addr)
+
     def update_movielist_map(self):
         """
         Update internal movie list map *self.movielist_map*
@@ -248,66 +1371,190 @@ class Enigma2APIController(BlacklistController):
                 continue
             self.movielist_map[e_item.pseudo_id] = item
 
-    def get_services(self):
+    def get_services(self, deadline=None):
         """
         Get services (bouquets).
 
+        :param deadline: deadline
         :return: list containing service name and reference
         :rtype: list
         """
-        res = self._apicall('getservices', filter_key='services')
+        res = self._apicall('getservices', filter_key='services',
+                            deadline=deadline)
         services = list()
         for row in res:
             services.append((row['servicename'], row['servicereference']))
         return services
 
-    def get_getservices(self, service_ref):
+    def get_getservices(self, service_ref, deadline=None):
         params = {
             'sRef': service_ref,
         }
         return self._apicall('getservices', params=params,
-                             filter_key='services')
+                             filter_key='services', deadline=deadline)
 
-    def get_about(self):
+    def get_bouquets_services(self, concurrency=None, deadline=None):
+        """
+        Get the services of all bouquets.
+        Bouquets are fetched concurrently using at most *concurrency*
+        worker threads (default: *self.crawl_concurrency*).
+
+        :param concurrency: maximum number of concurrent requests
+        :param deadline: deadline (seconds or
+            :class:`enigma2_http_api.resilience.Deadline`) for the whole
+            crawl
+        :return: list of (bouquet name, bouquet reference, services) tuples
+            in bouquet order
+        :rtype: list
+        """
+        deadline = Deadline.coerce(deadline)
+        bouquets = self.get_services(deadline=deadline)
+        results = self._map_concurrent(
+            lambda bouquet: self.get_getservices(bouquet[1],
+                                                 deadline=deadline),
+            bouquets, concurrency=concurrency)
+
+        return [(servicename, servicereference, services)
+                for (servicename, servicereference), services in
+                zip(bouquets, results)]
+
+    def get_about(self, deadline=None):
         """
         Retrieve information about enigma2 device.
+        A device profile not matching the device's software versions is
+        dropped.
 
+        :param deadline: deadline (seconds or
+            :class:`enigma2_http_api.resilience.Deadline`)
         :return: Enigma2 device information
         :rtype: dict
         """
-        return self._apicall('about')
+        res = self._apicall('about', deadline=deadline)
+        self._validate_profile(res)
+        return res
 
-    def get_epgbouquet(self, bouquet_ref, filter_func=None):
+    def get_epgbouquet(self, bouquet_ref, filter_func=None, deadline=None):
         """
         Get EPG datasets for *bouquet_ref*.
         (**currently** running subservices' EPG datasets)
 
         :param bouquet_ref: bouquet reference
         :param filter_func: filter function
+        :param deadline: deadline (seconds or
+            :class:`enigma2_http_api.resilience.Deadline`)
         :return: EPG datasets of current subservice
         :rtype: list
         """
         res = self._apicall('epgbouquet', params={'bRef': bouquet_ref},
-                            filter_key='events')
+                            filter_key='events', deadline=deadline)
+        if filter_func is not None:
+            return list(filter_func(res))
+        return res
+
+    def get_epgnow(self, bouquet_ref, filter_func=None, deadline=None):
+        """
+        Get the currently running events of the services of
+        *bouquet_ref*.
+
+        :param bouquet_ref: bouquet reference
+        :param filter_func: filter function
+        :param deadline: deadline (seconds or
+            :class:`enigma2_http_api.resilience.Deadline`)
+        :return: EPG datasets
+        :rtype: list
+        """
+        res = self._apicall('epgnow', params={'bRef': bouquet_ref},
+                            filter_key='events', deadline=deadline)
+        if filter_func is not None:
+            return list(filter_func(res))
+        return res
+
+    def get_epgnext(self, bouquet_ref, filter_func=None, deadline=None):
+        """
+        Get the events following the currently running ones of the
+        services of *bouquet_ref*.
+
+        :param bouquet_ref: bouquet reference
+        :param filter_func: filter function
+        :param deadline: deadline (seconds or
+            :class:`enigma2_http_api.resilience.Deadline`)
+        :return: EPG datasets
+        :rtype: list
+        """
+        res = self._apicall('epgnext', params={'bRef': bouquet_ref},
+                            filter_key='events', deadline=deadline)
         if filter_func is not None:
             return list(filter_func(res))
         return res
 
-    def get_epgservice(self, service_ref, filter_func=None):
+    def get_epgservice(self, service_ref, filter_func=None, deadline=None):
         """
         Get EPG datasets for *service_ref*.
 
         :param service_ref: service reference
         :param filter_func: filter function
+        :param deadline: deadline
         :return: EPG datasets of given service
         :rtype: list
         """
         res = self._apicall('epgservice', params={'sRef': service_ref},
-                            filter_key='events')
+                            filter_key='events', deadline=deadline)
         if filter_func is not None:
             return list(filter_func(res))
         return res
 
+    def get_epgservices(self, service_refs, filter_func=None,
+                        concurrency=None, deadline=None):
+        """
+        Harvest EPG datasets of several services concurrently using at
+        most *concurrency* worker threads (default:
+        *self.crawl_concurrency*).
+
+        :param service_refs: service references
+        :param filter_func: filter function
+        :param concurrency: maximum number of concurrent requests
+        :param deadline: deadline (seconds or
+            :class:`enigma2_http_api.resilience.Deadline`) for the whole
+            harvest
+        :return: EPG datasets per service in order of *service_refs*
+        :rtype: list
+        """
+        deadline = Deadline.coerce(deadline)
+        return self._map_concurrent(
+            lambda service_ref: self.get_epgservice(
+                service_ref, filter_func=filter_func, deadline=deadline),
+            list(service_refs), concurrency=concurrency)
+
+    def iter_epgbouquet(self, bouquet_ref, filter_func=None, deadline=None):
+        """
+        Streaming variant of :meth:`get_epgbouquet`: EPG datasets are
+        decoded and yielded one at a time while the response is received.
+
+        :param bouquet_ref: bouquet reference
+        :param filter_func: filter function (receiving
+            :class:`enigma2_http_api.model.EEvent` items)
+        :param deadline: deadline (seconds or
+            :class:`enigma2_http_api.resilience.Deadline`)
+        :return: generator of EPG datasets
+        """
+        return self._iter_events('epgbouquet', {'bRef': bouquet_ref},
+                                 filter_func=filter_func, deadline=deadline)
+
+    def iter_epgservice(self, service_ref, filter_func=None, deadline=None):
+        """
+        Streaming variant of :meth:`get_epgservice`: EPG datasets are
+        decoded and yielded one at a time while the response is received.
+
+        :param service_ref: service reference
+        :param filter_func: filter function (receiving
+            :class:`enigma2_http_api.model.EEvent` items)
+        :param deadline: deadline (seconds or
+            :class:`enigma2_http_api.resilience.Deadline`)
+        :return: generator of EPG datasets
+        """
+        return self._iter_events('epgservice', {'sRef': service_ref},
+                                 filter_func=filter_func, deadline=deadline)
+
     def get_subservices(self):
         """
         Get subservices for current service
@@ -345,14 +1592,16 @@ class Enigma2APIController(BlacklistController):
         }
         return self._apicall('moviedelete', params=params)
 
-    def get_timerlist(self):
+    def get_timerlist(self, deadline=None):
         """
         Get list of timers.
 
+        :param deadline: deadline (seconds or
+            :class:`enigma2_http_api.resilience.Deadline`)
         :return:
         """
-        return [EEvent(x, timezone=self.timezone) for x in
-                self._apicall('timerlist', filter_key='timers')]
+        return self._apicall('timerlist', filter_key='timers',
+                             deadline=deadline, convert=self._to_events)
 
     def get_timeradd(self, service_ref, params):
         """
@@ -397,22 +1646,39 @@ class Enigma2APIController(BlacklistController):
         }
         return self._apicall('timerdelete', params=params, filter_key='message')
 
-    def get_search(self, what, filter_func=None):
+    def get_search(self, what, filter_func=None, deadline=None):
         """
         Search EPG for *what*.
         Will filter results if *filter_func* is given.
 
         :param what: Search string
         :param filter_func: result filtering function
+        :param deadline: deadline (seconds or
+            :class:`enigma2_http_api.resilience.Deadline`)
         :return:
         """
         params = {
             'search': what,
         }
-        res = self._apicall('epgsearch', params=params, filter_key='events')
-        if filter_func is not None:
-            return [EEvent(x, timezone=self.timezone) for x in filter_func(res)]
-        return [EEvent(x, timezone=self.timezone) for x in res]
+        return self._apicall(
+            'epgsearch', params=params, filter_key='events',
+            deadline=deadline,
+            convert=lambda res: self._to_events(res, filter_func))
+
+    def iter_search(self, what, filter_func=None, deadline=None):
+        """
+        Streaming variant of :meth:`get_search`: results are decoded and
+        yielded one at a time while the response is received.
+
+        :param what: Search string
+        :param filter_func: result filtering function (receiving
+            :class:`enigma2_http_api.model.EEvent` items)
+        :param deadline: deadline (seconds or
+            :class:`enigma2_http_api.resilience.Deadline`)
+        :return: generator of search results
+        """
+        return self._iter_events('epgsearch', {'search': what},
+                                 filter_func=filter_func, deadline=deadline)
 
     def get_zap(self, service_ref):
         """
@@ -431,13 +1697,21 @@ class Enigma2APIController(BlacklistController):
 
         return self._apicall('zap', params=params, filter_key='message')
 
-    def get_powerstate(self, new_state):
+    def get_powerstate(self, new_state=None, deadline=None,
+                       bypass_breaker=False):
         """
-        Change Power State
+        Change Power State or query it if *new_state* is None.
 
         :param new_state: Desired Power State
-        :return:
+        :param deadline: deadline
+        :param bypass_breaker: send the request even while the device's
+            circuit breaker is open
+        :return: result and *instandby* flag
         """
+        if new_state is None:
+            return self._apicall('powerstate', deadline=deadline,
+                                 bypass_breaker=bypass_breaker)
+
         params = {
             'newstate': new_state,
         }
@@ -447,7 +1721,8 @@ class Enigma2APIController(BlacklistController):
                           "WOULD set powerstate to {!r}".format(new_state))
             return ''
 
-        return self._apicall('powerstate', params=params)
+        return self._apicall('powerstate', params=params, deadline=deadline,
+                             bypass_breaker=bypass_breaker)
 
     def get_message(self, messagetext, timeout=10,
                     messagetype=MESSAGETYPE_INFO):
@@ -4,3 +4,8 @@ import os
 
 REMOTE_ADDR = os.environ.get('ENIGMA2_HTTP_API_HOST', '127.0.0.1')
 
+
+PROFILE_CACHE = os.environ.get(
+    'ENIGMA2_HTTP_API_PROFILE_CACHE',
+    os.path.join(os.path.expanduser('~'), '.cache', 'enigma2_http_api',
+                 'profiles.json'))
@@ -0,0 +1,255 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Device profiles.
+----------------
+
+Capabilities of an enigma2 device (REST support, web interface flavour,
+tuners, image version, supported API calls) are probed once and kept in
+a local JSON file so that subsequent runs do not need to probe again.
+
+Persisted profiles are invalidated once they are older than *max_age*
+seconds or as soon as an ``about`` response reveals different software
+versions (see :func:`version_key`). The profile file may be shared by
+several processes; updates are serialised using a lock file.
+"""
+import os
+import json
+import time
+import hashlib
+import logging
+import tempfile
+import threading
+import contextlib
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover
+    fcntl = None
+
+#: default number of seconds a persisted device profile is used
+DEFAULT_PROFILE_MAX_AGE = 7 * 24 * 3600
+
+#: read-only API calls whose support is probed
+PROBED_ENDPOINTS = (
+    'currenttime',
+    'getcurrlocation',
+    'getlocations',
+    'gettags',
+    'movietags',
+    'statusinfo',
+)
+
+#: *about* information fields identifying a device's hard- and software
+VERSION_FIELDS = ('brand', 'model', 'boxtype', 'imagedistro', 'imagever',
+                  'enigmaver', 'webifver', 'kernelver')
+
+#: API flavour of OpenWebif based web interfaces
+API_FLAVOUR_OPENWEBIF = 'openwebif'
+
+#: API flavour of unknown web interfaces
+API_FLAVOUR_UNKNOWN = 'unknown'
+
+
+def version_key(about):
+    """
+    Generate a key identifying the device's hard- and software versions.
+
+    :param about: response of *about* API call
+    :return: hex digest
+    :rtype: str
+
+    >>> about = {'info': {'imagever': '6.1', 'webifver': 'OWIF 1.2.5'}}
+    >>> version_key(about) == version_key({'info': dict(about['info'])})
+    True
+    """
+    info = about.get('info') or dict()
+    data = json.dumps([info.get(x) for x in VERSION_FIELDS])
+    return hashlib.sha1(data).hexdigest()
+
+
+def api_flavour(about):
+    """
+    Determine the web interface flavour.
+
+    :param about: response of *about* API call
+    :return: API flavour
+
+    >>> api_flavour({'info': {'webifver': 'OWIF 1.2.5'}})
+    'openwebif'
+    """
+    webifver = (about.get('info') or dict()).get('webifver') or ''
+    if webifver.upper().startswith('OWIF'):
+        return API_FLAVOUR_OPENWEBIF
+    return API_FLAVOUR_UNKNOWN
+
+
+class DeviceProfile(object):
+    """
+    Capabilities of device *remote_addr*.
+    """
+    fields = ('remote_addr', 'version_key', 'probed_at', 'rest_support',
+              'api_flavour', 'tuner_count', 'image_version', 'model',
+              'endpoints')
+
+    def __init__(self, **kwargs):
+        for field in self.fields:
+            setattr(self, field, kwargs.get(field))
+
+    def __repr__(self):
+        return '<{:s} {!r} {!r}>'.format(self.__class__.__name__,
+                                          self.remote_addr, self.model)
+
+    @classmethod
+    def from_about(cls, remote_addr, about, **kwargs):
+        """
+        Create a profile using *about* response.
+
+        :param remote_addr: device address
+        :param about: response of *about* API call
+        :param kwargs: further profile fields
+        :return: profile
+        :rtype: DeviceProfile
+
+        >>> profile = DeviceProfile.from_about('box', {'info': {
+        ...     'imagedistro': 'openatv', 'imagever': '6.1',
+        ...     'tuners': [{'name': 'Tuner A'}, {'name': 'Tuner B'}]}})
+        >>> profile.tuner_count, profile.image_version
+        (2, 'openatv 6.1')
+        """
+        info = about.get('info') or dict()
+        image_version = ' '.join(
+            x for x in (info.get('imagedistro'), info.get('imagever')) if x)
+        kwargs.setdefault('probed_at', time.time())
+        return cls(remote_addr=remote_addr,
+                   version_key=version_key(about),
+                   api_flavour=api_flavour(about),
+                   tuner_count=len(info.get('tuners') or []),
+                   image_version=image_version,
+                   model=info.get('model'),
+                   **kwargs)
+
+    def supports(self, path):
+        """
+        Check if API call *path* is supported. API calls which were not
+        probed are assumed to be supported.
+
+        :param path: API path
+        :rtype: bool
+        """
+        return (self.endpoints or dict()).get(path, True)
+
+    def as_dict(self):
+        return dict((field, getattr(self, field)) for field in self.fields)
+
+
+class ProfileStore(object):
+    """
+    Thread and process safe persistent store of :class:`DeviceProfile`
+    items in JSON file *path*.
+    """
+
+    def __init__(self, path, max_age=DEFAULT_PROFILE_MAX_AGE,
+                 clock=time.time):
+        self.log = logging.getLogger(__name__)
+        self.path = path
+        self.max_age = max_age
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._profiles = None
+
+    def _load(self):
+        if self._profiles is not None:
+            return
+        self._profiles = dict()
+        try:
+            with open(self.path, "rb") as source:
+                self._profiles = json.load(source)
+        except (IOError, ValueError), exc:
+            if os.path.exists(self.path):
+                self.log.warning('%s', "Failed to load profiles {!r}: "
+                                       "{!s}".format(self.path, exc))
+
+    @contextlib.contextmanager
+    def _file_lock(self):
+        """
+        Hold an exclusive lock on ``<path>.lock`` shared with other
+        processes using the same profile file.
+        """
+        directory = os.path.dirname(os.path.abspath(self.path))
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+        with open(self.path + '.lock', "ab") as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            yield
+
+    def _persist(self):
+        directory = os.path.dirname(os.path.abspath(self.path))
+        (handle, temp_path) = tempfile.mkstemp(dir=directory,
+                                               suffix='.tmp')
+        with os.fdopen(handle, "wb") as target:
+            json.dump(self._profiles, target, indent=2)
+        os.rename(temp_path, self.path)
+
+    def get(self, remote_addr):
+        """
+        Get the persisted profile of *remote_addr*.
+
+        :param remote_addr: device address
+        :return: profile or None if there is none or it expired
+        :rtype: DeviceProfile
+        """
+        with self._lock:
+            self._load()
+            data = self._profiles.get(remote_addr)
+
+        if data is None:
+            return None
+
+        profile = DeviceProfile(**data)
+        if self._clock() - (profile.probed_at or 0) > self.max_age:
+            return None
+        return profile
+
+    def put(self, profile):
+        """
+        Persist *profile*.
+
+        :param profile: profile
+        :type profile: DeviceProfile
+        """
+        def update(profiles):
+            profiles[profile.remote_addr] = profile.as_dict()
+            return True
+
+        self._update(update)
+
+    def invalidate(self, remote_addr):
+        """
+        Remove the persisted profile of *remote_addr*.
+
+        :param remote_addr: device address
+        """
+        self._update(
+            lambda profiles: profiles.pop(remote_addr, None) is not None)
+
+    def _update(self, update):
+        """
+        Apply *update* to the persisted profiles. The profile file is read
+        again while holding the file lock, so profiles persisted by other
+        processes in the meantime are not lost.
+
+        :param update: callable modifying the profiles mapping, returns
+            True if the mapping changed
+        """
+        with self._lock:
+            try:
+                with self._file_lock():
+                    self._profiles = None
+                    self._load()
+                    if update(self._profiles):
+                        self._persist()
+            except (IOError, OSError), exc:
+                self.log.warning('%s', "Failed to persist profiles {!r}: "
+                                       "{!s}".format(self.path, exc))
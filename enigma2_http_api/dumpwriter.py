@@ -0,0 +1,401 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Request dump writers.
+---------------------
+
+Request dumps (see *dump_requests* of
+:class:`enigma2_http_api.controller.Enigma2APIController`) are handed to
+a background thread so that neither decoding nor disk I/O delay API
+calls. Two formats are available:
+
+* ``files``: one pretty printed ``eha_raw_NNNN.json`` file per request
+* ``archive``: gzip compressed JSON lines files ``eha_dump_NNNN.jsonl.gz``
+  rotated after *max_bytes* (compressed) bytes or *max_records* requests
+
+Both formats can be replayed by :mod:`enigma2_http_api.replay`.
+"""
+import os
+import re
+import glob
+import gzip
+import Queue
+import atexit
+import random
+import logging
+import threading
+from collections import namedtuple
+
+#: request dump format: one file per request
+DUMP_FORMAT_FILES = 'files'
+
+#: request dump format: rotating compressed archive
+DUMP_FORMAT_ARCHIVE = 'archive'
+
+#: filename format of request dump files
+DUMP_FILE_FMT = 'eha_raw_{:04d}.json'
+
+#: filename format of request dump archives
+ARCHIVE_FILE_FMT = 'eha_dump_{:04d}.jsonl.gz'
+
+#: glob pattern of request dump archives
+ARCHIVE_FILE_PATTERN = 'eha_dump_*.jsonl.gz'
+
+#: default maximum number of pending request dumps
+DEFAULT_QUEUE_SIZE = 256
+
+#: default number of (compressed) bytes an archive is rotated after
+DEFAULT_ARCHIVE_MAX_BYTES = 64 * 1024 * 1024
+
+#: default gzip compression level of archives
+DEFAULT_COMPRESSLEVEL = 6
+
+#: one request to be dumped; either the undecoded *content* or the
+#: decoded *response* (already reduced to *filter_key*) is set
+DumpRecord = namedtuple('DumpRecord', ['request_no', 'url', 'filter_key',
+                                       'content', 'response'])
+
+RE_ARCHIVE_NO = re.compile(r'eha_dump_(\d+)\.jsonl\.gz$')
+
+LOG = logging.getLogger(__name__)
+
+_STOP = object()
+
+_OPEN_WRITERS = set()
+_OPEN_WRITERS_LOCK = threading.Lock()
+
+
+@atexit.register
+def _close_writers():
+    """
+    Close writers still open at interpreter exit.
+    """
+    with _OPEN_WRITERS_LOCK:
+        writers = list(_OPEN_WRITERS)
+    for writer in writers:
+        writer.close()
+
+
+class DumpWriter(object):
+    """
+    Base class of request dump writers: records passed to :meth:`submit`
+    are written by :meth:`write` in a background thread.
+
+    At most *queue_size* records are pending, further records are
+    dropped instead of blocking API calls. Only a *sample_rate* fraction
+    of requests is dumped; *sample_paths* restricts dumping to the given
+    API paths. Writers not closed by :meth:`close` are closed at
+    interpreter exit.
+    """
+
+    def __init__(self, json_backend, sample_rate=1.0, sample_paths=None,
+                 queue_size=DEFAULT_QUEUE_SIZE, rng=random.random):
+        self.log = logging.getLogger(__name__)
+        self.json = json_backend
+        self.sample_rate = sample_rate
+        self.sample_paths = None
+        if sample_paths is not None:
+            self.sample_paths = frozenset(sample_paths)
+        self._rng = rng
+        self._queue = Queue.Queue(queue_size)
+        self._lock = threading.Lock()
+        self._closed = False
+        self.submitted = 0
+        self.written = 0
+        self.dropped = 0
+        self.skipped = 0
+        self.failed = 0
+        self._thread = threading.Thread(target=self._run,
+                                        name=self.__class__.__name__)
+        self._thread.daemon = True
+        self._thread.start()
+        with _OPEN_WRITERS_LOCK:
+            _OPEN_WRITERS.add(self)
+
+    def accept(self, path):
+        """
+        Decide whether the current request of API call *path* is dumped.
+
+        :param path: API path
+        :return: True if the request is to be dumped
+        :rtype: bool
+        """
+        accepted = (self.sample_paths is None or path in self.sample_paths) \
+            and (self.sample_rate >= 1 or self._rng() < self.sample_rate)
+        if not accepted:
+            with self._lock:
+                self.skipped += 1
+        return accepted
+
+    def submit(self, record):
+        """
+        Queue *record* for writing without blocking.
+
+        :param record: request dump
+        :type record: DumpRecord
+        :return: False if the record was dropped
+        :rtype: bool
+        """
+        if self._closed:
+            return False
+
+        try:
+            self._queue.put_nowait(record)
+        except Queue.Full:
+            with self._lock:
+                self.dropped += 1
+            return False
+
+        with self._lock:
+            self.submitted += 1
+        return True
+
+    def _run(self):
+        while True:
+            record = self._queue.get()
+            try:
+                if record is _STOP:
+                    self.finish()
+                    return
+                self.write(record)
+                with self._lock:
+                    self.written += 1
+            except Exception, exc:
+                with self._lock:
+                    self.failed += 1
+                self.log.warning('%s',
+                                 "Request dumping failed: {!r}".format(exc))
+            finally:
+                self._queue.task_done()
+
+    def response_of(self, record):
+        """
+        Decoded response of *record*, reduced to its *filter_key*.
+        """
+        if record.response is not None:
+            return record.response
+        response = self.json.loads(record.content)
+        if record.filter_key:
+            response = response[record.filter_key]
+        return response
+
+    def write(self, record):
+        """
+        Write *record* (called in background thread).
+        """
+        raise NotImplementedError
+
+    def finish(self):
+        """
+        Release resources (called in background thread).
+        """
+        pass
+
+    def flush(self):
+        """
+        Wait until all pending records are written.
+        """
+        self._queue.join()
+
+    def close(self):
+        """
+        Write all pending records, release resources (e.g. finish the
+        current archive) and stop the background thread. Records submitted
+        afterwards are dropped.
+        """
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+        self._queue.put(_STOP)
+        self._thread.join()
+        with _OPEN_WRITERS_LOCK:
+            _OPEN_WRITERS.discard(self)
+
+    def stats(self):
+        """
+        Request dump statistics.
+
+        :return: submitted, written, dropped (queue full), skipped (not
+            sampled), failed and pending records
+        :rtype: dict
+        """
+        with self._lock:
+            return {
+                'submitted': self.submitted,
+                'written': self.written,
+                'dropped': self.dropped,
+                'skipped': self.skipped,
+                'failed': self.failed,
+                'pending': self._queue.qsize(),
+            }
+
+
+class FileDumpWriter(DumpWriter):
+    """
+    Write one pretty printed JSON file per request to *directory*.
+    """
+
+    def __init__(self, directory, json_backend, **kwargs):
+        self.directory = directory
+        DumpWriter.__init__(self, json_backend, **kwargs)
+
+    def write(self, record):
+        data = {
+            'url': record.url,
+            '_filter_key': record.filter_key,
+            'response': self.response_of(record),
+        }
+        target_filename = os.path.join(
+            self.directory, DUMP_FILE_FMT.format(record.request_no))
+        with open(target_filename, "wb") as target:
+            self.json.dump(data, target, indent=2)
+
+
+class ArchiveDumpWriter(DumpWriter):
+    """
+    Append requests as JSON lines to gzip compressed archives in
+    *directory*. Archives are rotated after *max_bytes* compressed bytes
+    or *max_records* records, numbering continues after already existing
+    archives.
+
+    Undecoded responses are embedded as they were received (and not
+    reduced to their *filter_key*), so dumping does not need to decode
+    them at all.
+    """
+
+    def __init__(self, directory, json_backend,
+                 max_bytes=DEFAULT_ARCHIVE_MAX_BYTES, max_records=None,
+                 compresslevel=DEFAULT_COMPRESSLEVEL, **kwargs):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_records = max_records
+        self.compresslevel = compresslevel
+        self.archives = 0
+        self._archive_no = 0
+        self._raw = None
+        self._target = None
+        self._records = 0
+
+        for filename in glob.glob(os.path.join(directory,
+                                               ARCHIVE_FILE_PATTERN)):
+            matched = RE_ARCHIVE_NO.search(filename)
+            if matched:
+                self._archive_no = max(self._archive_no,
+                                       int(matched.group(1)))
+
+        DumpWriter.__init__(self, json_backend, **kwargs)
+
+    def _rotate(self):
+        self.finish()
+        self._archive_no += 1
+        filename = os.path.join(self.directory,
+                                ARCHIVE_FILE_FMT.format(self._archive_no))
+        self._raw = open(filename, "wb")
+        self._target = gzip.GzipFile(fileobj=self._raw, mode="wb",
+                                     compresslevel=self.compresslevel)
+        self._records = 0
+        self.archives += 1
+        self.log.debug("Writing request dumps to {!r}".format(filename))
+
+    def _line(self, record):
+        if record.response is not None:
+            response = self.json.dumps(record.response)
+            filter_key = record.filter_key
+        else:
+            # line breaks of a JSON document are insignificant whitespace
+            response = record.content.replace('\r', ' ').replace('\n', ' ')
+            filter_key = None
+
+        header = self.json.dumps({
+            'request_no': record.request_no,
+            'url': record.url,
+            '_filter_key': filter_key,
+        })
+        if isinstance(header, unicode):
+            header = header.encode('utf-8')
+        if isinstance(response, unicode):
+            response = response.encode('utf-8')
+        return header[:-1] + ', "response": ' + response + '}\n'
+
+    def write(self, record):
+        if self._target is None or (
+                self.max_records and self._records >= self.max_records) or (
+                self.max_bytes and self._raw.tell() >= self.max_bytes):
+            self._rotate()
+
+        self._target.write(self._line(record))
+        self._records += 1
+
+    def finish(self):
+        if self._target is not None:
+            self._target.close()
+            self._raw.close()
+            self._target = None
+            self._raw = None
+
+    def stats(self):
+        result = DumpWriter.stats(self)
+        result['archives'] = self.archives
+        return result
+
+
+def iter_archive(filename, json_backend):
+    """
+    Read the records of request dump archive *filename*. Malformed lines
+    are skipped and a truncated archive (e.g. of a process killed while
+    dumping) is read up to the damaged part, both are logged.
+
+    :param filename: archive filename
+    :param json_backend: :class:`enigma2_http_api.jsonbackend.JSONBackend`
+        or module providing *loads*
+    :return: generator of dicts containing *url*, *_filter_key* and
+        *response*
+    """
+    source = gzip.open(filename, "rb")
+    line_no = 0
+    try:
+        while True:
+            try:
+                line = source.readline()
+            except (IOError, EOFError), exc:
+                LOG.warning("Truncated request dump archive {!r}: {!s}".format(
+                    filename, exc))
+                return
+            if not line:
+                return
+
+            line_no += 1
+            if not line.strip():
+                continue
+
+            try:
+                data = json_backend.loads(line)
+            except ValueError, exc:
+                LOG.warning("Skipping line {:d} of {!r}: {!s}".format(
+                    line_no, filename, exc))
+                continue
+            yield data
+    finally:
+        source.close()
+
+
+def create_dump_writer(directory, json_backend,
+                       dump_format=DUMP_FORMAT_FILES, **kwargs):
+    """
+    Create a request dump writer.
+
+    :param directory: target directory
+    :param json_backend: :class:`enigma2_http_api.jsonbackend.JSONBackend`
+    :param dump_format: :data:`DUMP_FORMAT_FILES` or
+        :data:`DUMP_FORMAT_ARCHIVE`
+    :param kwargs: writer parameters
+    :return: dump writer
+    :rtype: DumpWriter
+    :raises ValueError: if *dump_format* is unknown
+    """
+    if dump_format == DUMP_FORMAT_FILES:
+        return FileDumpWriter(directory, json_backend, **kwargs)
+    elif dump_format == DUMP_FORMAT_ARCHIVE:
+        return ArchiveDumpWriter(directory, json_backend, **kwargs)
+    raise ValueError("Unknown request dump format {!r}".format(dump_format))
@@ -0,0 +1,261 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+OpenMetrics exporter.
+---------------------
+
+Render the counters of one or more controllers as OpenMetrics text
+exposition, either by calling :func:`render_openmetrics` or by running
+a :class:`MetricsExporter` which serves them on ``/metrics``.
+
+.. code::
+
+    eac = Enigma2APIController(remote_addr='enigma2.local', cache_ttl=True)
+    exporter = MetricsExporter([eac], address=('0.0.0.0', 9315)).start()
+    ...
+    exporter.stop()
+
+Counters are only read when rendering, so exporting does not add any
+cost to API calls.
+"""
+import logging
+import threading
+import BaseHTTPServer
+import SocketServer
+
+#: default listen address of :class:`MetricsExporter`
+DEFAULT_EXPORTER_ADDRESS = ('127.0.0.1', 9315)
+
+#: content type of OpenMetrics text exposition
+OPENMETRICS_CONTENT_TYPE = \
+    'application/openmetrics-text; version=1.0.0; charset=utf-8'
+
+#: prefix of all metric names
+METRIC_PREFIX = 'enigma2_'
+
+
+def _escape(value):
+    return unicode(value).replace(u'\\', u'\\\\').replace(
+        u'"', u'\\"').replace(u'\n', u'\\n')
+
+
+def _labels(labels):
+    return u','.join(u'{:s}="{:s}"'.format(key, _escape(value)) for
+                     key, value in labels)
+
+
+def _number(value):
+    """
+    >>> _number(3), _number(0.25), _number(float('inf'))
+    (u'3', u'0.25', u'+Inf')
+    """
+    if value == float('inf'):
+        return u'+Inf'
+    if isinstance(value, float):
+        return unicode(repr(value))
+    return unicode(value)
+
+
+class _Family(object):
+    """
+    Samples of one metric family.
+    """
+
+    def __init__(self, name, metric_type, help_text, unit=None):
+        self.name = METRIC_PREFIX + name
+        self.metric_type = metric_type
+        self.help_text = help_text
+        self.unit = unit
+        self.samples = list()
+
+    def add(self, labels, value, suffix=''):
+        self.samples.append((suffix, labels, value))
+
+    def render(self):
+        lines = [u'# TYPE {:s} {:s}'.format(self.name, self.metric_type)]
+        if self.unit:
+            lines.append(u'# UNIT {:s} {:s}'.format(self.name, self.unit))
+        lines.append(u'# HELP {:s} {:s}'.format(self.name, self.help_text))
+        for suffix, labels, value in self.samples:
+            lines.append(u'{:s}{:s}{{{:s}}} {:s}'.format(
+                self.name, suffix, _labels(labels), _number(value)))
+        return lines
+
+
+def iter_controllers(sources):
+    """
+    Flatten *sources*.
+
+    :param sources: controllers and
+        :class:`enigma2_http_api.fleet.FleetController` instances
+    :return: generator of controllers
+    """
+    for source in sources:
+        controllers = getattr(source, 'controllers', None)
+        if controllers is not None:
+            for controller in controllers.values():
+                yield controller
+        else:
+            yield source
+
+
+def render_openmetrics(sources):
+    """
+    Render the counters of *sources* as OpenMetrics text exposition.
+    Request metrics shared by several controllers are rendered once,
+    cache and connection counters of controllers of the same device are
+    summed up.
+
+    :param sources: controllers and
+        :class:`enigma2_http_api.fleet.FleetController` instances
+    :return: UTF-8 encoded exposition
+    :rtype: str
+    """
+    requests = _Family('requests', 'counter', 'HTTP requests sent.')
+    errors = _Family('call_errors', 'counter', 'Failed API calls.')
+    wire = _Family('wire_bytes', 'counter',
+                   'Response bytes received on the wire.', 'bytes')
+    decoded = _Family('decoded_bytes', 'counter',
+                      'Response bytes after content decoding.', 'bytes')
+    in_flight = _Family('calls_in_flight', 'gauge', 'API calls in flight.')
+    latency = _Family('call_duration_seconds', 'histogram',
+                      'Duration of API calls not answered by the cache.',
+                      'seconds')
+    cache_hits = _Family('cache_hits', 'counter', 'Response cache hits.')
+    cache_misses = _Family('cache_misses', 'counter',
+                           'Response cache misses.')
+    cache_ratio = _Family('cache_hit_ratio', 'gauge',
+                          'Response cache hit ratio.', 'ratio')
+    cache_entries = _Family('cache_entries', 'gauge',
+                            'Response cache entries.')
+    coalesced = _Family('coalesced_calls', 'counter',
+                        'API calls which shared a concurrent call.')
+    connects = _Family('connects', 'counter', 'New HTTP connections.')
+    reused = _Family('reused_connections', 'counter',
+                     'Requests sent on a pooled HTTP connection.')
+
+    metrics = list()
+    boxes = dict()
+    for controller in iter_controllers(sources):
+        if not any(controller.metrics is x for x in metrics):
+            metrics.append(controller.metrics)
+
+        counters = boxes.setdefault(controller.remote_addr, dict())
+        for prefix, stats in (('cache_', controller.cache_stats()),
+                              ('coalescing_', controller.coalescing_stats()),
+                              ('connection_', controller.connection_stats())):
+            for key, value in (stats or dict()).items():
+                counters[prefix + key] = counters.get(prefix + key, 0) + value
+
+    endpoints = dict()
+    for request_metrics in metrics:
+        endpoints.update(request_metrics.snapshot())
+
+    for (remote_addr, path), counters in sorted(endpoints.items()):
+        labels = [('box', remote_addr), ('endpoint', path)]
+        requests.add(labels, counters['requests'], '_total')
+        errors.add(labels, counters['errors'], '_total')
+        wire.add(labels, counters['wire_bytes'], '_total')
+        decoded.add(labels, counters['decoded_bytes'], '_total')
+        in_flight.add(labels, counters['in_flight'])
+        for bound, count in counters['latency_buckets']:
+            latency.add(labels + [('le', _number(bound))], count, '_bucket')
+        latency.add(labels, counters['latency_count'], '_count')
+        latency.add(labels, counters['latency_sum'], '_sum')
+
+    for remote_addr, counters in sorted(boxes.items()):
+        labels = [('box', remote_addr)]
+        if 'cache_hits' in counters:
+            hits = counters['cache_hits']
+            lookups = hits + counters['cache_misses']
+            cache_hits.add(labels, hits, '_total')
+            cache_misses.add(labels, counters['cache_misses'], '_total')
+            cache_entries.add(labels, counters['cache_entries'])
+            if lookups:
+                cache_ratio.add(labels, float(hits) / lookups)
+        if 'coalescing_coalesced' in counters:
+            coalesced.add(labels, counters['coalescing_coalesced'], '_total')
+        connects.add(labels, counters['connection_connects'], '_total')
+        reused.add(labels, counters['connection_reused'], '_total')
+
+    lines = list()
+    for family in (requests, errors, wire, decoded, in_flight, latency,
+                   cache_hits, cache_misses, cache_ratio, cache_entries,
+                   coalesced, connects, reused):
+        if family.samples:
+            lines.extend(family.render())
+    lines.append(u'# EOF')
+    return (u'\n'.join(lines) + u'\n').encode('utf-8')
+
+
+class MetricsRequestHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split('?', 1)[0] not in ('/', '/metrics'):
+            self.send_error(404)
+            return
+
+        try:
+            body = self.server.render()
+        except Exception, exc:
+            self.server.log.error(
+                '%s', "Rendering metrics failed: {!r}".format(exc))
+            self.send_error(500)
+            return
+
+        self.send_response(200)
+        self.send_header('Content-Type', OPENMETRICS_CONTENT_TYPE)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, fmt, *args):
+        self.server.log.debug(fmt, *args)
+
+
+class MetricsExporter(SocketServer.ThreadingMixIn,
+                      BaseHTTPServer.HTTPServer):
+    """
+    HTTP listener serving the OpenMetrics exposition of *sources* (see
+    :func:`render_openmetrics`) on *address*. *sources* is evaluated on
+    each scrape, controllers may be added to it later on. Port 0 selects
+    a free port.
+    """
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, sources, address=DEFAULT_EXPORTER_ADDRESS):
+        self.log = logging.getLogger(__name__)
+        self.sources = sources
+        self._thread = None
+        BaseHTTPServer.HTTPServer.__init__(self, address,
+                                           MetricsRequestHandler)
+
+    @property
+    def url(self):
+        """
+        URL of the exposition.
+        """
+        return 'http://{:s}:{:d}/metrics'.format(*self.server_address[:2])
+
+    def render(self):
+        return render_openmetrics(self.sources)
+
+    def start(self):
+        """
+        Serve scrapes in a background thread.
+
+        :return: *self*
+        """
+        self._thread = threading.Thread(target=self.serve_forever,
+                                        name='eha-metrics-exporter')
+        self._thread.daemon = True
+        self._thread.start()
+        self.log.info('%s', "Serving metrics on {:s}".format(self.url))
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
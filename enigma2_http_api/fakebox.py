@@ -0,0 +1,770 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Synthetic enigma2 device.
+-------------------------
+
+Pure python stand-in for the enigma2 web interface (``/api/*`` JSON
+and legacy ``/web/*`` XML endpoints) serving synthetic, seeded data at
+configurable scale. It is meant for load testing and benchmarking the
+client without real receivers.
+
+.. code::
+
+    python -m enigma2_http_api.fakebox --port 8080 --bouquets 20 \\
+        --services 100 --events 200 --latency 0.05
+"""
+import re
+import sys
+import time
+import zlib
+import random
+import logging
+import argparse
+import threading
+import urlparse
+import BaseHTTPServer
+import SocketServer
+
+from utils import create_servicereference, create_picon
+from utils import NS_DVB_C, NS_DVB_S, NS_DVB_T
+from utils import SERVICE_TYPE_TV, SERVICE_TYPE_HDTV, SERVICE_TYPE_RADIO
+from jsonbackend import get_backend
+from webxml import get_web_call, event_date, UnsupportedWebCall
+from controller import POWERSTATE_TOGGLE_STANDBY, POWERSTATE_WAKEUP
+from controller import POWERSTATE_STANDBY, POWERSTATE_REBOOT
+from controller import POWERSTATE_RESTART
+
+#: default random seed
+DEFAULT_SEED = 0
+
+#: default number of bouquets
+DEFAULT_BOUQUETS = 4
+
+#: default number of services per bouquet
+DEFAULT_SERVICES_PER_BOUQUET = 25
+
+#: default number of EPG events per service
+DEFAULT_EVENTS_PER_SERVICE = 48
+
+#: default number of movie items
+DEFAULT_MOVIES = 20
+
+#: default number of timers
+DEFAULT_TIMERS = 10
+
+#: movie directory
+MOVIE_DIRECTORY = '/media/hdd/movie/'
+
+#: minimum response size (bytes) worth compressing
+MIN_COMPRESS_SIZE = 512
+
+#: headers of a web interface supporting the REST file API
+REST_HEADERS = {
+    'Access-Control-Allow-Origin': '*',
+    'Access-Control-Allow-Credentials': 'true',
+    'Access-Control-Max-Age': '1728000',
+    'Access-Control-Allow-Methods': 'GET, POST, OPTIONS',
+    'Access-Control-Allow-Headers': 'Authorization, Content-Type',
+}
+
+#: words synthetic titles, descriptions and names are made of
+WORDS = (
+    u'Abenteuer', u'Anna', u'Berlin', u'Code', u'Der', u'Die', u'Drache',
+    u'Eis', u'Feuer', u'Game', u'Geheimnis', u'Gold', u'Hafen', u'Insel',
+    u'Kampf', u'König', u'Küste', u'Lied', u'Mord', u'Nacht', u'Nord',
+    u'Orange', u'Reise', u'Schatten', u'Schwerter', u'Spur', u'Stadt',
+    u'Sturm', u'Süden', u'Tatort', u'Thrones', u'Traum', u'Wald',
+    u'Wasser', u'Welt', u'Wolf', u'Zeit', u'Zwei',
+)
+
+#: service name prefixes
+SERVICE_NAMES = (
+    u'Das Erste', u'ZDF', u'zdf_neo', u'arte', u'3sat', u'Sky Atlantic',
+    u'Fox', u'ONE', u'tagesschau24', u'Phoenix', u'DASDING', u'SWR3',
+)
+
+#: URL path pattern of API calls
+RE_API_PATH = re.compile(r'^/(?P<backend>api|web)/(?P<name>[a-z]+)$')
+
+
+def _words(rng, minimum, maximum):
+    return u' '.join(rng.choice(WORDS)
+                     for _ in range(rng.randint(minimum, maximum)))
+
+
+def _hhmm(timestamp):
+    return time.strftime('%H:%M', time.localtime(timestamp))
+
+
+def _realtime(timestamp):
+    return time.strftime('%d.%m.%Y %H:%M', time.localtime(timestamp))
+
+
+class LatencyModel(object):
+    """
+    Response delay of a synthetic device: *base* seconds plus up to
+    *jitter* seconds plus *per_item* seconds for each dataset (e.g. EPG
+    event) of the response.
+
+    >>> LatencyModel(base=0.5, per_item=0.25).delay(items=2)
+    1.0
+    """
+
+    def __init__(self, base=0.0, jitter=0.0, per_item=0.0, seed=None):
+        self.base = base
+        self.jitter = jitter
+        self.per_item = per_item
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def delay(self, items=0):
+        """
+        :param items: number of datasets in the response
+        :return: delay in seconds
+        :rtype: float
+        """
+        value = self.base + self.per_item * items
+        if self.jitter:
+            with self._lock:
+                value += self._rng.random() * self.jitter
+        return value
+
+
+class SyntheticBox(object):
+    """
+    State of a synthetic enigma2 device. All data is derived from *seed*,
+    two instances created using the same arguments yield identical
+    responses. EPG datasets are generated on first access.
+
+    Each ``api_<name>`` method implements the API call ``/api/<name>``,
+    receiving the URL parameters as dict and returning the data to be
+    JSON encoded and the number of datasets it contains.
+
+    After a reboot or restart (see :meth:`api_powerstate`) the web
+    interface answers with HTTP status 503 for *boot_time* seconds.
+
+    >>> box = SyntheticBox(bouquets=2, services_per_bouquet=3, start=0)
+    >>> len(box.api_getallservices({})[0]['services'])
+    2
+    >>> box.api_epgservice({'sRef': box.services[0]['servicereference']})[1]
+    48
+    """
+
+    def __init__(self, seed=DEFAULT_SEED, bouquets=DEFAULT_BOUQUETS,
+                 services_per_bouquet=DEFAULT_SERVICES_PER_BOUQUET,
+                 events_per_service=DEFAULT_EVENTS_PER_SERVICE,
+                 movies=DEFAULT_MOVIES, timers=DEFAULT_TIMERS, start=None,
+                 boot_time=0.0):
+        self.log = logging.getLogger(__name__)
+        self.seed = seed
+        self.events_per_service = events_per_service
+        if start is None:
+            start = int(time.time()) // 3600 * 3600 - 3600
+        self.start = start
+        self._lock = threading.Lock()
+        self._events = dict()
+        self.instandby = False
+        self.boot_time = boot_time
+        self.ready_at = 0.0
+        self.volume = 50
+        self.muted = False
+
+        rng = random.Random(seed)
+        self.bouquets = list()
+        self.services = list()
+        self._services_by_ref = dict()
+
+        for b_index in range(bouquets):
+            bouquet = {
+                'servicereference': '1:7:1:0:0:0:0:0:0:0:FROM BOUQUET '
+                                    '"userbouquet.synthetic{:d}.tv" '
+                                    'ORDER BY bouquet'.format(b_index),
+                'servicename': u'Bouquet {:d}'.format(b_index),
+                'subservices': list(),
+            }
+            for pos in range(services_per_bouquet):
+                service = self._create_service(rng, len(self.services))
+                self._services_by_ref[service['servicereference']] = service
+                self.services.append(service)
+                bouquet['subservices'].append({
+                    'servicereference': service['servicereference'],
+                    'servicename': service['servicename'],
+                    'program': service['program'],
+                    'pos': pos + 1,
+                })
+            self.bouquets.append(bouquet)
+
+        self.current_service = self.services[0] if self.services else None
+        self.movies = [self._create_movie(rng) for _ in range(movies)]
+        self.timers = [x for x in (self._create_timer(rng) for _ in
+                                   range(timers)) if x is not None]
+
+    def _create_service(self, rng, index):
+        service_type = rng.choice((SERVICE_TYPE_TV, SERVICE_TYPE_HDTV,
+                                   SERVICE_TYPE_HDTV, SERVICE_TYPE_RADIO))
+        psref = {
+            'service_type': service_type,
+            'sid': index + 1,
+            'tsid': rng.randint(1, 0x4ff),
+            'oid': rng.choice((0x1, 0x85, 0x66, 0xa401)),
+            'ns': rng.choice((NS_DVB_C, NS_DVB_S, NS_DVB_T)),
+        }
+        name = u'{:s} {:d}'.format(rng.choice(SERVICE_NAMES), index + 1)
+        if service_type == SERVICE_TYPE_HDTV:
+            name += u' HD'
+        return {
+            'servicereference': create_servicereference(psref).upper(),
+            'servicename': name,
+            'program': index + 1,
+            'picon': '/picon/' + create_picon(psref),
+            'index': index,
+        }
+
+    def _create_movie(self, rng):
+        service = rng.choice(self.services)
+        recorded = self.start - rng.randint(1, 24 * 365) * 3600
+        length = rng.randint(5, 180)
+        title = _words(rng, 1, 4)
+        filename = u'{:s} - {:s} - {:s} - .ts'.format(
+            time.strftime('%Y%m%d %H%M', time.localtime(recorded)),
+            service['servicename'], title)
+        full_path = MOVIE_DIRECTORY + filename
+        filesize = length * 60 * rng.randint(200000, 1000000)
+        return {
+            'filename_stripped': filename,
+            'description': _words(rng, 0, 5),
+            'descriptionExtended': _words(rng, 0, 30),
+            'tags': '',
+            'filesize': filesize,
+            'filesize_readable': '{:.2f} MB'.format(filesize / 1048576.0),
+            'eventname': title,
+            'servicename': service['servicename'],
+            'serviceref': '1:0:0:0:0:0:0:0:0:0:' + full_path,
+            'fullname': '1:0:0:0:0:0:0:0:0:0:' + full_path,
+            'filename': full_path,
+            'length': '{:d}:{:02d}'.format(length, rng.randint(0, 59)),
+            'lastseen': 0,
+            'recordingtime': recorded,
+            'begintime': time.strftime('%d.%m., %H:%M',
+                                       time.localtime(recorded)),
+        }
+
+    def _create_timer(self, rng):
+        service = rng.choice(self.services)
+        events = self.service_events(service)
+        if not events:
+            return None
+        return self._timer_from_event(service, rng.choice(events))
+
+    def _timer_from_event(self, service, event, **kwargs):
+        begin = kwargs.get('begin', event['begin_timestamp'])
+        end = kwargs.get('end', begin + event['duration_sec'])
+        return {
+            'begin': begin,
+            'end': end,
+            'duration': end - begin,
+            'startprepare': begin - 20,
+            'realbegin': _realtime(begin),
+            'realend': _realtime(end),
+            'name': kwargs.get('name', event['title']),
+            'description': kwargs.get('description', event['shortdesc']),
+            'descriptionextended': event['longdesc'],
+            'eit': event['id'],
+            'servicename': service['servicename'],
+            'serviceref': service['servicereference'],
+            'dirname': kwargs.get('dirname', 'None'),
+            'tags': kwargs.get('tags', ''),
+            'disabled': int(kwargs.get('disabled', 0)),
+            'justplay': int(kwargs.get('justplay', 0)),
+            'afterevent': int(kwargs.get('afterevent', 3)),
+            'repeated': int(kwargs.get('repeated', 0)),
+            'always_zap': -1,
+            'state': 0,
+            'filename': None,
+            'logentries': [],
+            'nextactivation': None,
+            'cancelled': False,
+        }
+
+    def _service(self, service_ref):
+        try:
+            return self._services_by_ref[service_ref.upper()]
+        except (KeyError, AttributeError):
+            return None
+
+    def service_events(self, service):
+        """
+        EPG datasets of *service*, ordered by start time.
+
+        :param service: service
+        :return: EPG datasets
+        :rtype: list
+        """
+        with self._lock:
+            try:
+                return self._events[service['index']]
+            except KeyError:
+                pass
+
+        rng = random.Random('{!r}:{:d}'.format(self.seed, service['index']))
+        events = list()
+        begin = self.start - rng.randint(0, 3) * 900
+        event_id = rng.randint(1, 60000)
+        for _ in range(self.events_per_service):
+            duration = rng.choice((5, 15, 30, 45, 60, 90, 120)) * 60
+            events.append({
+                'id': event_id,
+                'sref': service['servicereference'],
+                'sname': service['servicename'],
+                'picon': service['picon'],
+                'title': _words(rng, 1, 4),
+                'shortdesc': _words(rng, 0, 5),
+                'longdesc': _words(rng, 0, 40),
+                'begin_timestamp': begin,
+                'begin': _hhmm(begin),
+                'end': _hhmm(begin + duration),
+                'date': event_date(begin),
+                'duration': duration // 60,
+                'duration_sec': duration,
+                'now_timestamp': None,
+            })
+            begin += duration
+            event_id = event_id % 65535 + 1
+
+        with self._lock:
+            return self._events.setdefault(service['index'], events)
+
+    def _current_event(self, service, now, following=0):
+        events = self.service_events(service)
+        for index, event in enumerate(events):
+            if event['begin_timestamp'] <= now < (
+                    event['begin_timestamp'] + event['duration_sec']):
+                if index + following >= len(events):
+                    return None
+                current = dict(events[index + following])
+                current['now_timestamp'] = now
+                return current
+        return None
+
+    def _bouquet(self, bouquet_ref):
+        for bouquet in self.bouquets:
+            if bouquet['servicereference'] == bouquet_ref:
+                return bouquet
+        return None
+
+    @staticmethod
+    def _message(result, message, **kwargs):
+        kwargs.update(result=result, message=message)
+        return kwargs
+
+    def api_about(self, params):
+        tuners = [{'name': 'Tuner {:s}'.format(x), 'type': 'DVB-C'}
+                  for x in 'ABCD']
+        service = self.current_service or dict()
+        data = {
+            'info': {
+                'brand': 'Synthetic',
+                'model': 'fakebox',
+                'boxtype': 'fakebox',
+                'chipset': 'none',
+                'imagedistro': 'fakebox',
+                'imagever': '1.0',
+                'enigmaver': '2017-09-19',
+                'webifver': 'OWIF 1.2.5',
+                'kernelver': '4.10.6',
+                'uptime': '{:d}:00'.format(len(self.services)),
+                'tuners': tuners,
+                'hdd': [],
+                'ifaces': [],
+                'shares': [],
+                'streams': [],
+                'transcoding': False,
+            },
+            'service': {
+                'result': True,
+                'name': service.get('servicename', ''),
+                'ref': service.get('servicereference', ''),
+                'width': 1280,
+                'height': 720,
+                'aspect': 3,
+            },
+        }
+        return data, 0
+
+    def api_getservices(self, params):
+        bouquet_ref = params.get('sRef')
+        if not bouquet_ref:
+            services = [{'servicereference': x['servicereference'],
+                         'servicename': x['servicename']}
+                        for x in self.bouquets]
+        else:
+            bouquet = self._bouquet(bouquet_ref)
+            services = bouquet['subservices'] if bouquet else []
+        return {'result': True, 'services': services}, len(services)
+
+    def api_getallservices(self, params):
+        return {'result': True, 'services': self.bouquets}, len(self.services)
+
+    def api_epgservice(self, params):
+        service = self._service(params.get('sRef'))
+        events = self.service_events(service) if service else []
+        return {'result': True, 'events': events}, len(events)
+
+    def api_epgbouquet(self, params, following=0):
+        bouquet = self._bouquet(params.get('bRef'))
+        now = int(time.time())
+        events = list()
+        for sub in (bouquet['subservices'] if bouquet else []):
+            event = self._current_event(
+                self._service(sub['servicereference']), now, following)
+            if event is not None:
+                events.append(event)
+        return {'result': True, 'events': events}, len(events)
+
+    def api_epgnow(self, params):
+        return self.api_epgbouquet(params)
+
+    def api_epgnext(self, params):
+        return self.api_epgbouquet(params, following=1)
+
+    def api_epgsearch(self, params):
+        what = params.get('search', '').decode('utf-8').lower()
+        events = list()
+        for service in self.services:
+            events.extend(x for x in self.service_events(service)
+                          if what in x['title'].lower())
+        return {'result': True, 'events': events}, len(events)
+
+    def api_subservices(self, params):
+        services = list()
+        if self.current_service:
+            services.append({
+                'servicereference': self.current_service['servicereference'],
+                'servicename': self.current_service['servicename'],
+            })
+        return {'result': True, 'services': services}, len(services)
+
+    def api_timerlist(self, params):
+        with self._lock:
+            timers = list(self.timers)
+        return {'result': True, 'timers': timers}, len(timers)
+
+    def api_timeradd(self, params):
+        service = self._service(params.get('sRef'))
+        try:
+            begin = int(params['begin'])
+            end = int(params['end'])
+        except (KeyError, ValueError):
+            return self._message(False, 'Missing begin/end'), 0
+        if service is None:
+            return self._message(False, 'Unknown service'), 0
+
+        event = {'id': 0, 'title': params.get('name', ''),
+                 'shortdesc': params.get('description', ''), 'longdesc': '',
+                 'begin_timestamp': begin, 'duration_sec': end - begin}
+        kwargs = dict((k, v) for k, v in params.items() if k in (
+            'name', 'description', 'dirname', 'tags', 'disabled',
+            'justplay', 'afterevent', 'repeated'))
+        timer = self._timer_from_event(service, event, begin=begin, end=end,
+                                       **kwargs)
+        with self._lock:
+            self.timers.append(timer)
+        return self._message(
+            True, u"Timer '{:s}' added".format(timer['name'])), 0
+
+    def api_timeraddbyeventid(self, params):
+        service = self._service(params.get('sRef'))
+        event_id = params.get('eventid')
+        for event in (self.service_events(service) if service else []):
+            if str(event['id']) == event_id:
+                timer = self._timer_from_event(service, event)
+                with self._lock:
+                    self.timers.append(timer)
+                return self._message(
+                    True, u"Timer '{:s}' added".format(event['title'])), 0
+        return self._message(False, 'Event not found'), 0
+
+    def api_timerdelete(self, params):
+        key = (params.get('sRef', '').upper(), params.get('begin'),
+               params.get('end'))
+        with self._lock:
+            for timer in self.timers:
+                if (timer['serviceref'], str(timer['begin']),
+                        str(timer['end'])) == key:
+                    self.timers.remove(timer)
+                    return self._message(
+                        True, u'The timer \'{:s}\' has been deleted '
+                              u'successfully'.format(timer['name'])), 0
+        return self._message(False, 'No matching timer found'), 0
+
+    def api_movielist(self, params):
+        with self._lock:
+            movies = list(self.movies)
+        return {'result': True, 'directory': MOVIE_DIRECTORY,
+                'movies': movies, 'bookmarks': ['trashcan']}, len(movies)
+
+    def api_moviedelete(self, params):
+        with self._lock:
+            for movie in self.movies:
+                if movie['serviceref'] == params.get('sRef', '').decode(
+                        'utf-8'):
+                    self.movies.remove(movie)
+                    return self._message(True, 'The movie {!r} has been '
+                                               'deleted successfully'.format(
+                                                   movie['filename'])), 0
+        return self._message(False, 'Movie not found'), 0
+
+    def api_zap(self, params):
+        service = self._service(params.get('sRef'))
+        if service is None:
+            return self._message(False, 'Unknown service'), 0
+        self.current_service = service
+        return self._message(True, u'Active service is now \'{:s}\''.format(
+            service['servicename'])), 0
+
+    def api_powerstate(self, params):
+        try:
+            new_state = int(params['newstate'])
+        except (KeyError, ValueError):
+            new_state = None
+
+        if new_state == POWERSTATE_TOGGLE_STANDBY:
+            self.instandby = not self.instandby
+        elif new_state == POWERSTATE_STANDBY:
+            self.instandby = True
+        elif new_state == POWERSTATE_WAKEUP:
+            self.instandby = False
+        elif new_state in (POWERSTATE_REBOOT, POWERSTATE_RESTART):
+            self.instandby = False
+            self.ready_at = time.time() + self.boot_time
+        return {'result': True, 'instandby': self.instandby}, 0
+
+    def is_ready(self):
+        """
+        Check if the web interface answers API calls.
+        """
+        return time.time() >= self.ready_at
+
+    def api_message(self, params):
+        return self._message(True, 'Message sent successfully!'), 0
+
+    def api_messageanswer(self, params):
+        return self._message(True, 'Answer is NO!'), 0
+
+    def api_vol(self, params):
+        value = params.get('set', '')
+        if value == 'up':
+            self.volume = min(100, self.volume + 5)
+        elif value == 'down':
+            self.volume = max(0, self.volume - 5)
+        elif value == 'mute':
+            self.muted = not self.muted
+        elif value.startswith('set') and value[3:].isdigit():
+            self.volume = min(100, int(value[3:]))
+        return self._message(True, 'State', current=self.volume,
+                             ismute=self.muted), 0
+
+    def api_currenttime(self, params):
+        return self._message(True, time.strftime('%H:%M')), 0
+
+    def api_getcurrlocation(self, params):
+        return {'result': True, 'location': MOVIE_DIRECTORY}, 0
+
+    def api_getlocations(self, params):
+        return {'result': True, 'locations': [MOVIE_DIRECTORY]}, 1
+
+
+class FakeBoxRequestHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+    """
+    HTTP/1.1 keep-alive request handler dispatching ``/api/<name>`` and
+    ``/web/<name>`` to the server's :class:`SyntheticBox`.
+    """
+    protocol_version = 'HTTP/1.1'
+    server_version = 'fakebox/1.0'
+
+    def log_message(self, fmt, *args):
+        self.server.log.debug(fmt % args)
+
+    def _send(self, status, body, headers=None,
+              content_type='application/json; charset=utf-8'):
+        encoding = None
+        accepted = self.headers.get('Accept-Encoding', '')
+        if self.server.compression and 'gzip' in accepted and (
+                len(body) >= MIN_COMPRESS_SIZE):
+            compressor = zlib.compressobj(6, zlib.DEFLATED,
+                                          16 + zlib.MAX_WBITS)
+            body = compressor.compress(body) + compressor.flush()
+            encoding = 'gzip'
+
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        if encoding:
+            self.send_header('Content-Encoding', encoding)
+        for key, value in (headers or dict()).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_OPTIONS(self):
+        if urlparse.urlsplit(self.path).path == '/file':
+            self._send(200, '', REST_HEADERS)
+        else:
+            self._send(404, '')
+
+    def do_GET(self):
+        parsed = urlparse.urlsplit(self.path)
+        matched = RE_API_PATH.match(parsed.path)
+        handler = None
+        if matched:
+            handler = getattr(self.server.box,
+                              'api_' + matched.group('name'), None)
+
+        if handler is None:
+            self._send(404, self.server.json.dumps(
+                {'result': False, 'message': 'Not found'}))
+            return
+
+        if not self.server.box.is_ready():
+            self._send(503, 'Service Unavailable',
+                       content_type='text/plain; charset=utf-8')
+            return
+
+        params = dict(urlparse.parse_qsl(parsed.query,
+                                         keep_blank_values=True))
+        data, items = handler(params)
+        content_type = 'application/json; charset=utf-8'
+        if matched.group('backend') == 'web':
+            try:
+                body = get_web_call(matched.group('name')).render(data)
+            except UnsupportedWebCall:
+                self._send(404, '')
+                return
+            content_type = 'text/xml; charset=UTF-8'
+        else:
+            body = self.server.json.dumps(data)
+            if isinstance(body, unicode):
+                body = body.encode('utf-8')
+
+        delay = self.server.latency.delay(items)
+        if delay > 0:
+            time.sleep(delay)
+
+        self.server.count_request(matched.group('name'))
+        self._send(200, body, content_type=content_type)
+
+
+class FakeBoxServer(SocketServer.ThreadingMixIn, BaseHTTPServer.HTTPServer):
+    """
+    Threaded HTTP server serving *box* (default: a :class:`SyntheticBox`
+    created using *kwargs*) on *address*. Port 0 selects a free port.
+
+    .. code::
+
+        server = FakeBoxServer(bouquets=20, services_per_bouquet=100)
+        server.start()
+        eac = Enigma2APIController(remote_addr=server.remote_addr)
+        ...
+        server.stop()
+    """
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, address=('127.0.0.1', 0), box=None, latency=None,
+                 compression=True, **kwargs):
+        self.log = logging.getLogger(__name__)
+        self.box = box or SyntheticBox(**kwargs)
+        self.latency = latency or LatencyModel()
+        self.compression = compression
+        self.json = get_backend()
+        self._lock = threading.Lock()
+        self.requests = dict()
+        self._thread = None
+        BaseHTTPServer.HTTPServer.__init__(self, address,
+                                           FakeBoxRequestHandler)
+
+    @property
+    def remote_addr(self):
+        """
+        ``host:port`` to be used as controller's *remote_addr*.
+        """
+        return '{:s}:{:d}'.format(*self.server_address[:2])
+
+    def count_request(self, name):
+        with self._lock:
+            self.requests[name] = self.requests.get(name, 0) + 1
+
+    def start(self):
+        """
+        Serve requests in a background thread.
+
+        :return: *self*
+        """
+        self._thread = threading.Thread(target=self.serve_forever,
+                                        name='fakebox-' + self.remote_addr)
+        self._thread.daemon = True
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+
+def main(argv=None):
+    argparser = argparse.ArgumentParser(
+        description='Serve a synthetic enigma2 web interface')
+    argparser.add_argument('--host', default='127.0.0.1',
+                           help="Listen address (default: %(default)s)")
+    argparser.add_argument('--port', type=int, default=8080,
+                           help="Listen port (default: %(default)s)")
+    argparser.add_argument('--seed', type=int, default=DEFAULT_SEED)
+    argparser.add_argument('--bouquets', type=int, default=DEFAULT_BOUQUETS)
+    argparser.add_argument('--services', type=int,
+                           default=DEFAULT_SERVICES_PER_BOUQUET,
+                           help="Services per bouquet")
+    argparser.add_argument('--events', type=int,
+                           default=DEFAULT_EVENTS_PER_SERVICE,
+                           help="EPG events per service")
+    argparser.add_argument('--movies', type=int, default=DEFAULT_MOVIES)
+    argparser.add_argument('--timers', type=int, default=DEFAULT_TIMERS)
+    argparser.add_argument('--latency', type=float, default=0.0,
+                           help="Base response delay (seconds)")
+    argparser.add_argument('--jitter', type=float, default=0.0,
+                           help="Maximum random additional delay (seconds)")
+    argparser.add_argument('--per-item', type=float, default=0.0,
+                           help="Additional delay per dataset (seconds)")
+    argparser.add_argument('--boot-time', type=float, default=0.0,
+                           help="Unavailability after reboot (seconds)")
+    argparser.add_argument('--no-compression', action='store_true',
+                           help="Never compress responses")
+    argparser.add_argument('-v', '--verbose', action='count', default=0)
+    args = argparser.parse_args(argv)
+
+    logging.basicConfig(
+        level=logging.DEBUG if args.verbose else logging.INFO)
+    box = SyntheticBox(seed=args.seed, bouquets=args.bouquets,
+                       services_per_bouquet=args.services,
+                       events_per_service=args.events, movies=args.movies,
+                       timers=args.timers, boot_time=args.boot_time)
+    latency = LatencyModel(base=args.latency, jitter=args.jitter,
+                           per_item=args.per_item, seed=args.seed)
+    server = FakeBoxServer((args.host, args.port), box=box, latency=latency,
+                           compression=not args.no_compression)
+    server.log.info("Serving {:d} service(s) on http://{:s}/".format(
+        len(box.services), server.remote_addr))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,166 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Fleet controller.
+-----------------
+
+Run controller methods on many enigma2 devices concurrently. A fleet
+wide answer takes about as long as the slowest device needs instead of
+the sum of all devices' response times.
+
+.. code::
+
+    fleet = FleetController(['box1.local', 'box2.local', 'box3.local'])
+    for remote_addr, outcome in fleet.run('get_about').items():
+        print remote_addr, outcome.error or outcome.result['info']['model']
+
+    for remote_addr, timer in fleet.iter_timerlist():
+        print remote_addr, timer
+"""
+import time
+import logging
+from collections import namedtuple, OrderedDict
+from multiprocessing.pool import ThreadPool
+
+from controller import Enigma2APIController
+
+#: outcome of a controller method run on one device
+BoxResult = namedtuple('BoxResult',
+                       ['remote_addr', 'result', 'error', 'duration'])
+
+#: item of a merged result stream tagged by device
+FleetItem = namedtuple('FleetItem', ['remote_addr', 'item'])
+
+
+class FleetController(object):
+    """
+    Controller of the devices *remote_addrs*. Keyword arguments are
+    passed to each device's
+    :class:`enigma2_http_api.controller.Enigma2APIController`.
+
+    :param remote_addrs: device addresses
+    :param concurrency: maximum number of devices queried at once
+        (default: all devices)
+    """
+
+    def __init__(self, remote_addrs, concurrency=None, **kwargs):
+        self.log = logging.getLogger(__name__)
+        self.controllers = OrderedDict(
+            (remote_addr, Enigma2APIController(remote_addr=remote_addr,
+                                               **kwargs))
+            for remote_addr in remote_addrs)
+        self.concurrency = concurrency
+
+    def __len__(self):
+        return len(self.controllers)
+
+    def _call(self, remote_addr, method, args, kwargs):
+        controller = self.controllers[remote_addr]
+        if not callable(method):
+            method = getattr(controller, method)
+        else:
+            args = (controller,) + tuple(args)
+
+        started = time.time()
+        try:
+            result = method(*args, **kwargs)
+        except Exception, exc:
+            self.log.warning('%s', "{:s} failed on {!s}: {!r}".format(
+                getattr(method, '__name__', method), remote_addr, exc))
+            return BoxResult(remote_addr, None, exc, time.time() - started)
+        return BoxResult(remote_addr, result, None, time.time() - started)
+
+    def _iter_outcomes(self, method, args, kwargs):
+        remote_addrs = list(self.controllers)
+        if not remote_addrs:
+            return
+
+        concurrency = min(self.concurrency or len(remote_addrs),
+                          len(remote_addrs))
+        pool = ThreadPool(max(1, concurrency))
+        try:
+            for outcome in pool.imap_unordered(
+                    lambda remote_addr: self._call(remote_addr, method,
+                                                   args, kwargs),
+                    remote_addrs):
+                yield outcome
+        finally:
+            pool.close()
+            pool.join()
+
+    def run(self, method, *args, **kwargs):
+        """
+        Run controller method *method* on all devices concurrently.
+        Failures of single devices do not affect the others.
+
+        :param method: name of a controller method or callable receiving
+            the controller as first argument
+        :return: :class:`BoxResult` items by device in fleet order
+        :rtype: collections.OrderedDict
+        """
+        outcomes = dict((x.remote_addr, x) for x in
+                        self._iter_outcomes(method, args, kwargs))
+        return OrderedDict((remote_addr, outcomes[remote_addr]) for
+                           remote_addr in self.controllers)
+
+    def iter_merged(self, method, *args, **kwargs):
+        """
+        Run controller method *method* (returning a list) on all devices
+        concurrently and merge the results into one stream. Each device's
+        items are yielded as soon as it answered.
+
+        :param method: name of a controller method or callable receiving
+            the controller as first argument
+        :param errors: optional dict receiving the exception of each
+            failed device
+        :return: generator of :class:`FleetItem` items
+        """
+        errors = kwargs.pop("errors", None)
+        for outcome in self._iter_outcomes(method, args, kwargs):
+            if outcome.error is not None:
+                if errors is not None:
+                    errors[outcome.remote_addr] = outcome.error
+                continue
+            for item in outcome.result:
+                yield FleetItem(outcome.remote_addr, item)
+
+    def iter_timerlist(self, errors=None):
+        """
+        Timers of all devices.
+
+        :param errors: optional dict receiving failed devices' exceptions
+        :return: generator of :class:`FleetItem` items containing
+            :class:`enigma2_http_api.model.EEvent` items
+        """
+        return self.iter_merged('get_timerlist', errors=errors)
+
+    def iter_movielist(self, errors=None):
+        """
+        Movie items of all devices.
+
+        :param errors: optional dict receiving failed devices' exceptions
+        :return: generator of :class:`FleetItem` items
+        """
+        return self.iter_merged(
+            lambda controller: controller.get_movielist()['movies'],
+            errors=errors)
+
+    def iter_search(self, what, filter_func=None, errors=None):
+        """
+        Search the EPG of all devices for *what*.
+
+        :param what: search string
+        :param filter_func: result filtering function
+        :param errors: optional dict receiving failed devices' exceptions
+        :return: generator of :class:`FleetItem` items containing
+            :class:`enigma2_http_api.model.EEvent` items
+        """
+        return self.iter_merged('get_search', what, filter_func=filter_func,
+                                errors=errors)
+
+    def close(self):
+        """
+        Close all devices' pooled connections.
+        """
+        for controller in self.controllers.values():
+            controller.close()
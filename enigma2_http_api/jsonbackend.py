@@ -0,0 +1,109 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+JSON backends.
+--------------
+
+Uniform interface to the fastest available JSON implementation.
+`ujson <https://pypi.org/project/ujson/>`_ and
+`simplejson <https://pypi.org/project/simplejson/>`_ are preferred if
+installed, the standard library's :mod:`json` is used otherwise.
+"""
+import logging
+
+#: backend names in order of preference
+PREFERRED_BACKENDS = ('ujson', 'simplejson', 'json')
+
+_BACKENDS = dict()
+
+LOG = logging.getLogger(__name__)
+
+
+class JSONBackend(object):
+    """
+    JSON encoder/decoder backed by module *name*.
+
+    >>> backend = JSONBackend('json')
+    >>> backend.loads(backend.dumps({'events': [1, 2]}))
+    {u'events': [1, 2]}
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.module = __import__(name)
+
+    def __repr__(self):
+        return '<{:s} {!r}>'.format(self.__class__.__name__, self.name)
+
+    def loads(self, data):
+        """
+        Decode JSON document *data*.
+
+        :param data: UTF-8 encoded (byte) string or unicode string
+        :return: decoded data
+        """
+        return self.module.loads(data)
+
+    def dumps(self, obj, indent=None):
+        """
+        Encode *obj* as JSON document.
+
+        :param obj: data
+        :param indent: indentation level for pretty printing
+        :return: JSON document
+        :rtype: str
+        """
+        if self.name == 'ujson':
+            return self.module.dumps(obj, indent=indent or 0)
+        return self.module.dumps(obj, indent=indent)
+
+    def load(self, source):
+        return self.loads(source.read())
+
+    def dump(self, obj, target, indent=None):
+        target.write(self.dumps(obj, indent=indent))
+
+
+def available_backends():
+    """
+    Names of all installed backends in order of preference.
+
+    :return: backend names
+    :rtype: list
+    """
+    result = list()
+    for name in PREFERRED_BACKENDS:
+        try:
+            get_backend(name)
+        except ImportError:
+            continue
+        result.append(name)
+    return result
+
+
+def get_backend(name=None):
+    """
+    Get JSON backend *name* or the preferred installed backend.
+
+    :param name: backend name, see :data:`PREFERRED_BACKENDS`
+    :return: backend
+    :rtype: JSONBackend
+    :raises ImportError: if backend *name* is not installed
+
+    >>> get_backend('json')
+    <JSONBackend 'json'>
+    """
+    if name is None:
+        for candidate in PREFERRED_BACKENDS:
+            try:
+                return get_backend(candidate)
+            except ImportError:
+                pass
+
+    try:
+        return _BACKENDS[name]
+    except KeyError:
+        backend = JSONBackend(name)
+        LOG.debug("Using JSON backend {!r}".format(name))
+        _BACKENDS[name] = backend
+        return backend
@@ -0,0 +1,302 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Request metrics.
+----------------
+
+Per device and per endpoint accounting of API requests: transferred
+bytes, errors and latency histograms supporting percentile queries.
+"""
+import bisect
+import threading
+
+#: default upper bounds (seconds) of latency histogram buckets
+DEFAULT_LATENCY_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.15, 0.25, 0.35, 0.5, 0.75,
+    1.0, 1.5, 2.5, 3.5, 5.0, 7.5, 10.0, 15.0, 30.0, 60.0)
+
+#: percentiles reported by :meth:`LatencyHistogram.as_dict`
+REPORTED_PERCENTILES = (50, 95, 99)
+
+
+def wire_bytes(req, decoded_bytes=None):
+    """
+    Determine the number of bytes *req*'s body occupied on the wire, i.e.
+    before content decoding (decompression).
+
+    :param req: completely consumed response
+    :param decoded_bytes: fallback value
+    :return: number of bytes
+    :rtype: int
+    """
+    raw = getattr(req, 'raw', None)
+    received = getattr(raw, 'wire_bytes', None)
+    if received is not None:
+        return received
+
+    # tell() is not advanced while reading chunked responses
+    try:
+        position = raw.tell()
+    except Exception:
+        position = None
+    if position:
+        return position
+
+    try:
+        return int(req.headers['Content-Length'])
+    except (KeyError, ValueError, TypeError, AttributeError):
+        return decoded_bytes
+
+
+class LatencyHistogram(object):
+    """
+    Histogram of durations using fixed buckets, so its size does not
+    depend on the number of observations. Percentiles are interpolated
+    linearly within their bucket.
+
+    >>> histogram = LatencyHistogram()
+    >>> for value in (0.02, 0.03, 0.04, 0.2, 1.2):
+    ...     histogram.observe(value)
+    >>> histogram.count, histogram.maximum
+    (5, 1.2)
+    >>> 0.025 < histogram.percentile(50) <= 0.05
+    True
+    >>> histogram.percentile(99) <= histogram.maximum
+    True
+    """
+
+    def __init__(self, buckets=DEFAULT_LATENCY_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.minimum = None
+        self.maximum = None
+
+    def observe(self, value):
+        """
+        Add duration *value* (seconds).
+        """
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        if self.minimum is None or value < self.minimum:
+            self.minimum = value
+        if self.maximum is None or value > self.maximum:
+            self.maximum = value
+
+    def percentile(self, percent):
+        """
+        Estimate the *percent* percentile.
+
+        :param percent: percentile (0-100)
+        :return: duration in seconds or None if nothing was observed
+        :rtype: float
+        """
+        if not self.count:
+            return None
+
+        rank = self.count * percent / 100.0
+        seen = 0
+        for index, count in enumerate(self.counts):
+            if not count or seen + count < rank:
+                seen += count
+                continue
+            lower = self.minimum
+            if index > 0:
+                lower = max(lower, self.buckets[index - 1])
+            upper = self.maximum
+            if index < len(self.buckets):
+                upper = min(upper, self.buckets[index])
+            return lower + (upper - lower) * (rank - seen) / count
+        return self.maximum
+
+    def cumulative_counts(self):
+        """
+        Cumulative observation counts per bucket.
+
+        :return: list of tuples (upper bound, count), the last upper bound
+            is ``float('inf')``
+        :rtype: list
+        """
+        result = list()
+        total = 0
+        for bound, count in zip(self.buckets + (float('inf'),), self.counts):
+            total += count
+            result.append((bound, total))
+        return result
+
+    def as_dict(self):
+        result = {
+            'count': self.count,
+            'sum': self.sum,
+            'min': self.minimum,
+            'max': self.maximum,
+        }
+        for percent in REPORTED_PERCENTILES:
+            result['p{:d}'.format(percent)] = self.percentile(percent)
+        return result
+
+
+class EndpointMetrics(object):
+    """
+    Counters of one endpoint of one device.
+    """
+
+    def __init__(self, buckets=DEFAULT_LATENCY_BUCKETS):
+        self.requests = 0
+        self.wire_bytes = 0
+        self.decoded_bytes = 0
+        self.errors = 0
+        self.in_flight = 0
+        self.latency = LatencyHistogram(buckets)
+
+    def as_dict(self):
+        ratio = None
+        if self.decoded_bytes:
+            ratio = float(self.wire_bytes) / self.decoded_bytes
+        return {
+            'requests': self.requests,
+            'wire_bytes': self.wire_bytes,
+            'decoded_bytes': self.decoded_bytes,
+            'compression_ratio': ratio,
+        }
+
+
+class RequestMetrics(object):
+    """
+    Thread safe registry of :class:`EndpointMetrics` keyed by device and
+    endpoint. One instance may be shared by several controllers.
+
+    >>> metrics = RequestMetrics()
+    >>> metrics.record_transfer('box', 'epgservice', 250, 1000)
+    >>> metrics.transfer_stats('box')['epgservice']['compression_ratio']
+    0.25
+    >>> metrics.record_latency('box', 'epgservice', 0.5)
+    >>> metrics.latency_stats('box')['epgservice']['p99']
+    0.5
+    """
+
+    def __init__(self, buckets=DEFAULT_LATENCY_BUCKETS):
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self._endpoints = dict()
+
+    def _endpoint(self, remote_addr, path):
+        key = (remote_addr, path)
+        try:
+            return self._endpoints[key]
+        except KeyError:
+            endpoint = EndpointMetrics(self.buckets)
+            self._endpoints[key] = endpoint
+            return endpoint
+
+    def record_transfer(self, remote_addr, path, wire, decoded):
+        """
+        Account a completed request.
+
+        :param remote_addr: device address
+        :param path: API path
+        :param wire: number of bytes received on the wire
+        :param decoded: number of bytes after content decoding
+        """
+        with self._lock:
+            endpoint = self._endpoint(remote_addr, path)
+            endpoint.requests += 1
+            endpoint.wire_bytes += wire or 0
+            endpoint.decoded_bytes += decoded or 0
+
+    def transfer_stats(self, remote_addr=None):
+        """
+        Transfer statistics per endpoint.
+
+        :param remote_addr: restrict result to this device
+        :return: path to statistics mapping if *remote_addr* is given,
+            (remote_addr, path) to statistics mapping otherwise
+        :rtype: dict
+        """
+        with self._lock:
+            if remote_addr is None:
+                return dict((key, endpoint.as_dict()) for key, endpoint in
+                            self._endpoints.items())
+            return dict((key[1], endpoint.as_dict()) for key, endpoint in
+                        self._endpoints.items() if key[0] == remote_addr)
+
+    def call_started(self, remote_addr, path):
+        """
+        Account an API call in flight.
+
+        :param remote_addr: device address
+        :param path: API path
+        """
+        with self._lock:
+            self._endpoint(remote_addr, path).in_flight += 1
+
+    def call_finished(self, remote_addr, path):
+        """
+        Account the end of an API call passed to :meth:`call_started`.
+
+        :param remote_addr: device address
+        :param path: API path
+        """
+        with self._lock:
+            self._endpoint(remote_addr, path).in_flight -= 1
+
+    def record_latency(self, remote_addr, path, duration, error=False):
+        """
+        Account the duration of an API call.
+
+        :param remote_addr: device address
+        :param path: API path
+        :param duration: duration in seconds
+        :param error: True if the call failed
+        """
+        with self._lock:
+            endpoint = self._endpoint(remote_addr, path)
+            endpoint.latency.observe(duration)
+            if error:
+                endpoint.errors += 1
+
+    def latency_stats(self, remote_addr=None):
+        """
+        Latency statistics per endpoint.
+
+        :param remote_addr: restrict result to this device
+        :return: path to statistics (number of calls, failed calls, total,
+            minimum and maximum duration, 50th/95th/99th percentile in
+            seconds) mapping if *remote_addr* is given, (remote_addr, path)
+            to statistics mapping otherwise
+        :rtype: dict
+        """
+        def stats(endpoint):
+            result = endpoint.latency.as_dict()
+            result['errors'] = endpoint.errors
+            return result
+
+        with self._lock:
+            if remote_addr is None:
+                return dict((key, stats(endpoint)) for key, endpoint in
+                            self._endpoints.items())
+            return dict((key[1], stats(endpoint)) for key, endpoint in
+                        self._endpoints.items() if key[0] == remote_addr)
+
+    def snapshot(self):
+        """
+        Consistent copy of all counters, e.g. for exporting them.
+
+        :return: (remote_addr, path) to counters (requests, wire_bytes,
+            decoded_bytes, errors, in_flight, latency_count, latency_sum
+            and cumulative latency_buckets) mapping
+        :rtype: dict
+        """
+        with self._lock:
+            return dict((key, {
+                'requests': endpoint.requests,
+                'wire_bytes': endpoint.wire_bytes,
+                'decoded_bytes': endpoint.decoded_bytes,
+                'errors': endpoint.errors,
+                'in_flight': endpoint.in_flight,
+                'latency_count': endpoint.latency.count,
+                'latency_sum': endpoint.latency.sum,
+                'latency_buckets': endpoint.latency.cumulative_counts(),
+            }) for key, endpoint in self._endpoints.items())
@@ -0,0 +1,299 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Power state tracking.
+---------------------
+
+A :class:`PowerStateTracker` probes an enigma2 device's power state
+using the cheap ``powerstate`` API call. Devices in standby or deep
+standby are polled less often than running ones, unreachable devices
+are polled using exponential backoff.
+
+:meth:`PowerStateTracker.wait_until_ready` blocks until the device's
+web interface answers again, e.g. after waking it up:
+
+.. code::
+
+    tracker = PowerStateTracker(eac)
+    if tracker.wakeup(timeout=120):
+        eac.get_epgservices(service_refs)
+
+Probes are sent past the controller's circuit breaker, so a device which
+was unreachable while booting is noticed as soon as it answers; the
+first successful probe closes the circuit again.
+"""
+import time
+import logging
+import threading
+
+from controller import POWERSTATE_WAKEUP
+from resilience import Deadline, RETRYABLE_EXCEPTIONS
+
+#: device answers and is running
+STATE_ON = 'on'
+
+#: device answers and is in standby
+STATE_STANDBY = 'standby'
+
+#: device answers, but its web interface is not ready yet
+STATE_NOT_READY = 'not-ready'
+
+#: device does not answer (deep standby, switched off, booting)
+STATE_UNREACHABLE = 'unreachable'
+
+#: device has not been probed yet
+STATE_UNKNOWN = 'unknown'
+
+#: states of a device whose web interface answers API calls
+READY_STATES = frozenset([STATE_ON, STATE_STANDBY])
+
+#: default polling interval (seconds) per state
+DEFAULT_POLL_INTERVALS = {
+    STATE_ON: 30.0,
+    STATE_STANDBY: 60.0,
+    STATE_NOT_READY: 2.0,
+    STATE_UNREACHABLE: 10.0,
+    STATE_UNKNOWN: 0.0,
+}
+
+#: default maximum polling interval (seconds) of unreachable devices
+DEFAULT_MAX_UNREACHABLE_INTERVAL = 300.0
+
+#: default number of seconds a single probe may take
+DEFAULT_PROBE_TIMEOUT = 3.0
+
+#: default number of seconds to wait for a device to become ready
+DEFAULT_READY_TIMEOUT = 180.0
+
+#: default initial delay (seconds) between readiness probes
+DEFAULT_READY_BACKOFF_BASE = 0.25
+
+#: default maximum delay (seconds) between readiness probes
+DEFAULT_READY_BACKOFF_MAX = 5.0
+
+
+def state_of(result):
+    """
+    Determine the power state from a ``powerstate`` API call result.
+
+    :param result: decoded response
+    :return: power state
+
+    >>> state_of({'result': True, 'instandby': False})
+    'on'
+    >>> state_of({'result': True, 'instandby': True})
+    'standby'
+    >>> state_of({'result': False})
+    'not-ready'
+    """
+    if not isinstance(result, dict) or 'instandby' not in result:
+        return STATE_NOT_READY
+    if result['instandby']:
+        return STATE_STANDBY
+    return STATE_ON
+
+
+class PowerStateTracker(object):
+    """
+    Power state of the device of *controller*.
+
+    :param controller: controller
+    :param intervals: polling interval (seconds) per state
+    :param max_unreachable_interval: maximum polling interval of an
+        unreachable device, the interval is doubled after each failed
+        probe
+    :param probe_timeout: number of seconds a single probe may take
+    :param on_change: callables receiving (controller, old state, new
+        state) on each state change
+    """
+
+    def __init__(self, controller, intervals=None,
+                 max_unreachable_interval=DEFAULT_MAX_UNREACHABLE_INTERVAL,
+                 probe_timeout=DEFAULT_PROBE_TIMEOUT, on_change=None):
+        self.log = logging.getLogger(__name__)
+        self.controller = controller
+        self.intervals = dict(DEFAULT_POLL_INTERVALS)
+        self.intervals.update(intervals or dict())
+        self.max_unreachable_interval = max_unreachable_interval
+        self.probe_timeout = probe_timeout
+        self.on_change = list(on_change or [])
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread = None
+        self.state = STATE_UNKNOWN
+        self.since = None
+        self.last_probe = None
+        self.probes = 0
+        self.failures = 0
+        self._unreachable_probes = 0
+
+    def is_ready(self):
+        """
+        Check if the last probe found the device's web interface ready.
+
+        :rtype: bool
+        """
+        return self.state in READY_STATES
+
+    def probe(self):
+        """
+        Query the device's power state now.
+
+        :return: power state
+        """
+        try:
+            result = self.controller.get_powerstate(
+                deadline=self.probe_timeout, bypass_breaker=True)
+        except RETRYABLE_EXCEPTIONS, exc:
+            self.log.debug("{!s} unreachable: {!r}".format(
+                self.controller.remote_addr, exc))
+            state = STATE_UNREACHABLE
+        except Exception, exc:
+            self.log.debug("{!s} not ready: {!r}".format(
+                self.controller.remote_addr, exc))
+            state = STATE_NOT_READY
+        else:
+            state = state_of(result)
+
+        self._update(state)
+        return state
+
+    def _update(self, state):
+        with self._lock:
+            previous = self.state
+            self.probes += 1
+            self.last_probe = time.time()
+            if state not in READY_STATES:
+                self.failures += 1
+            if state == STATE_UNREACHABLE:
+                self._unreachable_probes += 1
+            else:
+                self._unreachable_probes = 0
+            if state == previous:
+                return
+            self.state = state
+            self.since = self.last_probe
+
+        self.log.info('%s', "{!s}: power state {:s} -> {:s}".format(
+            self.controller.remote_addr, previous, state))
+        for callback in self.on_change:
+            try:
+                callback(self.controller, previous, state)
+            except Exception, exc:
+                self.log.warning('%s', "on_change {!r} failed: {!r}".format(
+                    callback, exc))
+
+    def poll_interval(self):
+        """
+        Number of seconds until the next probe, depending on the current
+        state.
+
+        :rtype: float
+        """
+        with self._lock:
+            interval = self.intervals[self.state]
+            if self.state == STATE_UNREACHABLE:
+                interval = min(
+                    interval * 2 ** max(0, self._unreachable_probes - 1),
+                    self.max_unreachable_interval)
+            return interval
+
+    def start(self):
+        """
+        Poll in a background thread.
+
+        :return: *self*
+        """
+        self._stopped.clear()
+        self._thread = threading.Thread(
+            target=self._run,
+            name='eha-powerstate-{:s}'.format(self.controller.remote_addr))
+        self._thread.daemon = True
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """
+        Stop polling.
+        """
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        while not self._stopped.is_set():
+            self.probe()
+            if self._stopped.wait(self.poll_interval()):
+                return
+
+    def wait_until_ready(self, timeout=DEFAULT_READY_TIMEOUT,
+                         base=DEFAULT_READY_BACKOFF_BASE,
+                         maximum=DEFAULT_READY_BACKOFF_MAX, awake=False):
+        """
+        Probe the device using exponential backoff until its web
+        interface answers.
+
+        :param timeout: maximum number of seconds (or
+            :class:`enigma2_http_api.resilience.Deadline`) to wait
+        :param base: initial delay between probes
+        :param maximum: maximum delay between probes
+        :param awake: wait until the device left standby as well
+        :return: True if the device became ready within *timeout*
+        :rtype: bool
+        """
+        deadline = Deadline.coerce(timeout)
+        expected = READY_STATES
+        if awake:
+            expected = frozenset([STATE_ON])
+
+        attempt = 0
+        while True:
+            if self.probe() in expected:
+                return True
+
+            delay = min(maximum, base * 2 ** attempt)
+            attempt += 1
+            if deadline is not None:
+                remaining = deadline.remaining()
+                if remaining <= 0:
+                    return False
+                delay = min(delay, remaining)
+            time.sleep(delay)
+
+    def wakeup(self, timeout=DEFAULT_READY_TIMEOUT):
+        """
+        Wake the device up and wait until it is running.
+
+        :param timeout: maximum number of seconds to wait
+        :return: True if the device is running within *timeout*
+        :rtype: bool
+        """
+        deadline = Deadline.coerce(timeout)
+        try:
+            self.controller.get_powerstate(POWERSTATE_WAKEUP,
+                                           deadline=self.probe_timeout,
+                                           bypass_breaker=True)
+        except Exception, exc:
+            self.log.warning('%s', "{!s}: wakeup failed: {!r}".format(
+                self.controller.remote_addr, exc))
+        return self.wait_until_ready(timeout=deadline, awake=True)
+
+    def stats(self):
+        """
+        Power state tracking statistics.
+
+        :return: state, time of the last state change and probe, number
+            of probes and failed probes and current polling interval
+        :rtype: dict
+        """
+        interval = self.poll_interval()
+        with self._lock:
+            return {
+                'state': self.state,
+                'since': self.since,
+                'last_probe': self.last_probe,
+                'probes': self.probes,
+                'failures': self.failures,
+                'poll_interval': interval,
+            }
@@ -0,0 +1,177 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Client side rate limiting.
+--------------------------
+
+Token buckets shared by all controllers talking to the same enigma2
+device, keeping the device's (weak) CPU from being overloaded by API
+requests while live TV is playing.
+"""
+import time
+import logging
+import threading
+
+LOG = logging.getLogger(__name__)
+
+#: API calls triggered by user interaction
+INTERACTIVE_PATHS = frozenset([
+    'message',
+    'messageanswer',
+    'powerstate',
+    'remotecontrol',
+    'vol',
+    'zap',
+])
+
+#: budget name of bulk (e.g. EPG) API calls
+BUDGET_BULK = 'bulk'
+
+#: budget name of interactive API calls
+BUDGET_INTERACTIVE = 'interactive'
+
+_BUCKETS = dict()
+_BUCKETS_LOCK = threading.Lock()
+
+
+def budget_for_path(path):
+    """
+    Determine the rate limiting budget of API call *path*.
+
+    :param path: API path
+    :return: budget name
+
+    >>> budget_for_path('zap')
+    'interactive'
+    >>> budget_for_path('epgservice')
+    'bulk'
+    """
+    if path in INTERACTIVE_PATHS:
+        return BUDGET_INTERACTIVE
+    return BUDGET_BULK
+
+
+class TokenBucket(object):
+    """
+    Thread safe token bucket refilled with *rate* tokens per second and
+    holding at most *burst* tokens.
+
+    Callers reserve tokens in arrival order; a caller which has to wait
+    sleeps outside of the lock.
+
+    >>> bucket = TokenBucket(rate=1, burst=2, clock=lambda: 0)
+    >>> bucket.try_acquire(), bucket.try_acquire(), bucket.try_acquire()
+    (True, True, False)
+    """
+
+    def __init__(self, rate, burst=None, clock=time.time, sleep=time.sleep):
+        if rate <= 0:
+            raise ValueError("rate must be positive: {!r}".format(rate))
+        self.rate = float(rate)
+        self.burst = float(burst or max(1.0, self.rate))
+        self._clock = clock
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self._tokens = self.burst
+        self._updated = clock()
+        self.acquired = 0
+        self.delayed = 0
+        self.waited = 0.0
+
+    def _refill(self, now):
+        elapsed = max(0.0, now - self._updated)
+        self._tokens = min(self.burst, self._tokens + elapsed * self.rate)
+        self._updated = now
+
+    def try_acquire(self, tokens=1):
+        """
+        Take *tokens* if available without waiting.
+
+        :param tokens: number of tokens
+        :return: True if the tokens have been taken
+        :rtype: bool
+        """
+        with self._lock:
+            self._refill(self._clock())
+            if self._tokens < tokens:
+                return False
+            self._tokens -= tokens
+            self.acquired += 1
+            return True
+
+    def acquire(self, tokens=1, timeout=None):
+        """
+        Take *tokens*, waiting until they become available.
+
+        :param tokens: number of tokens
+        :param timeout: maximum number of seconds to wait
+        :return: True if the tokens have been taken, False if they would
+            not have become available within *timeout*
+        :rtype: bool
+        """
+        with self._lock:
+            self._refill(self._clock())
+            wait = max(0.0, (tokens - self._tokens) / self.rate)
+
+            if timeout is not None and wait > timeout:
+                return False
+
+            self._tokens -= tokens
+            self.acquired += 1
+            if wait > 0:
+                self.delayed += 1
+                self.waited += wait
+
+        if wait > 0:
+            self._sleep(wait)
+
+        return True
+
+    def stats(self):
+        """
+        Rate limiter statistics.
+
+        :return: rate, burst, acquisitions, delayed acquisitions and total
+            number of seconds waited
+        :rtype: dict
+        """
+        with self._lock:
+            return {
+                'rate': self.rate,
+                'burst': self.burst,
+                'acquired': self.acquired,
+                'delayed': self.delayed,
+                'waited': self.waited,
+            }
+
+
+def get_token_bucket(name, budget, rate, burst=None):
+    """
+    Get the process wide token bucket of *budget* for device *name*
+    (usually the controller's *remote_addr*), creating it if needed.
+    The rate and burst of the first caller are used, callers asking for
+    different ones are warned about.
+
+    :param name: device name
+    :param budget: budget name, e.g. :data:`BUDGET_BULK`
+    :param rate: tokens per second
+    :param burst: bucket capacity
+    :return: token bucket
+    :rtype: TokenBucket
+    """
+    key = (name, budget)
+    with _BUCKETS_LOCK:
+        try:
+            bucket = _BUCKETS[key]
+        except KeyError:
+            bucket = TokenBucket(rate, burst=burst)
+            _BUCKETS[key] = bucket
+            return bucket
+
+    requested = (float(rate), float(burst or max(1.0, float(rate))))
+    if requested != (bucket.rate, bucket.burst):
+        LOG.warning('%s', "Token bucket {!r} of {!r} already uses rate {:g} "
+                          "burst {:g}, ignoring rate {:g} burst {:g}".format(
+                              budget, name, bucket.rate, bucket.burst,
+                              *requested))
+    return bucket
@@ -0,0 +1,177 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Offline replay of request dumps.
+--------------------------------
+
+Answer API calls from the ``eha_raw_NNNN.json`` files or
+``eha_dump_NNNN.jsonl.gz`` archives written by
+:class:`enigma2_http_api.controller.Enigma2APIController` if
+*dump_requests* is set, without any network access.
+"""
+import os
+import glob
+import logging
+import threading
+import urlparse
+
+from jsonbackend import get_backend
+from dumpwriter import iter_archive, ARCHIVE_FILE_PATTERN
+
+#: glob pattern of request dump files
+DUMP_FILE_PATTERN = 'eha_raw_*.json'
+
+#: API URL path prefix
+API_PATH_PREFIX = '/api/'
+
+
+class ReplayMissError(KeyError):
+    """
+    Raised if no captured response matches an API call.
+    """
+    pass
+
+
+def _text(value):
+    if isinstance(value, unicode):
+        return value.encode('utf-8')
+    return str(value)
+
+
+def replay_key(path, params=None):
+    """
+    Generate a lookup key for API call *path* using *params*.
+
+    :param path: API path
+    :param params: URL parameters
+    :return: hashable key
+
+    >>> replay_key('getservices', {'sRef': u'1:7:1:0:0:0:0:0:0:0:', 'x': 1})
+    ('getservices', (('sRef', '1:7:1:0:0:0:0:0:0:0:'), ('x', '1')))
+    """
+    items = (params or dict()).items()
+    return path, tuple(sorted((_text(k), _text(v)) for k, v in items))
+
+
+def url_replay_key(url):
+    """
+    Generate a lookup key for a captured *url*.
+
+    :param url: URL
+    :return: hashable key
+
+    >>> url_replay_key('http://box/api/getservices?sRef=1%3A7%3A1&x=1')
+    ('getservices', (('sRef', '1:7:1'), ('x', '1')))
+    """
+    parsed = urlparse.urlsplit(_text(url))
+    path = parsed.path
+    if path.startswith(API_PATH_PREFIX):
+        path = path[len(API_PATH_PREFIX):]
+    params = urlparse.parse_qsl(parsed.query, keep_blank_values=True)
+    return path, tuple(sorted(params))
+
+
+class ReplayTransport(object):
+    """
+    Captured responses read from request dump directory *directory*.
+
+    Responses are kept as JSON documents so that replayed API calls
+    include the decoding cost. Several captures of the same API call are
+    served in capture order, the last one is repeated. Captures are read
+    and re-encoded using *json_backend* (default: the preferred
+    :class:`enigma2_http_api.jsonbackend.JSONBackend`).
+    """
+
+    def __init__(self, directory, json_backend=None):
+        self.log = logging.getLogger(__name__)
+        self.directory = directory
+        self.json = json_backend or get_backend()
+        self._lock = threading.Lock()
+        self._captures = dict()
+        self._served = dict()
+        self.hits = 0
+        self.misses = 0
+        self.load(directory)
+
+    def add(self, url, response, filter_key=None):
+        """
+        Add a captured response.
+
+        :param url: request URL
+        :param response: decoded response (or the value of *filter_key*
+            if the capture was filtered)
+        :param filter_key: key the capture was filtered by
+        """
+        if filter_key:
+            response = {filter_key: response}
+
+        with self._lock:
+            self._captures.setdefault(url_replay_key(url), list()).append(
+                (filter_key, self.json.dumps(response)))
+
+    def load(self, directory):
+        """
+        Add all captures found in *directory* (request dump files and
+        archives).
+
+        :param directory: request dump directory
+        """
+        filenames = sorted(glob.glob(os.path.join(directory,
+                                                  DUMP_FILE_PATTERN)))
+        for filename in filenames:
+            with open(filename, "rb") as source:
+                data = self.json.load(source)
+            self.add(data['url'], data['response'], data.get('_filter_key'))
+
+        archives = sorted(glob.glob(os.path.join(directory,
+                                                 ARCHIVE_FILE_PATTERN)))
+        for archive in archives:
+            for data in iter_archive(archive, self.json):
+                self.add(data['url'], data['response'],
+                         data.get('_filter_key'))
+        filenames += archives
+
+        self.log.debug("Loaded {:d} capture(s) from {!r}".format(
+            len(filenames), directory))
+
+    def lookup(self, path, params=None, filter_key=None):
+        """
+        Look up the captured response of API call *path*.
+
+        :param path: API path
+        :param params: URL parameters
+        :param filter_key: key of interest
+        :return: JSON document
+        :rtype: str
+        :raises ReplayMissError: if there is no matching capture
+        """
+        key = replay_key(path, params)
+
+        with self._lock:
+            captures = [x for x in self._captures.get(key, list()) if
+                        x[0] is None or x[0] == filter_key]
+
+            if not captures:
+                self.misses += 1
+                raise ReplayMissError(
+                    "No capture of {!r} (filter_key={!r})".format(
+                        key, filter_key))
+
+            index = self._served.get(key, 0)
+            self._served[key] = index + 1
+            self.hits += 1
+            return captures[min(index, len(captures) - 1)][1]
+
+    def stats(self):
+        """
+        Replay statistics.
+
+        :return: number of captured API calls, hits and misses
+        :rtype: dict
+        """
+        with self._lock:
+            return {
+                'captures': sum(len(x) for x in self._captures.values()),
+                'hits': self.hits,
+                'misses': self.misses,
+            }
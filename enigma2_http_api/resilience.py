@@ -0,0 +1,320 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Failure handling.
+-----------------
+
+Timeouts and deadlines bounding the duration of API calls, jittered
+exponential backoff for retrying idempotent API calls and a circuit
+breaker per enigma2 device which fails fast while the device is
+unreachable (e.g. in deep standby or while rebooting).
+"""
+import time
+import random
+import logging
+import threading
+
+import requests
+from requests.packages.urllib3.exceptions import NewConnectionError
+
+#: default number of seconds to wait for a connection to be established
+DEFAULT_CONNECT_TIMEOUT = 5.0
+
+#: default number of seconds to wait for response data
+DEFAULT_READ_TIMEOUT = 30.0
+
+#: default number of consecutive failures opening a circuit
+DEFAULT_FAILURE_THRESHOLD = 5
+
+#: default number of seconds an open circuit waits before probing again
+DEFAULT_RESET_TIMEOUT = 30.0
+
+#: default base delay (seconds) of the exponential backoff
+DEFAULT_BACKOFF_BASE = 0.5
+
+#: default maximum delay (seconds) of the exponential backoff
+DEFAULT_BACKOFF_MAX = 10.0
+
+#: circuit state: requests pass
+STATE_CLOSED = 'closed'
+
+#: circuit state: requests fail fast
+STATE_OPEN = 'open'
+
+#: circuit state: a single probe request is allowed to pass
+STATE_HALF_OPEN = 'half-open'
+
+#: exceptions considered to be caused by an unreachable device
+RETRYABLE_EXCEPTIONS = (
+    requests.exceptions.ConnectionError,
+    requests.exceptions.Timeout,
+)
+
+_BREAKERS = dict()
+_BREAKERS_LOCK = threading.Lock()
+
+
+class CircuitOpenError(requests.exceptions.ConnectionError):
+    """
+    Raised instead of contacting a device whose circuit is open.
+    """
+    pass
+
+
+class DeadlineExceeded(requests.exceptions.Timeout):
+    """
+    Raised if an operation's deadline passed before it completed.
+    """
+    pass
+
+
+def is_connect_error(exc):
+    """
+    Check if *exc* was raised because no connection could be
+    established (as opposed to a failure of an established connection).
+
+    :param exc: exception
+    :rtype: bool
+
+    >>> is_connect_error(requests.exceptions.ConnectTimeout())
+    True
+    >>> is_connect_error(requests.exceptions.ReadTimeout())
+    False
+    """
+    if isinstance(exc, requests.exceptions.ConnectTimeout):
+        return True
+    if not isinstance(exc, requests.exceptions.ConnectionError) or \
+            not exc.args:
+        return False
+    return isinstance(getattr(exc.args[0], 'reason', None),
+                      NewConnectionError)
+
+
+def normalise_timeout(timeout):
+    """
+    Normalise *timeout* to a tuple of connect and read timeout.
+
+    :param timeout: seconds or tuple of (connect, read) seconds
+    :return: tuple of (connect, read) seconds
+
+    >>> normalise_timeout(3)
+    (3, 3)
+    >>> normalise_timeout((1, 20))
+    (1, 20)
+    """
+    if isinstance(timeout, (tuple, list)):
+        return tuple(timeout)
+    return timeout, timeout
+
+
+class Deadline(object):
+    """
+    Point in time an operation and all of its sub-requests have to be
+    completed by.
+
+    >>> deadline = Deadline(10, clock=lambda: 100)
+    >>> deadline.remaining()
+    10.0
+    >>> deadline.clamp((5, 30))
+    (5, 10.0)
+    """
+
+    def __init__(self, seconds, clock=time.time):
+        self._clock = clock
+        self.seconds = seconds
+        self.expires = clock() + seconds
+
+    def __repr__(self):
+        return '<{:s} {:.3f}s remaining>'.format(self.__class__.__name__,
+                                                 self.remaining())
+
+    @classmethod
+    def coerce(cls, value):
+        """
+        Create a deadline from *value* unless it already is one.
+
+        :param value: None, seconds or :class:`Deadline`
+        :return: deadline or None
+        """
+        if value is None or isinstance(value, cls):
+            return value
+        return cls(value)
+
+    def remaining(self):
+        """
+        Number of seconds left.
+
+        :rtype: float
+        """
+        return max(0.0, float(self.expires - self._clock()))
+
+    def expired(self):
+        return self.remaining() <= 0
+
+    def check(self):
+        """
+        :raises DeadlineExceeded: if the deadline passed
+        """
+        if self.expired():
+            raise DeadlineExceeded(
+                "deadline of {!r}s exceeded".format(self.seconds))
+
+    def clamp(self, timeout):
+        """
+        Limit connect and read *timeout* to the remaining time.
+
+        :param timeout: seconds or tuple of (connect, read) seconds
+        :return: tuple of (connect, read) seconds
+        :raises DeadlineExceeded: if the deadline passed
+        """
+        self.check()
+        remaining = self.remaining()
+        return tuple(remaining if x is None else min(x, remaining)
+                     for x in normalise_timeout(timeout))
+
+
+def backoff_delays(retries, base=DEFAULT_BACKOFF_BASE,
+                   maximum=DEFAULT_BACKOFF_MAX, rng=random.random):
+    """
+    Generate *retries* delays using exponential backoff with full jitter.
+
+    :param retries: number of delays
+    :param base: base delay in seconds
+    :param maximum: upper bound of each delay in seconds
+    :param rng: random number generator returning values in [0, 1)
+    :return: generator of delays in seconds
+
+    >>> list(backoff_delays(4, base=1, maximum=5, rng=lambda: 0.5))
+    [0.5, 1.0, 2.0, 2.5]
+    >>> list(backoff_delays(0))
+    []
+    """
+    for attempt in range(retries):
+        yield rng() * min(maximum, base * (2 ** attempt))
+
+
+class CircuitBreaker(object):
+    """
+    Thread safe circuit breaker.
+
+    After *failure_threshold* consecutive failures the circuit opens and
+    :meth:`before_request` raises :class:`CircuitOpenError`. Once
+    *reset_timeout* seconds have passed a single probe request is let
+    through (half-open); its outcome closes or re-opens the circuit.
+
+    >>> breaker = CircuitBreaker('box', failure_threshold=2)
+    >>> breaker.record_failure()
+    >>> breaker.state
+    'closed'
+    >>> breaker.record_failure()
+    >>> breaker.state
+    'open'
+    >>> breaker.before_request()
+    Traceback (most recent call last):
+        ...
+    CircuitOpenError: circuit for 'box' is open
+    """
+
+    def __init__(self, name, failure_threshold=DEFAULT_FAILURE_THRESHOLD,
+                 reset_timeout=DEFAULT_RESET_TIMEOUT, clock=time.time):
+        self.log = logging.getLogger(__name__)
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self._lock = threading.Lock()
+        self.state = STATE_CLOSED
+        self.failures = 0
+        self.rejected = 0
+        self._opened_at = None
+        self._probing = False
+
+    def before_request(self):
+        """
+        Check if a request may be sent.
+
+        :raises CircuitOpenError: if the circuit is open
+        """
+        with self._lock:
+            if self.state == STATE_CLOSED:
+                return
+
+            if self.state == STATE_OPEN and (
+                    self._clock() - self._opened_at >= self.reset_timeout):
+                self.log.info("Circuit for {!r} is half-open".format(
+                    self.name))
+                self.state = STATE_HALF_OPEN
+                self._probing = False
+
+            if self.state == STATE_HALF_OPEN and not self._probing:
+                self._probing = True
+                return
+
+            self.rejected += 1
+
+        raise CircuitOpenError(
+            "circuit for {!r} is open".format(self.name))
+
+    def record_success(self):
+        with self._lock:
+            if self.state != STATE_CLOSED:
+                self.log.info("Circuit for {!r} is closed".format(self.name))
+            self.state = STATE_CLOSED
+            self.failures = 0
+            self._probing = False
+
+    def release_probe(self):
+        """
+        Give up the probe request let through by :meth:`before_request`
+        without recording an outcome, e.g. if it failed for a reason not
+        related to the device's reachability. The next request becomes
+        the probe.
+        """
+        with self._lock:
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._probing = False
+
+            if self.state == STATE_HALF_OPEN or (
+                    self.failures >= self.failure_threshold):
+                if self.state != STATE_OPEN:
+                    self.log.warning(
+                        "Circuit for {!r} is open after {:d} failure(s)".format(
+                            self.name, self.failures))
+                self.state = STATE_OPEN
+                self._opened_at = self._clock()
+
+    def stats(self):
+        """
+        Circuit breaker statistics.
+
+        :return: state, consecutive failures and rejected requests
+        :rtype: dict
+        """
+        with self._lock:
+            return {
+                'state': self.state,
+                'failures': self.failures,
+                'rejected': self.rejected,
+            }
+
+
+def get_circuit_breaker(name, **kwargs):
+    """
+    Get the process wide circuit breaker for device *name* (usually the
+    controller's *remote_addr*), creating it using *kwargs* if needed.
+
+    :param name: device name
+    :return: circuit breaker
+    :rtype: CircuitBreaker
+    """
+    with _BREAKERS_LOCK:
+        try:
+            return _BREAKERS[name]
+        except KeyError:
+            breaker = CircuitBreaker(name, **kwargs)
+            _BREAKERS[name] = breaker
+            return breaker
@@ -0,0 +1,261 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Name resolution.
+----------------
+
+Enigma2 devices are usually addressed by multicast DNS names like
+``enigma2.local`` whose resolution may take seconds. The
+:class:`CachingResolver` keeps resolved addresses for a while so that
+name resolution is not part of each API call's latency.
+
+All addresses of a name are kept (e.g. the IPv4 and IPv6 addresses of
+a dual-stack device) so that the controller can fall back to the next
+one if connecting fails. Scoped IPv6 addresses like ``fe80::1%eth0``
+are skipped since they cannot be used in URLs; names resolving to
+nothing else are left to the system resolver.
+"""
+import time
+import socket
+import logging
+import threading
+
+from cache import SingleFlight
+
+#: default number of seconds a resolved address is used
+DEFAULT_RESOLVER_TTL = 300.0
+
+#: default number of seconds a failed lookup is not repeated
+DEFAULT_NEGATIVE_TTL = 10.0
+
+_DEFAULT_RESOLVER = None
+_DEFAULT_RESOLVER_LOCK = threading.Lock()
+
+
+def is_ip_address(host):
+    """
+    Check if *host* is an IPv4 or IPv6 address literal.
+
+    >>> is_ip_address('192.168.0.10')
+    True
+    >>> is_ip_address('::1')
+    True
+    >>> is_ip_address('enigma2.local')
+    False
+    """
+    for family in (socket.AF_INET, socket.AF_INET6):
+        try:
+            socket.inet_pton(family, host)
+            return True
+        except (socket.error, ValueError):
+            pass
+    return False
+
+
+def usable_addresses(addresses):
+    """
+    Remove duplicates and scoped IPv6 addresses from *addresses*,
+    keeping their order.
+
+    :param addresses: addresses
+    :return: addresses
+    :rtype: tuple
+
+    >>> usable_addresses(['fe80::1%eth0', '10.0.0.1', 'fd00::1', '10.0.0.1'])
+    ('10.0.0.1', 'fd00::1')
+    """
+    result = list()
+    for address in addresses:
+        if '%' not in address and address not in result:
+            result.append(address)
+    return tuple(result)
+
+
+def getaddrinfo_addresses(host):
+    """
+    Resolve *host* using the system resolver.
+
+    :param host: host name
+    :return: addresses in the order returned
+    :rtype: list
+    :raises socket.gaierror: if *host* cannot be resolved
+    """
+    return [x[4][0] for x in
+            socket.getaddrinfo(host, None, 0, socket.SOCK_STREAM)]
+
+
+class ResolverStats(object):
+    """
+    Counters of a :class:`CachingResolver`.
+    """
+
+    def __init__(self):
+        self.hits = 0
+        self.resolutions = 0
+        self.failures = 0
+        self.invalidations = 0
+        self.resolution_time = 0.0
+        self.last_resolution_time = None
+
+    def as_dict(self):
+        return {
+            'hits': self.hits,
+            'resolutions': self.resolutions,
+            'failures': self.failures,
+            'invalidations': self.invalidations,
+            'resolution_time': self.resolution_time,
+            'last_resolution_time': self.last_resolution_time,
+        }
+
+
+class CachingResolver(object):
+    """
+    Thread safe cache of resolved host names.
+
+    >>> resolver = CachingResolver(
+    ...     resolve_func=lambda host: ['10.0.0.1', 'fd00::1'])
+    >>> resolver.resolve('enigma2.local')
+    '10.0.0.1'
+    >>> resolver.resolve_all('enigma2.local')
+    ('10.0.0.1', 'fd00::1')
+    >>> resolver.stats('enigma2.local')['hits']
+    1
+    """
+
+    def __init__(self, ttl=DEFAULT_RESOLVER_TTL,
+                 negative_ttl=DEFAULT_NEGATIVE_TTL, clock=time.time,
+                 resolve_func=getaddrinfo_addresses):
+        self.log = logging.getLogger(__name__)
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self._clock = clock
+        self._resolve_func = resolve_func
+        self._lock = threading.Lock()
+        self._addresses = dict()
+        self._stats = dict()
+        self._flights = SingleFlight(copy_func=lambda value: value)
+
+    def _counters(self, host):
+        try:
+            return self._stats[host]
+        except KeyError:
+            counters = ResolverStats()
+            self._stats[host] = counters
+            return counters
+
+    def resolve(self, host):
+        """
+        Get the preferred address of *host* (see :meth:`resolve_all`).
+
+        :param host: host name
+        :return: address
+        :rtype: str
+        """
+        return self.resolve_all(host)[0]
+
+    def resolve_all(self, host):
+        """
+        Get the usable addresses of *host* in order of preference.
+        Addresses are looked up at most once per *ttl* seconds,
+        concurrent lookups of the same name are coalesced and IP address
+        literals are returned as is. If *host* cannot be resolved (or
+        only to scoped addresses) it is returned unchanged and not looked
+        up again for *negative_ttl* seconds.
+
+        :param host: host name
+        :return: addresses
+        :rtype: tuple
+        """
+        if is_ip_address(host):
+            return (host, )
+
+        with self._lock:
+            try:
+                addresses, expires, _ = self._addresses[host]
+                if self._clock() < expires:
+                    self._counters(host).hits += 1
+                    return addresses
+            except KeyError:
+                pass
+
+        return self._flights.do(host, self._lookup, host)
+
+    def _lookup(self, host):
+        started = time.time()
+        try:
+            addresses = usable_addresses(self._resolve_func(host))
+        except socket.error, exc:
+            with self._lock:
+                self._counters(host).failures += 1
+            self.log.warning('%s', "Resolving {!r} failed: {!s}".format(
+                host, exc))
+            return self._remember(host, None)
+        finally:
+            elapsed = time.time() - started
+            with self._lock:
+                counters = self._counters(host)
+                counters.resolutions += 1
+                counters.resolution_time += elapsed
+                counters.last_resolution_time = elapsed
+
+        self.log.debug("{!r} resolved to {!r} in {:.3f}s".format(
+            host, addresses, elapsed))
+        return self._remember(host, addresses)
+
+    def _remember(self, host, addresses):
+        """
+        Cache the result of looking up *host*; an unsuccessful lookup
+        (no *addresses*) is cached for *self.negative_ttl* seconds and
+        resolves to *host* itself.
+        """
+        failed = not addresses
+        if failed:
+            addresses = (host, )
+            ttl = self.negative_ttl
+        else:
+            ttl = self.ttl
+
+        with self._lock:
+            self._addresses[host] = (addresses, self._clock() + ttl, failed)
+        return addresses
+
+    def invalidate(self, host):
+        """
+        Forget the addresses of *host*, e.g. after a connection failure.
+        Failed lookups are kept until their *negative_ttl* expired, since
+        connecting to an unresolved name fails in any case.
+
+        :param host: host name
+        """
+        with self._lock:
+            entry = self._addresses.get(host)
+            if entry is not None and not entry[2]:
+                del self._addresses[host]
+                self._counters(host).invalidations += 1
+
+    def stats(self, host):
+        """
+        Resolver statistics of *host*.
+
+        :param host: host name
+        :return: cache hits, resolutions (including failed ones), failures,
+            invalidations and total/last resolution time in seconds
+        :rtype: dict
+        """
+        with self._lock:
+            return self._counters(host).as_dict()
+
+
+def get_default_resolver():
+    """
+    Get the process wide shared resolver.
+
+    :return: resolver
+    :rtype: CachingResolver
+    """
+    global _DEFAULT_RESOLVER
+
+    with _DEFAULT_RESOLVER_LOCK:
+        if _DEFAULT_RESOLVER is None:
+            _DEFAULT_RESOLVER = CachingResolver()
+        return _DEFAULT_RESOLVER
@@ -0,0 +1,213 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Priority request scheduling.
+----------------------------
+
+Requests to one enigma2 device are admitted by a
+:class:`PriorityScheduler` shared by all controllers talking to it. Each
+API call belongs to a priority class (see
+:func:`enigma2_http_api.ratelimit.budget_for_path`): interactive calls
+like ``zap`` or ``message`` are admitted before any waiting bulk call
+(EPG, movie list, service crawls). Bulk calls may occupy at most
+*bulk_concurrency* of the device's *max_concurrency* request slots, so
+interactive calls find a free slot even while a harvest is running.
+
+A slot is held until the response has been received. For streamed
+calls (``iter_*`` methods) this includes the time the caller spends
+consuming the items before the last chunk is read.
+"""
+import time
+import logging
+import threading
+from collections import deque
+
+from ratelimit import BUDGET_BULK, BUDGET_INTERACTIVE
+
+LOG = logging.getLogger(__name__)
+
+#: priority class of interactive API calls
+PRIORITY_INTERACTIVE = BUDGET_INTERACTIVE
+
+#: priority class of bulk API calls
+PRIORITY_BULK = BUDGET_BULK
+
+#: priority classes, highest priority first
+PRIORITY_ORDER = (PRIORITY_INTERACTIVE, PRIORITY_BULK)
+
+#: default maximum number of concurrent requests per device
+DEFAULT_MAX_CONCURRENCY = 4
+
+#: default maximum number of concurrent bulk requests per device
+DEFAULT_BULK_CONCURRENCY = 3
+
+#: default maximum number of concurrent interactive requests per device
+DEFAULT_INTERACTIVE_CONCURRENCY = 2
+
+_SCHEDULERS = dict()
+_SCHEDULERS_LOCK = threading.Lock()
+
+
+class PriorityScheduler(object):
+    """
+    Thread safe admission of requests by priority class.
+
+    A request is admitted if fewer than *max_concurrency* requests are
+    active, its class is below its cap and no request of a higher
+    priority class is waiting for a slot it could take. Within a class
+    requests are admitted in arrival order.
+
+    >>> scheduler = PriorityScheduler(max_concurrency=2, bulk_concurrency=1)
+    >>> scheduler.acquire(PRIORITY_BULK), scheduler.acquire(PRIORITY_BULK, 0)
+    (True, False)
+    >>> scheduler.acquire(PRIORITY_INTERACTIVE)
+    True
+    """
+
+    def __init__(self, max_concurrency=DEFAULT_MAX_CONCURRENCY,
+                 bulk_concurrency=DEFAULT_BULK_CONCURRENCY,
+                 interactive_concurrency=DEFAULT_INTERACTIVE_CONCURRENCY):
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be positive: {!r}".format(
+                max_concurrency))
+        self.max_concurrency = max_concurrency
+        self.limits = _limits(max_concurrency, bulk_concurrency,
+                              interactive_concurrency)
+        self._condition = threading.Condition(threading.Lock())
+        self._active = dict.fromkeys(PRIORITY_ORDER, 0)
+        self._waiting = dict((x, deque()) for x in PRIORITY_ORDER)
+        self._acquired = dict.fromkeys(PRIORITY_ORDER, 0)
+        self._delayed = dict.fromkeys(PRIORITY_ORDER, 0)
+        self._timeouts = dict.fromkeys(PRIORITY_ORDER, 0)
+        self._waited = dict.fromkeys(PRIORITY_ORDER, 0.0)
+
+    def _has_slot(self, priority):
+        return sum(self._active.values()) < self.max_concurrency and \
+            self._active[priority] < self.limits[priority]
+
+    def _admissible(self, priority, ticket):
+        if self._waiting[priority][0] is not ticket:
+            return False
+        if not self._has_slot(priority):
+            return False
+        for other in PRIORITY_ORDER:
+            if other == priority:
+                return True
+            if self._waiting[other] and self._has_slot(other):
+                return False
+        return True
+
+    def acquire(self, priority, timeout=None):
+        """
+        Wait for a request slot of class *priority*.
+
+        :param priority: priority class, e.g. :data:`PRIORITY_BULK`
+        :param timeout: maximum number of seconds to wait
+        :return: True if a slot was acquired, False on timeout
+        :rtype: bool
+        """
+        ticket = object()
+        started = time.time()
+        with self._condition:
+            self._waiting[priority].append(ticket)
+            delayed = False
+            try:
+                while not self._admissible(priority, ticket):
+                    delayed = True
+                    remaining = None
+                    if timeout is not None:
+                        remaining = timeout - (time.time() - started)
+                        if remaining <= 0:
+                            self._timeouts[priority] += 1
+                            return False
+                    self._condition.wait(remaining)
+            finally:
+                self._waiting[priority].remove(ticket)
+                # the next waiter may have become admissible
+                self._condition.notify_all()
+
+            self._active[priority] += 1
+            self._acquired[priority] += 1
+            if delayed:
+                self._delayed[priority] += 1
+                self._waited[priority] += time.time() - started
+            return True
+
+    def release(self, priority):
+        """
+        Release a request slot of class *priority*.
+
+        :param priority: priority class
+        """
+        with self._condition:
+            self._active[priority] -= 1
+            self._condition.notify_all()
+
+    def stats(self):
+        """
+        Scheduler statistics.
+
+        :return: per priority class: slot limit, active and waiting
+            requests, admitted requests, requests which had to wait,
+            timeouts and total number of seconds waited
+        :rtype: dict
+        """
+        with self._condition:
+            return dict((priority, {
+                'limit': self.limits[priority],
+                'active': self._active[priority],
+                'waiting': len(self._waiting[priority]),
+                'acquired': self._acquired[priority],
+                'delayed': self._delayed[priority],
+                'timeouts': self._timeouts[priority],
+                'waited': self._waited[priority],
+            }) for priority in PRIORITY_ORDER)
+
+
+def _limits(max_concurrency, bulk_concurrency, interactive_concurrency):
+    return {
+        PRIORITY_INTERACTIVE: min(interactive_concurrency or max_concurrency,
+                                  max_concurrency),
+        PRIORITY_BULK: min(bulk_concurrency or max_concurrency,
+                           max_concurrency),
+    }
+
+
+def get_scheduler(name, max_concurrency=DEFAULT_MAX_CONCURRENCY,
+                  bulk_concurrency=DEFAULT_BULK_CONCURRENCY,
+                  interactive_concurrency=DEFAULT_INTERACTIVE_CONCURRENCY):
+    """
+    Get the process wide scheduler of device *name* (usually the
+    controller's *remote_addr*), creating it if needed. The limits of
+    the first caller are used, callers asking for different ones are
+    warned about.
+
+    :param name: device name
+    :param max_concurrency: maximum number of concurrent requests
+    :param bulk_concurrency: maximum number of concurrent bulk requests
+    :param interactive_concurrency: maximum number of concurrent
+        interactive requests
+    :return: scheduler
+    :rtype: PriorityScheduler
+    """
+    with _SCHEDULERS_LOCK:
+        try:
+            scheduler = _SCHEDULERS[name]
+        except KeyError:
+            scheduler = PriorityScheduler(
+                max_concurrency=max_concurrency,
+                bulk_concurrency=bulk_concurrency,
+                interactive_concurrency=interactive_concurrency)
+            _SCHEDULERS[name] = scheduler
+            return scheduler
+
+    limits = _limits(max_concurrency, bulk_concurrency,
+                     interactive_concurrency)
+    if (max_concurrency, limits) != (scheduler.max_concurrency,
+                                     scheduler.limits):
+        LOG.warning('%s', "Scheduler of {!r} already uses "
+                          "max_concurrency {:d} limits {!r}, ignoring "
+                          "max_concurrency {:d} limits {!r}".format(
+                              name, scheduler.max_concurrency,
+                              scheduler.limits, max_concurrency, limits))
+    return scheduler
@@ -0,0 +1,147 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Incremental JSON decoding.
+--------------------------
+
+Decode the items of one array of a JSON object (e.g. the *events* of an
+EPG response) while the response body is still being received, without
+keeping the whole body or the whole decoded document in memory.
+"""
+import json
+import codecs
+
+#: number of bytes read from a streamed response at once
+STREAM_CHUNK_SIZE = 64 * 1024
+
+_WHITESPACE = u' \t\n\r'
+
+
+class _ArrayLocator(object):
+    """
+    Scan the top level object of a JSON document for the array value of
+    *key*. Scanning may be resumed once more data is available.
+    """
+
+    def __init__(self, key):
+        self.key = key
+        self.depth = 0
+        self.last_string = None
+        self.current_key = None
+
+    def feed(self, buf, pos):
+        """
+        Continue scanning *buf* at *pos*.
+
+        :return: tuple of (found, position to continue at)
+        """
+        length = len(buf)
+
+        while pos < length:
+            char = buf[pos]
+
+            if char == u'"':
+                end = pos + 1
+                while True:
+                    end = buf.find(u'"', end)
+                    if end == -1:
+                        return False, pos
+                    backslashes = 0
+                    while buf[end - 1 - backslashes] == u'\\':
+                        backslashes += 1
+                    if backslashes % 2 == 0:
+                        break
+                    end += 1
+
+                if self.depth == 1:
+                    self.last_string = json.loads(buf[pos:end + 1])
+                pos = end + 1
+                continue
+
+            if self.depth == 1:
+                if char == u':':
+                    self.current_key = self.last_string
+                elif char == u',':
+                    self.current_key = None
+                elif char == u'[' and self.current_key == self.key:
+                    return True, pos + 1
+
+            if char in u'[{':
+                self.depth += 1
+            elif char in u']}':
+                self.depth -= 1
+
+            pos += 1
+
+        return False, pos
+
+
+def iter_json_array(chunks, key, encoding='utf-8'):
+    """
+    Yield the decoded items of the array stored as *key* in the top level
+    JSON object delivered by *chunks*.
+
+    :param chunks: iterable of (byte) strings, e.g.
+        :meth:`requests.Response.iter_content`
+    :param key: key of the array of interest
+    :param encoding: character encoding of *chunks*
+    :return: generator of decoded items
+
+    >>> doc = '{"result": true, "x": {"events": [0]}, "events": [{"id": 1}, {"id": 2}]}'
+    >>> [x['id'] for x in iter_json_array((doc[i:i + 5] for i in range(0, len(doc), 5)), 'events')]
+    [1, 2]
+    >>> list(iter_json_array(['{"result": false}'], 'events'))
+    []
+    """
+    decoder = codecs.getincrementaldecoder(encoding)()
+    json_decoder = json.JSONDecoder()
+    locator = _ArrayLocator(key)
+    chunks = iter(chunks)
+    buf = u''
+    pos = 0
+    found = False
+    exhausted = False
+
+    while True:
+        if found:
+            while pos < len(buf) and buf[pos] in _WHITESPACE + u',':
+                pos += 1
+
+            if pos < len(buf):
+                if buf[pos] == u']':
+                    return
+                try:
+                    item, end = json_decoder.raw_decode(buf, pos)
+                except ValueError:
+                    if exhausted:
+                        raise
+                else:
+                    # a delimiter must follow or e.g. numbers may be
+                    # truncated at the end of the buffer
+                    if exhausted or (
+                            end < len(buf) and
+                            buf[end] in _WHITESPACE + u',]'):
+                        yield item
+                        pos = end
+                        continue
+            elif exhausted:
+                raise ValueError(
+                    "Unterminated array {!r} in JSON data".format(key))
+        else:
+            found, pos = locator.feed(buf, pos)
+            if found:
+                continue
+            if exhausted:
+                return
+
+        try:
+            chunk = next(chunks)
+        except StopIteration:
+            buf += decoder.decode('', final=True)
+            exhausted = True
+            continue
+
+        if pos:
+            buf = buf[pos:]
+            pos = 0
+        buf += decoder.decode(chunk)
@@ -0,0 +1,117 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Request trace log.
+------------------
+
+Append-only JSON lines log of API calls (see *trace_log* of
+:class:`enigma2_http_api.controller.Enigma2APIController`). Each line
+holds one call's correlation ID, device, path, parameters, HTTP status,
+byte counts and the durations (seconds) of its phases:
+
+* ``connect``: establishing a new connection (null if a pooled
+  connection was reused)
+* ``ttfb``: waiting for the response headers
+* ``download``: receiving the response body; for streamed responses
+  this includes decoding
+* ``decode``: decoding the JSON response
+* ``models``: constructing :class:`enigma2_http_api.model.EEvent` items
+
+Phases which did not take place are null, e.g. for calls answered by
+the response cache. Lines are written by a background thread, at most
+*queue_size* lines are buffered. The log is rotated after *max_bytes*
+bytes keeping *backup_count* old logs (``trace.jsonl.1``, ...).
+"""
+import os
+
+from dumpwriter import DumpWriter
+
+#: default number of bytes a trace log is rotated after
+DEFAULT_TRACE_MAX_BYTES = 16 * 1024 * 1024
+
+#: default number of rotated trace logs kept
+DEFAULT_TRACE_BACKUP_COUNT = 3
+
+#: phases of an API call accounted in trace lines
+TRACE_PHASES = ('connect', 'ttfb', 'download', 'decode', 'models')
+
+
+class TraceLog(DumpWriter):
+    """
+    Rotating JSON lines log *filename* of trace records (dicts).
+    """
+
+    def __init__(self, filename, json_backend,
+                 max_bytes=DEFAULT_TRACE_MAX_BYTES,
+                 backup_count=DEFAULT_TRACE_BACKUP_COUNT, **kwargs):
+        self.filename = filename
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.rotations = 0
+        self._target = None
+        self._size = 0
+        DumpWriter.__init__(self, json_backend, **kwargs)
+
+    def _open(self):
+        self._target = open(self.filename, "ab")
+        try:
+            self._size = os.path.getsize(self.filename)
+        except OSError:
+            self._size = 0
+
+    def _rotate(self):
+        self.finish()
+        for index in range(self.backup_count - 1, 0, -1):
+            source = '{:s}.{:d}'.format(self.filename, index)
+            if os.path.exists(source):
+                os.rename(source, '{:s}.{:d}'.format(self.filename,
+                                                     index + 1))
+        if self.backup_count > 0:
+            os.rename(self.filename, self.filename + '.1')
+        else:
+            os.remove(self.filename)
+        self.rotations += 1
+        self._open()
+
+    def write(self, record):
+        line = self.json.dumps(record)
+        if isinstance(line, unicode):
+            line = line.encode('utf-8')
+        line += '\n'
+
+        if self._target is None:
+            self._open()
+        if self.max_bytes and self._size and \
+                self._size + len(line) > self.max_bytes:
+            self._rotate()
+
+        self._target.write(line)
+        self._size += len(line)
+        # lines are buffered while more are pending
+        if self._queue.empty():
+            self._target.flush()
+
+    def finish(self):
+        if self._target is not None:
+            self._target.close()
+            self._target = None
+
+    def stats(self):
+        result = DumpWriter.stats(self)
+        result['rotations'] = self.rotations
+        return result
+
+
+def iter_trace(filename, json_backend):
+    """
+    Read the records of trace log *filename*.
+
+    :param filename: trace log filename
+    :param json_backend: :class:`enigma2_http_api.jsonbackend.JSONBackend`
+        or module providing *loads*
+    :return: generator of dicts
+    """
+    with open(filename, "rb") as source:
+        for line in source:
+            if line.strip():
+                yield json_backend.loads(line)
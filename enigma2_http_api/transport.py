@@ -0,0 +1,174 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+HTTP transport helpers.
+-----------------------
+
+Pooled keep-alive :class:`requests.Session` instances which keep track of
+how many requests could be served over an already established connection
+and how long establishing new connections took.
+"""
+import time
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.packages.urllib3.connectionpool import HTTPConnectionPool
+from requests.packages.urllib3.connectionpool import HTTPSConnectionPool
+from requests.packages.urllib3.response import HTTPResponse
+
+#: default number of keep-alive connections kept per host
+DEFAULT_POOL_SIZE = 10
+
+#: default number of per-host connection pools
+DEFAULT_POOL_CONNECTIONS = 4
+
+#: content codings accepted if compression is enabled
+ACCEPT_ENCODING_COMPRESSED = 'gzip, deflate'
+
+#: content coding accepted if compression is disabled
+ACCEPT_ENCODING_IDENTITY = 'identity'
+
+
+class ConnectionStats(object):
+    """
+    Thread safe counter of HTTP requests versus newly established
+    connections.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.requests = 0
+        self.connects = 0
+        self.connect_time = 0.0
+
+    def count_request(self):
+        with self._lock:
+            self.requests += 1
+
+    def count_connect(self, duration=0.0):
+        with self._lock:
+            self.connects += 1
+            self.connect_time += duration
+        self._local.connect_time = (getattr(
+            self._local, 'connect_time', None) or 0.0) + duration
+
+    def pop_connect_time(self):
+        """
+        Time the current thread spent connecting since the last call.
+
+        :return: seconds or None if no connection was established
+        :rtype: float
+        """
+        duration = getattr(self._local, 'connect_time', None)
+        self._local.connect_time = None
+        return duration
+
+    def as_dict(self):
+        """
+        Current counter values.
+
+        :return: requests, new connects, reused connections and total
+            connect time in seconds
+        :rtype: dict
+
+        >>> stats = ConnectionStats()
+        >>> for x in range(3):
+        ...     stats.count_request()
+        >>> stats.count_connect()
+        >>> sorted(stats.as_dict().items())[1:]
+        [('connects', 1), ('requests', 3), ('reused', 2)]
+        """
+        with self._lock:
+            return {
+                'requests': self.requests,
+                'connects': self.connects,
+                'reused': max(0, self.requests - self.connects),
+                'connect_time': self.connect_time,
+            }
+
+
+class CountingHTTPResponse(HTTPResponse):
+    """
+    :class:`urllib3.response.HTTPResponse` counting the body bytes
+    received before content decoding in *wire_bytes*. Unlike
+    :meth:`tell` this includes chunked responses.
+    """
+    wire_bytes = 0
+
+    def _decode(self, data, decode_content, flush_decoder):
+        self.wire_bytes += len(data)
+        return HTTPResponse._decode(self, data, decode_content, flush_decoder)
+
+
+def _counting_pool_class(pool_class, stats):
+    """
+    Create a subclass of *pool_class* whose connections report each new
+    connect and its duration to *stats* and whose responses are
+    :class:`CountingHTTPResponse` instances.
+    """
+    base_connection_class = pool_class.ConnectionCls
+
+    def connect(self):
+        started = time.time()
+        try:
+            return base_connection_class.connect(self)
+        finally:
+            stats.count_connect(time.time() - started)
+
+    connection_class = type(
+        'Counting' + base_connection_class.__name__,
+        (base_connection_class,), {'connect': connect})
+
+    return type('Counting' + pool_class.__name__, (pool_class,),
+                {'ConnectionCls': connection_class,
+                 'ResponseCls': CountingHTTPResponse})
+
+
+class PooledHTTPAdapter(HTTPAdapter):
+    """
+    :class:`requests.adapters.HTTPAdapter` keeping track of connection
+    reuse in *self.stats*.
+    """
+
+    def __init__(self, *args, **kwargs):
+        self.stats = kwargs.pop("stats", None) or ConnectionStats()
+        HTTPAdapter.__init__(self, *args, **kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        HTTPAdapter.init_poolmanager(self, *args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            'http': _counting_pool_class(HTTPConnectionPool, self.stats),
+            'https': _counting_pool_class(HTTPSConnectionPool, self.stats),
+        }
+
+    def send(self, request, **kwargs):
+        self.stats.count_request()
+        return HTTPAdapter.send(self, request, **kwargs)
+
+
+def create_session(pool_size=DEFAULT_POOL_SIZE,
+                   pool_connections=DEFAULT_POOL_CONNECTIONS, stats=None,
+                   compression=True):
+    """
+    Create a keep-alive :class:`requests.Session` backed by a
+    :class:`PooledHTTPAdapter`.
+
+    :param pool_size: maximum number of connections kept per host
+    :param pool_connections: number of per-host pools
+    :param stats: :class:`ConnectionStats` instance to be used
+    :param compression: request compressed responses
+    :return: session
+    :rtype: requests.Session
+    """
+    session = requests.Session()
+    if compression:
+        session.headers['Accept-Encoding'] = ACCEPT_ENCODING_COMPRESSED
+    else:
+        session.headers['Accept-Encoding'] = ACCEPT_ENCODING_IDENTITY
+    adapter = PooledHTTPAdapter(pool_connections=pool_connections,
+                                pool_maxsize=pool_size, stats=stats)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
@@ -0,0 +1,226 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Response cache warming.
+-----------------------
+
+A :class:`CacheWarmer` refreshes configured datasets of a controller's
+response cache in the background before they expire, so foreground
+calls like :meth:`get_getallservices` are served from memory.
+
+Each dataset has its own refresh interval. First refreshes are spread
+over *start_spread* seconds and each following refresh is scheduled
+with up to *jitter* (fraction of the interval) random deviation, so the
+refreshes of several datasets and of the devices of a fleet do not
+happen in lockstep.
+
+.. code::
+
+    eac = Enigma2APIController(
+        remote_addr='enigma2.local', cache_ttl=True,
+        warm_datasets=DEFAULT_WARM_DATASETS + now_next_datasets(
+            [bouquet_ref]))
+    ...
+    eac.close()
+"""
+import time
+import heapq
+import random
+import logging
+import threading
+from collections import namedtuple
+
+#: dataset kept warm: API *path*, URL *params* and refresh *interval*
+#: (seconds)
+WarmDataset = namedtuple('WarmDataset', ['path', 'params', 'interval'])
+
+#: default datasets kept warm
+DEFAULT_WARM_DATASETS = (
+    WarmDataset('getallservices', None, 240),
+    WarmDataset('timerlist', None, 20),
+)
+
+#: default refresh interval (seconds) of now/next EPG datasets
+DEFAULT_NOW_NEXT_INTERVAL = 45
+
+#: default random deviation of refresh intervals (fraction)
+DEFAULT_WARM_JITTER = 0.1
+
+#: default number of seconds the first refreshes are spread over
+DEFAULT_START_SPREAD = 5.0
+
+#: cache time to live of a dataset as multiple of its refresh interval
+TTL_FACTOR = 2
+
+
+def now_next_datasets(bouquet_refs, interval=DEFAULT_NOW_NEXT_INTERVAL):
+    """
+    Now/next EPG datasets of *bouquet_refs*.
+
+    :param bouquet_refs: bouquet references
+    :param interval: refresh interval
+    :return: datasets
+    :rtype: tuple
+
+    >>> [x.path for x in now_next_datasets(['1:7:1:0:0:0:0:0:0:0:'])]
+    ['epgnow', 'epgnext']
+    """
+    datasets = list()
+    for bouquet_ref in bouquet_refs:
+        for path in ('epgnow', 'epgnext'):
+            datasets.append(WarmDataset(path, {'bRef': bouquet_ref},
+                                        interval))
+    return tuple(datasets)
+
+
+class _DatasetStats(object):
+    def __init__(self):
+        self.refreshes = 0
+        self.failures = 0
+        self.last_refresh = None
+        self.last_duration = None
+        self.last_error = None
+        self.next_refresh = None
+
+    def as_dict(self):
+        return {
+            'refreshes': self.refreshes,
+            'failures': self.failures,
+            'last_refresh': self.last_refresh,
+            'last_duration': self.last_duration,
+            'last_error': self.last_error,
+            'next_refresh': self.next_refresh,
+        }
+
+
+class CacheWarmer(object):
+    """
+    Background thread refreshing *datasets* (:data:`WarmDataset` items)
+    of *controller*'s response cache one at a time. The cache time to
+    live of each dataset is raised to :data:`TTL_FACTOR` times its
+    interval so that it does not expire between two refreshes.
+
+    :param controller: controller with response cache
+    :param datasets: datasets to be kept warm
+    :param jitter: random deviation of refresh intervals (fraction)
+    :param start_spread: number of seconds the first refreshes are
+        spread over
+    :param rng: random number generator
+    :raises ValueError: if *controller* does not cache responses
+    """
+
+    def __init__(self, controller, datasets=DEFAULT_WARM_DATASETS,
+                 jitter=DEFAULT_WARM_JITTER, start_spread=DEFAULT_START_SPREAD,
+                 rng=None):
+        if controller.cache is None:
+            raise ValueError("cache warming requires a response cache")
+
+        self.log = logging.getLogger(__name__)
+        self.controller = controller
+        self.datasets = tuple(datasets)
+        self.jitter = jitter
+        self.start_spread = start_spread
+        self._rng = rng or random.Random()
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread = None
+        self._stats = [_DatasetStats() for _ in self.datasets]
+
+        for dataset in self.datasets:
+            controller.cache.ttl[dataset.path] = max(
+                controller.cache.ttl.get(dataset.path, 0),
+                dataset.interval * TTL_FACTOR)
+
+    def _next_delay(self, dataset):
+        return dataset.interval * (
+            1.0 + self._rng.uniform(-self.jitter, self.jitter))
+
+    def start(self):
+        """
+        Start refreshing in a background thread.
+
+        :return: *self*
+        """
+        self._thread = threading.Thread(
+            target=self._run,
+            name='eha-warmer-{:s}'.format(self.controller.remote_addr))
+        self._thread.daemon = True
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """
+        Stop refreshing and wait for a running refresh to finish.
+        """
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        now = time.time()
+        schedule = list()
+        for index, dataset in enumerate(self.datasets):
+            due = now + self._rng.uniform(0, self.start_spread)
+            self._stats[index].next_refresh = due
+            schedule.append((due, index))
+        heapq.heapify(schedule)
+
+        while schedule:
+            due, index = schedule[0]
+            if self._stopped.wait(max(0.0, due - time.time())) or \
+                    self._stopped.is_set():
+                return
+
+            heapq.heappop(schedule)
+            self.refresh(index)
+            due = time.time() + self._next_delay(self.datasets[index])
+            with self._lock:
+                self._stats[index].next_refresh = due
+            heapq.heappush(schedule, (due, index))
+
+    def refresh(self, index):
+        """
+        Refresh dataset *index* now.
+
+        :param index: index of the dataset in *self.datasets*
+        :return: True if the dataset was refreshed
+        :rtype: bool
+        """
+        dataset = self.datasets[index]
+        started = time.time()
+        try:
+            self.controller.refresh_cache(dataset.path, dataset.params,
+                                          deadline=dataset.interval)
+        except Exception, exc:
+            self.log.warning('%s', "Refreshing {:s} {!r} failed: {!r}".format(
+                dataset.path, dataset.params, exc))
+            with self._lock:
+                self._stats[index].failures += 1
+                self._stats[index].last_error = repr(exc)
+            return False
+
+        with self._lock:
+            stats = self._stats[index]
+            stats.refreshes += 1
+            stats.last_refresh = started
+            stats.last_duration = time.time() - started
+            stats.last_error = None
+        return True
+
+    def stats(self):
+        """
+        Cache warming statistics.
+
+        :return: list of dicts containing path, params, interval, number
+            of refreshes and failures, start time and duration of the last
+            refresh, last error and time of the next refresh per dataset
+        :rtype: list
+        """
+        with self._lock:
+            result = list()
+            for dataset, stats in zip(self.datasets, self._stats):
+                item = stats.as_dict()
+                item.update(dataset._asdict())
+                result.append(item)
+            return result
@@ -0,0 +1,377 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Legacy XML web interface.
+-------------------------
+
+Older images only provide the ``/web/*`` XML interface. Its responses
+are parsed incrementally (elements are discarded as soon as they have
+been converted) into the same dicts the ``/api/*`` JSON interface
+returns, so memory consumption does not depend on the size of an EPG
+response.
+
+See *backend* of
+:class:`enigma2_http_api.controller.Enigma2APIController`.
+"""
+import time
+from xml.sax.saxutils import escape
+
+try:
+    import xml.etree.cElementTree as ElementTree
+except ImportError:  # pragma: no cover
+    import xml.etree.ElementTree as ElementTree
+
+#: controller backend using the ``/api/*`` JSON interface
+BACKEND_API = 'api'
+
+#: controller backend using the legacy ``/web/*`` XML interface
+BACKEND_WEB = 'web'
+
+#: weekday abbreviations as used in EPG datasets
+WEEKDAYS = ('Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun')
+
+
+def _text(value):
+    if value is None:
+        return u''
+    if isinstance(value, str):
+        return value.decode('utf-8')
+    return value
+
+
+def _int(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        pass
+    try:
+        return int(float(value))
+    except (TypeError, ValueError):
+        return None
+
+
+def _bool(value):
+    return _text(value).strip().lower() == u'true'
+
+
+def event_date(timestamp):
+    """
+    Format *timestamp* like the *date* of EPG datasets.
+
+    :param timestamp: UNIX timestamp
+    :return: e.g. ``'Sun 17.09.2017'`` (local time)
+    """
+    local = time.localtime(timestamp)
+    return '{:s} {:s}'.format(WEEKDAYS[local.tm_wday],
+                              time.strftime('%d.%m.%Y', local))
+
+
+def _complete_event(item):
+    """
+    Add the derived keys of ``/api`` EPG datasets.
+    """
+    begin = item.get('begin_timestamp')
+    duration = item.get('duration_sec')
+    if begin is None:
+        return item
+
+    item['date'] = event_date(begin)
+    item['begin'] = time.strftime('%H:%M', time.localtime(begin))
+    if duration is not None:
+        item['end'] = time.strftime('%H:%M', time.localtime(begin + duration))
+        item['duration'] = duration // 60
+    return item
+
+
+class _ChunkReader(object):
+    """
+    File like object reading from an iterable of byte strings.
+    """
+
+    def __init__(self, chunks):
+        self._chunks = iter(chunks)
+        self._buffer = ''
+
+    def read(self, size=-1):
+        while size < 0 or len(self._buffer) < size:
+            try:
+                self._buffer += next(self._chunks)
+            except StopIteration:
+                break
+        if size < 0:
+            size = len(self._buffer)
+        data, self._buffer = self._buffer[:size], self._buffer[size:]
+        return data
+
+
+class WebCall(object):
+    """
+    Mapping of ``/web/<path>`` XML responses to ``/api/<path>`` dicts.
+
+    *item_tag* elements are converted to dicts using *fields*, a mapping
+    of XML tag to tuple of (key, converter). Nested *children* (a
+    :class:`WebCall`) are collected as list *children.array_key* of their
+    parent item. *complete* may add derived keys to each item. Responses
+    of list calls (*array_key* given) are wrapped as
+    ``{'result': True, array_key: [...]}``, the single item of other
+    calls is returned as is unless *wrap_key* is set.
+    """
+
+    def __init__(self, root_tag, item_tag, fields, array_key=None,
+                 children=None, wrap_key=None, defaults=None,
+                 complete=None):
+        self.root_tag = root_tag
+        self.item_tag = item_tag
+        self.fields = fields
+        self.array_key = array_key
+        self.children = children
+        self.wrap_key = wrap_key
+        self.defaults = defaults or dict()
+        self.complete = complete
+
+    def iter_items(self, chunks):
+        """
+        Incrementally parse an XML document.
+
+        :param chunks: iterable of byte strings
+        :return: generator of item dicts
+        """
+        children = self.children
+        item = None
+        child = None
+        root = None
+
+        for event, elem in ElementTree.iterparse(_ChunkReader(chunks),
+                                                 events=('start', 'end')):
+            tag = elem.tag
+            if event == 'start':
+                if root is None:
+                    root = elem
+                if tag == self.item_tag:
+                    item = dict(self.defaults)
+                    if children is not None:
+                        item[children.array_key] = list()
+                elif children is not None and tag == children.item_tag and (
+                        item is not None):
+                    child = dict(children.defaults)
+                continue
+
+            if child is not None and tag == children.item_tag:
+                item[children.array_key].append(child)
+                child = None
+            elif item is not None and tag == self.item_tag:
+                if self.complete is not None:
+                    item = self.complete(item)
+                yield item
+                item = None
+                root.clear()
+            else:
+                target, fields = item, self.fields
+                if child is not None:
+                    target, fields = child, children.fields
+                if target is not None and tag in fields:
+                    (key, converter) = fields[tag]
+                    target[key] = converter(elem.text)
+                    elem.clear()
+
+    def decode(self, chunks):
+        """
+        Parse an XML document.
+
+        :param chunks: iterable of byte strings
+        :return: dict as returned by ``/api/<path>``
+        :rtype: dict
+        """
+        if self.array_key:
+            return {'result': True,
+                    self.array_key: list(self.iter_items(chunks))}
+
+        result = dict(self.defaults)
+        for item in self.iter_items(chunks):
+            result = item
+            break
+        if self.wrap_key:
+            return {self.wrap_key: result}
+        return result
+
+    def _render_item(self, item):
+        parts = list()
+        for tag, (key, converter) in sorted(self.fields.items()):
+            value = item.get(key)
+            if value is None:
+                value = u''
+            elif converter is _bool:
+                value = bool(value)
+            parts.append(u'<{0:s}>{1:s}</{0:s}>'.format(
+                tag, escape(_text(unicode(value)))))
+
+        children = self.children
+        if children is not None:
+            parts.append(u'<{0:s}>{1:s}</{0:s}>'.format(
+                children.root_tag, u''.join(
+                    children._render_item(x) for x in
+                    item.get(children.array_key, []))))
+        return u'<{0:s}>{1:s}</{0:s}>'.format(self.item_tag, u''.join(parts))
+
+    def render(self, data):
+        """
+        Render ``/api/<path>`` dict *data* as XML document (used by
+        :mod:`enigma2_http_api.fakebox`).
+
+        :param data: decoded JSON response
+        :return: UTF-8 encoded XML document
+        :rtype: str
+        """
+        if self.array_key:
+            items = data.get(self.array_key, [])
+        elif self.wrap_key:
+            items = [data.get(self.wrap_key, dict())]
+        else:
+            items = [data]
+
+        body = u''.join(self._render_item(x) for x in items)
+        if self.root_tag != self.item_tag:
+            body = u'<{0:s}>{1:s}</{0:s}>'.format(self.root_tag, body)
+        return (u'<?xml version="1.0" encoding="UTF-8"?>\n' + body).encode(
+            'utf-8')
+
+
+SERVICE_FIELDS = {
+    'e2servicereference': ('servicereference', _text),
+    'e2servicename': ('servicename', _text),
+}
+
+EVENT_FIELDS = {
+    'e2eventid': ('id', _int),
+    'e2eventstart': ('begin_timestamp', _int),
+    'e2eventduration': ('duration_sec', _int),
+    'e2eventcurrenttime': ('now_timestamp', _int),
+    'e2eventtitle': ('title', _text),
+    'e2eventdescription': ('shortdesc', _text),
+    'e2eventdescriptionextended': ('longdesc', _text),
+    'e2eventservicereference': ('sref', _text),
+    'e2eventservicename': ('sname', _text),
+}
+
+TIMER_FIELDS = {
+    'e2servicereference': ('serviceref', _text),
+    'e2servicename': ('servicename', _text),
+    'e2eit': ('eit', _int),
+    'e2name': ('name', _text),
+    'e2description': ('description', _text),
+    'e2descriptionextended': ('descriptionextended', _text),
+    'e2disabled': ('disabled', _int),
+    'e2timebegin': ('begin', _int),
+    'e2timeend': ('end', _int),
+    'e2duration': ('duration', _int),
+    'e2startprepare': ('startprepare', _int),
+    'e2justplay': ('justplay', _int),
+    'e2afterevent': ('afterevent', _int),
+    'e2location': ('dirname', _text),
+    'e2tags': ('tags', _text),
+    'e2state': ('state', _int),
+    'e2repeated': ('repeated', _int),
+}
+
+MOVIE_FIELDS = {
+    'e2servicereference': ('serviceref', _text),
+    'e2title': ('eventname', _text),
+    'e2description': ('description', _text),
+    'e2descriptionextended': ('descriptionExtended', _text),
+    'e2servicename': ('servicename', _text),
+    'e2time': ('recordingtime', _int),
+    'e2length': ('length', _text),
+    'e2tags': ('tags', _text),
+    'e2filename': ('filename', _text),
+    'e2filesize': ('filesize', _int),
+}
+
+SIMPLE_RESULT_FIELDS = {
+    'e2state': ('result', _bool),
+    'e2statetext': ('message', _text),
+}
+
+_SERVICES = WebCall('e2servicelist', 'e2service', SERVICE_FIELDS,
+                    array_key='services')
+_EVENTS = WebCall('e2eventlist', 'e2event', EVENT_FIELDS, array_key='events',
+                  complete=_complete_event)
+_SIMPLE_RESULT = WebCall('e2simplexmlresult', 'e2simplexmlresult',
+                         SIMPLE_RESULT_FIELDS)
+
+#: ``/web`` API calls by path
+WEB_CALLS = {
+    'about': WebCall(
+        'e2abouts', 'e2about', {
+            'e2enigmaversion': ('enigmaver', _text),
+            'e2imageversion': ('imagever', _text),
+            'e2webifversion': ('webifver', _text),
+            'e2model': ('model', _text),
+        },
+        children=WebCall('e2tunerinfo', 'e2nim', {
+            'name': ('name', _text),
+            'type': ('type', _text),
+        }, array_key='tuners'),
+        wrap_key='info'),
+    'getallservices': WebCall(
+        'e2servicelistrecursive', 'e2bouquet', SERVICE_FIELDS,
+        array_key='services',
+        children=WebCall('e2servicelist', 'e2service', SERVICE_FIELDS,
+                         array_key='subservices')),
+    'getservices': _SERVICES,
+    'subservices': _SERVICES,
+    'epgservice': _EVENTS,
+    'epgbouquet': _EVENTS,
+    'epgsearch': _EVENTS,
+    'epgnow': _EVENTS,
+    'epgnext': _EVENTS,
+    'timerlist': WebCall('e2timerlist', 'e2timer', TIMER_FIELDS,
+                         array_key='timers'),
+    'movielist': WebCall('e2movielist', 'e2movie', MOVIE_FIELDS,
+                         array_key='movies'),
+    'powerstate': WebCall('e2powerstate', 'e2powerstate', {
+        'e2instandby': ('instandby', _bool),
+    }, defaults={'result': True}),
+    'vol': WebCall('e2volume', 'e2volume', {
+        'e2result': ('result', _bool),
+        'e2resulttext': ('message', _text),
+        'e2current': ('current', _int),
+        'e2ismuted': ('ismute', _bool),
+    }),
+    'message': _SIMPLE_RESULT,
+    'messageanswer': _SIMPLE_RESULT,
+    'moviedelete': _SIMPLE_RESULT,
+    'timeradd': _SIMPLE_RESULT,
+    'timeraddbyeventid': _SIMPLE_RESULT,
+    'timerdelete': _SIMPLE_RESULT,
+    'zap': _SIMPLE_RESULT,
+}
+
+
+class UnsupportedWebCall(ValueError):
+    """
+    Raised for API calls lacking a ``/web`` mapping.
+    """
+    pass
+
+
+def get_web_call(path):
+    """
+    Get the ``/web`` mapping of API call *path*.
+
+    :param path: API path
+    :return: mapping
+    :rtype: WebCall
+    :raises UnsupportedWebCall: if there is no mapping
+
+    >>> events = get_web_call('epgservice')
+    >>> document = events.render({'events': [{'id': 1, 'title': u'Tatort',
+    ...     'begin_timestamp': 1505653200, 'duration_sec': 3900}]})
+    >>> event = events.decode([document])['events'][0]
+    >>> event['id'], event['title'], event['duration_sec']
+    (1, u'Tatort', 3900)
+    """
+    try:
+        return WEB_CALLS[path]
+    except KeyError:
+        raise UnsupportedWebCall(
+            "API call {!r} is not supported by the /web backend".format(path))
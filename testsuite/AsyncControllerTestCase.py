@@ -0,0 +1,86 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+import sys
+import time
+import unittest
+
+sys.path.insert(0, '..')
+
+from enigma2_http_api.async_controller import AsyncEnigma2APIController
+from enigma2_http_api.async_controller import Dispatcher, gather
+from enigma2_http_api.async_controller import ASYNC_API_CALLS
+from enigma2_http_api.controller import Enigma2APIController
+
+
+class SlowController(object):
+    def __init__(self, timers, latency=0.2):
+        self.timers = timers
+        self.latency = latency
+
+    def get_timerlist(self):
+        time.sleep(self.latency)
+        return ['timer {:d}'.format(x) for x in range(self.timers)]
+
+    def get_services(self):
+        time.sleep(self.latency)
+        return [('Favourites', 'bouquet-ref')]
+
+    def get_about(self):
+        raise ValueError("about failed")
+
+
+class AsyncControllerTestCase(unittest.TestCase):
+    def _controllers(self, dispatcher):
+        return [AsyncEnigma2APIController(controller=SlowController(x + 1),
+                                          dispatcher=dispatcher)
+                for x in range(2)]
+
+    def testFanOut(self):
+        dispatcher = Dispatcher(workers=4)
+        controllers = self._controllers(dispatcher)
+        started = time.time()
+        pending = list()
+        for eac in controllers:
+            pending.append(eac.get_timerlist())
+            pending.append(eac.get_services())
+        results = gather(pending, timeout=5)
+        elapsed = time.time() - started
+        dispatcher.close()
+
+        self.assertTrue(elapsed < 0.6, elapsed)
+        self.assertEqual([1, 2], [len(x) for x in results[::2]])
+        self.assertEqual(controllers[0].controller.get_services(), results[1])
+
+    def testBoundedWorkers(self):
+        dispatcher = Dispatcher(workers=1)
+        controllers = self._controllers(dispatcher)
+        started = time.time()
+        gather([eac.get_timerlist() for eac in controllers], timeout=5)
+        self.assertTrue(time.time() - started >= 0.4)
+        dispatcher.close()
+
+    def testErrorsArePropagated(self):
+        dispatcher = Dispatcher(workers=2)
+        (eac, _) = self._controllers(dispatcher)
+        self.assertRaises(ValueError, eac.get_about().get, 5)
+        self.assertEqual(1, eac.submit(len, 'x').get(5))
+        dispatcher.close()
+
+    def testDryRun(self):
+        dispatcher = Dispatcher(workers=1)
+        eac = AsyncEnigma2APIController(remote_addr='127.0.0.1',
+                                        dry_run=True, dispatcher=dispatcher)
+        ref = '1:0:19:7C:6:85:FFFF0000:0:0:0:'
+        self.assertEqual(ref, eac.get_zap(ref).get(5))
+        self.assertEqual(0, eac.get_connection_stats()['requests'])
+        dispatcher.close()
+
+    def testAPICalls(self):
+        for name in ASYNC_API_CALLS:
+            self.assertTrue(callable(getattr(Enigma2APIController, name)),
+                            name)
+        self.assertFalse('get_connection_stats' in ASYNC_API_CALLS)
+
+
+if __name__ == '__main__':
+    unittest.main()
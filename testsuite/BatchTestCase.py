@@ -0,0 +1,92 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+import sys
+import time
+import threading
+import unittest
+
+sys.path.insert(0, '..')
+
+from enigma2_http_api.controller import Enigma2APIController
+from enigma2_http_api.resilience import Deadline
+
+RESPONSES = {
+    'about': {'info': {'brand': 'Stub'}},
+    'timerlist': {'timers': ['timer 1', 'timer 2']},
+    'getservices': {'services': ['service 1', 'service 2', 'service 3']},
+}
+
+
+class BatchTestCase(unittest.TestCase):
+    def setUp(self):
+        self.lock = threading.Lock()
+        self.active = 0
+        self.max_active = 0
+        self.calls = list()
+        self.eac = Enigma2APIController(remote_addr='127.0.0.1')
+        self.eac._apicall = self._apicall
+
+    def _apicall(self, path, **kwargs):
+        with self.lock:
+            self.calls.append((path, kwargs))
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        try:
+            time.sleep(0.05)
+            rv = RESPONSES[path]
+            if kwargs.get('filter_key'):
+                rv = rv[kwargs['filter_key']]
+            return rv
+        finally:
+            with self.lock:
+                self.active -= 1
+
+    def testOrder(self):
+        bouquet_refs = ['bouquet-ref-{:d}'.format(x) for x in range(2)]
+        specs = [('getservices', {'sRef': x}, 'services')
+                 for x in bouquet_refs] + [('timerlist', None, 'timers'),
+                                           ('about', )]
+        results = self.eac.batch(specs)
+        self.assertEqual([x[0] for x in specs], [x.path for x in results])
+        self.assertEqual([None] * 4, [x.error for x in results])
+        for bouquet_ref, result in zip(bouquet_refs, results):
+            self.assertEqual(bouquet_ref, result.params['sRef'])
+            self.assertEqual(3, len(result.result))
+        self.assertEqual(2, len(results[2].result))
+        self.assertEqual('Stub', results[3].result['info']['brand'])
+
+    def testErrors(self):
+        results = self.eac.batch([
+            ('about', ),
+            ('about', None, 'no-such-key'),
+            ('about', None, None, 'superfluous'),
+            'about',
+            ('timerlist', None, 'timers'),
+        ])
+        self.assertEqual(None, results[0].error)
+        self.assertTrue(isinstance(results[1].error, KeyError))
+        self.assertTrue(isinstance(results[2].error, ValueError))
+        self.assertTrue(isinstance(results[3].error, ValueError))
+        self.assertEqual(None, results[4].error)
+        self.assertEqual(2, len(results[4].result))
+
+    def testConcurrency(self):
+        specs = [('about', {'n': x}) for x in range(8)]
+        results = self.eac.batch(specs, concurrency=2)
+        self.assertEqual(8, len(results))
+        self.assertEqual(2, self.max_active)
+        self.assertEqual(8, len(self.calls))
+
+        self.max_active = 0
+        self.eac.batch(specs, concurrency=1)
+        self.assertEqual(1, self.max_active)
+
+    def testDeadline(self):
+        self.eac.batch([('about', ), ('timerlist', )], deadline=5)
+        deadlines = [x[1]['deadline'] for x in self.calls]
+        self.assertTrue(isinstance(deadlines[0], Deadline))
+        self.assertTrue(deadlines[0] is deadlines[1])
+
+
+if __name__ == '__main__':
+    unittest.main()
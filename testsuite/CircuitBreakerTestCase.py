@@ -0,0 +1,165 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+import sys
+import unittest
+
+import requests
+
+sys.path.insert(0, '..')
+
+from enigma2_http_api.controller import Enigma2APIController
+from enigma2_http_api.resilience import CircuitBreaker, CircuitOpenError
+from enigma2_http_api.resilience import STATE_CLOSED, STATE_OPEN
+from enigma2_http_api.resilience import STATE_HALF_OPEN
+from enigma2_http_api.resilience import backoff_delays, DeadlineExceeded
+
+
+class FakeClock(object):
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class CircuitBreakerTestCase(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.breaker = CircuitBreaker('enigma2.local', failure_threshold=2,
+                                      reset_timeout=30, clock=self.clock)
+
+    def _open(self):
+        self.breaker.record_failure()
+        self.breaker.record_failure()
+        self.assertEqual(STATE_OPEN, self.breaker.state)
+
+    def testFailFastWhileOpen(self):
+        self._open()
+        self.clock.now += 29
+        with self.assertRaises(CircuitOpenError):
+            self.breaker.before_request()
+        self.assertEqual(1, self.breaker.stats()['rejected'])
+
+    def testHalfOpenProbeSuccess(self):
+        self._open()
+        self.clock.now += 30
+        self.breaker.before_request()
+        self.assertEqual(STATE_HALF_OPEN, self.breaker.state)
+
+        with self.assertRaises(CircuitOpenError):
+            self.breaker.before_request()
+
+        self.breaker.record_success()
+        self.assertEqual(STATE_CLOSED, self.breaker.state)
+        self.breaker.before_request()
+
+    def testHalfOpenProbeFailure(self):
+        self._open()
+        self.clock.now += 30
+        self.breaker.before_request()
+        self.breaker.record_failure()
+        self.assertEqual(STATE_OPEN, self.breaker.state)
+
+        with self.assertRaises(CircuitOpenError):
+            self.breaker.before_request()
+
+    def testReleaseProbe(self):
+        self._open()
+        self.clock.now += 30
+        self.breaker.before_request()
+        self.breaker.release_probe()
+        self.assertEqual(STATE_HALF_OPEN, self.breaker.state)
+        self.breaker.before_request()
+
+    def testBackoffDelaysAreBounded(self):
+        delays = list(backoff_delays(8, base=0.5, maximum=4))
+        self.assertEqual(8, len(delays))
+        for attempt, delay in enumerate(delays):
+            self.assertTrue(0 <= delay <= min(4, 0.5 * 2 ** attempt))
+
+
+class FailingSession(object):
+    def __init__(self, exc):
+        self.exc = exc
+        self.requests = 0
+
+    def request(self, method, url, **kwargs):
+        self.requests += 1
+        raise self.exc
+
+    def close(self):
+        pass
+
+
+class FailingResolver(object):
+    def resolve_all(self, host):
+        raise ValueError("broken resolver")
+
+
+class ControllerCircuitBreakerTestCase(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.eac = Enigma2APIController(remote_addr='192.0.2.1')
+        self.eac.circuit_breaker = CircuitBreaker(
+            '192.0.2.1', failure_threshold=1, reset_timeout=30,
+            clock=self.clock)
+        self.eac.circuit_breaker.record_failure()
+        self.clock.now += 30
+
+    def testNonRetryableProbeFailure(self):
+        self.eac.session = FailingSession(
+            requests.exceptions.ChunkedEncodingError('truncated'))
+        for x in range(3):
+            self.assertRaises(requests.exceptions.ChunkedEncodingError,
+                              self.eac.get_about)
+        self.assertEqual(3, self.eac.session.requests)
+        self.assertEqual(0, self.eac.circuit_breaker.stats()['rejected'])
+
+    def testDeadlineExceededIsNoFailure(self):
+        self.eac.session = FailingSession(DeadlineExceeded('too late'))
+        for x in range(3):
+            self.assertRaises(DeadlineExceeded, self.eac.get_about)
+        self.assertEqual(3, self.eac.session.requests)
+        stats = self.eac.circuit_breaker.stats()
+        self.assertEqual(STATE_HALF_OPEN, stats['state'])
+        self.assertEqual(1, stats['failures'])
+        self.assertEqual(0, stats['rejected'])
+
+    def testResolverFailure(self):
+        self.eac.resolver = FailingResolver()
+        self.assertRaises(ValueError, self.eac.get_about)
+        self.eac.resolver = None
+        self.eac.session = FailingSession(
+            requests.exceptions.ConnectionError('refused'))
+        self.assertRaises(requests.exceptions.ConnectionError,
+                          self.eac.get_about)
+        self.assertEqual(1, self.eac.session.requests)
+        self.assertEqual(STATE_OPEN, self.eac.circuit_breaker.state)
+
+
+class RetryTestCase(unittest.TestCase):
+    def setUp(self):
+        self.eac = Enigma2APIController(remote_addr='192.0.2.1', retries=2,
+                                        backoff_base=0, backoff_max=0)
+        self.eac.session = FailingSession(
+            requests.exceptions.ConnectionError('refused'))
+
+    def _requests(self, path, params=None):
+        self.eac.session.requests = 0
+        self.assertRaises(requests.exceptions.ConnectionError,
+                          self.eac._apicall, path, params=params)
+        return self.eac.session.requests
+
+    def testQueriesAreRetried(self):
+        self.assertEqual(3, self._requests('about'))
+        self.assertEqual(3, self._requests('powerstate'))
+        self.assertEqual(3, self._requests('vol'))
+
+    def testMutatingCallsAreNotRetried(self):
+        self.assertEqual(1, self._requests('zap', {'sRef': 'x'}))
+        self.assertEqual(1, self._requests('powerstate', {'newstate': 0}))
+        self.assertEqual(1, self._requests('vol', {'set': 'up'}))
+
+
+if __name__ == '__main__':
+    unittest.main()
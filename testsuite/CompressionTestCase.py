@@ -0,0 +1,69 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+import sys
+import unittest
+
+sys.path.insert(0, '..')
+
+from enigma2_http_api.controller import Enigma2APIController
+from httpstub import StubServer
+
+SERVICE_REF = '1:0:19:283D:3FB:1:C00000:0:0:0:'
+EVENTS = [{
+    'id': x,
+    'sref': SERVICE_REF,
+    'sname': 'Das Erste HD',
+    'title': 'Tagesschau',
+    'shortdesc': 'Nachrichten',
+    'longdesc': 'Aktuelle Nachrichten aus aller Welt. ' * 10,
+    'begin_timestamp': 1500000000 + x * 900,
+    'duration_sec': 900,
+} for x in range(50)]
+
+
+class CompressionTestCase(unittest.TestCase):
+    def _transfer(self, server_compression=True, chunked=False, **kwargs):
+        server = StubServer({'epgservice': {'events': EVENTS}},
+                            compression=server_compression,
+                            chunked=chunked).start()
+        try:
+            eac = Enigma2APIController(remote_addr=server.remote_addr,
+                                       **kwargs)
+            events = eac.get_epgservice(SERVICE_REF)
+            streamed = list(eac.iter_epgservice(SERVICE_REF))
+            eac.close()
+        finally:
+            server.stop()
+
+        self.assertEqual(50, len(events))
+        self.assertEqual(50, len(streamed))
+        return eac.transfer_stats()['epgservice']
+
+    def testCompressed(self):
+        stats = self._transfer()
+        self.assertEqual(2, stats['requests'])
+        self.assertTrue(stats['wire_bytes'] < stats['decoded_bytes'] / 2,
+                        stats)
+        self.assertTrue(stats['compression_ratio'] < 0.5)
+
+    def testChunked(self):
+        stats = self._transfer(chunked=True)
+        self.assertEqual(self._transfer()['wire_bytes'], stats['wire_bytes'])
+        self.assertTrue(0 < stats['wire_bytes'] < stats['decoded_bytes'] / 2,
+                        stats)
+
+        stats = self._transfer(chunked=True, compression=False)
+        self.assertEqual(stats['wire_bytes'], stats['decoded_bytes'])
+
+    def testCompressionDisabled(self):
+        stats = self._transfer(compression=False)
+        self.assertEqual(stats['wire_bytes'], stats['decoded_bytes'])
+        self.assertEqual(1.0, stats['compression_ratio'])
+
+    def testServerWithoutCompression(self):
+        stats = self._transfer(server_compression=False)
+        self.assertEqual(stats['wire_bytes'], stats['decoded_bytes'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,63 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+import sys
+import threading
+import unittest
+
+sys.path.insert(0, '..')
+
+from enigma2_http_api.controller import Enigma2APIController
+from httpstub import StubServer
+
+ABOUT = {'info': {'brand': 'Stub'}}
+
+
+class ConnectionPoolTestCase(unittest.TestCase):
+    def setUp(self):
+        self.server = StubServer({'about': ABOUT}).start()
+
+    def tearDown(self):
+        self.server.stop()
+
+    def _concurrently(self, eac, count):
+        # distinct parameters keep the calls independent of each other
+        threads = [threading.Thread(target=eac._apicall, args=('about', ),
+                                    kwargs=dict(params={'n': x}))
+                   for x in range(count)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    def testSequentialCallsReuseConnection(self):
+        eac = Enigma2APIController(remote_addr=self.server.remote_addr)
+        for _ in range(5):
+            self.assertEqual(ABOUT, eac.get_about())
+        stats = eac.get_connection_stats()
+        self.assertEqual(stats, eac.connection_stats())
+        self.assertEqual(5, stats['requests'])
+        self.assertEqual(1, stats['connects'])
+        self.assertEqual(4, stats['reused'])
+
+    def testConcurrentCallsArePooled(self):
+        self.server.latency = 0.1
+        eac = Enigma2APIController(remote_addr=self.server.remote_addr,
+                                   pool_size=3)
+        self._concurrently(eac, 3)
+        self.assertEqual(3, eac.connection_stats()['connects'])
+
+        self._concurrently(eac, 3)
+        stats = eac.connection_stats()
+        self.assertEqual(6, stats['requests'])
+        self.assertEqual(3, stats['connects'])
+
+    def testCloseDropsConnections(self):
+        eac = Enigma2APIController(remote_addr=self.server.remote_addr)
+        eac.get_about()
+        eac.close()
+        eac.get_about()
+        self.assertEqual(2, eac.connection_stats()['connects'])
+
+
+if __name__ == '__main__':
+    unittest.main()
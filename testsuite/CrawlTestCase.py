@@ -0,0 +1,60 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+import sys
+import time
+import threading
+import unittest
+
+sys.path.insert(0, '..')
+
+from enigma2_http_api.controller import Enigma2APIController
+
+BOUQUETS = [('Bouquet {:d}'.format(x), 'bouquet-ref-{:d}'.format(x))
+            for x in range(6)]
+
+
+class CrawlTestCase(unittest.TestCase):
+    def setUp(self):
+        self.lock = threading.Lock()
+        self.active = 0
+        self.max_active = 0
+
+    def _get_services(self, **kwargs):
+        return list(BOUQUETS)
+
+    def _get_getservices(self, bouquet_ref, **kwargs):
+        with self.lock:
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        time.sleep(0.1)
+        with self.lock:
+            self.active -= 1
+        return ['{:s}/service-{:d}'.format(bouquet_ref, x) for x in range(4)]
+
+    def _controller(self, **kwargs):
+        eac = Enigma2APIController(**kwargs)
+        eac.get_services = self._get_services
+        eac.get_getservices = self._get_getservices
+        return eac
+
+    def testBouquetOrder(self):
+        bouquets = self._controller(
+            crawl_concurrency=6).get_bouquets_services()
+        self.assertEqual(BOUQUETS, [x[:2] for x in bouquets])
+        for (_, bouquet_ref, services) in bouquets:
+            self.assertEqual(4, len(services))
+            self.assertTrue(services[0].startswith(bouquet_ref))
+        self.assertEqual(6, self.max_active)
+
+    def testConcurrency(self):
+        eac = self._controller(crawl_concurrency=1)
+        sequential = eac.get_bouquets_services()
+        self.assertEqual(1, self.max_active)
+
+        self.max_active = 0
+        self.assertEqual(sequential, eac.get_bouquets_services(concurrency=3))
+        self.assertEqual(3, self.max_active)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,134 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+import sys
+import time
+import socket
+import unittest
+
+import requests
+
+sys.path.insert(0, '..')
+
+from enigma2_http_api.controller import Enigma2APIController
+from enigma2_http_api.ratelimit import TokenBucket, BUDGET_BULK
+from enigma2_http_api.resilience import Deadline, DeadlineExceeded
+from httpstub import StubServer
+
+
+class DeadlineTestCase(unittest.TestCase):
+    def testClamp(self):
+        now = [100.0]
+        deadline = Deadline(10, clock=lambda: now[0])
+        self.assertEqual((5, 10.0), deadline.clamp((5, 30)))
+        now[0] += 8
+        self.assertEqual((2.0, 2.0), deadline.clamp((5, None)))
+        now[0] += 2
+        self.assertTrue(deadline.expired())
+        self.assertRaises(DeadlineExceeded, deadline.clamp, 5)
+
+    def testCoerce(self):
+        deadline = Deadline(1)
+        self.assertTrue(Deadline.coerce(deadline) is deadline)
+        self.assertEqual(None, Deadline.coerce(None))
+        self.assertEqual(3, Deadline.coerce(3).seconds)
+
+
+class DeadlineControllerTestCase(unittest.TestCase):
+    def setUp(self):
+        self.server = StubServer({
+            'about': {'info': {'brand': 'Stub'}},
+            'timerlist': {'timers': []},
+        }, latency=0.5).start()
+
+    def tearDown(self):
+        self.server.stop()
+
+    def _controller(self, **kwargs):
+        return Enigma2APIController(remote_addr=self.server.remote_addr,
+                                    **kwargs)
+
+    def testReadTimeoutClampedToDeadline(self):
+        eac = self._controller(timeout=(5, 30))
+        started = time.time()
+        self.assertRaises(requests.exceptions.Timeout, eac._apicall,
+                          'about', deadline=0.2)
+        elapsed = time.time() - started
+        self.assertTrue(elapsed < 0.45, elapsed)
+
+    def testExpiredDeadline(self):
+        eac = self._controller()
+        deadline = Deadline(0)
+        self.assertRaises(DeadlineExceeded, eac._apicall, 'about',
+                          deadline=deadline)
+        self.assertEqual({}, self.server.requests)
+
+    def testPublicCalls(self):
+        eac = self._controller()
+        ref = '1:7:1:0:0:0:0:0:0:0:'
+        calls = [
+            lambda deadline: eac.get_about(deadline=deadline),
+            lambda deadline: eac.get_timerlist(deadline=deadline),
+            lambda deadline: eac.get_epgbouquet(ref, deadline=deadline),
+            lambda deadline: eac.get_epgnow(ref, deadline=deadline),
+            lambda deadline: eac.get_epgnext(ref, deadline=deadline),
+            lambda deadline: eac.get_search('Tatort', deadline=deadline),
+            lambda deadline: list(eac.iter_epgbouquet(ref, deadline=deadline)),
+            lambda deadline: list(eac.iter_epgservice(ref, deadline=deadline)),
+            lambda deadline: list(eac.iter_search('Tatort',
+                                                  deadline=deadline)),
+        ]
+        for call in calls:
+            self.assertRaises(DeadlineExceeded, call, Deadline(0))
+        self.assertEqual({}, self.server.requests)
+
+        started = time.time()
+        self.assertRaises(requests.exceptions.Timeout, list,
+                          eac.iter_epgservice(ref, deadline=0.2))
+        self.assertTrue(time.time() - started < 0.45)
+
+    def testEndpointTimeouts(self):
+        eac = self._controller(endpoint_timeouts={'about': 0.1})
+        started = time.time()
+        self.assertRaises(requests.exceptions.ReadTimeout, eac.get_about)
+        self.assertTrue(time.time() - started < 0.45)
+        self.assertEqual([], eac.get_timerlist())
+
+    def testRateLimiterWait(self):
+        self.server.latency = 0
+        eac = self._controller()
+        eac.rate_limiters[BUDGET_BULK] = TokenBucket(0.1, burst=1)
+        eac.get_timerlist()
+        started = time.time()
+        self.assertRaises(DeadlineExceeded, eac._apicall, 'timerlist',
+                          deadline=1)
+        self.assertTrue(time.time() - started < 0.5)
+        self.assertEqual(1, self.server.requests['timerlist'])
+
+    def testRetriesStopAtDeadline(self):
+        sock = socket.socket()
+        sock.bind(('127.0.0.1', 0))
+        port = sock.getsockname()[1]
+        sock.close()
+
+        eac = Enigma2APIController(
+            remote_addr='127.0.0.1:{:d}'.format(port), retries=100,
+            backoff_base=0.05, backoff_max=0.05)
+        attempts = list()
+        send = eac.session.request
+
+        def counting_request(*args, **kwargs):
+            attempts.append(kwargs['timeout'])
+            return send(*args, **kwargs)
+
+        eac.session.request = counting_request
+        started = time.time()
+        self.assertRaises(requests.exceptions.ConnectionError,
+                          eac._apicall, 'about', deadline=0.3)
+        elapsed = time.time() - started
+        self.assertTrue(elapsed < 0.6, elapsed)
+        self.assertTrue(1 < len(attempts) < 100, len(attempts))
+        self.assertTrue(all(max(x) <= 0.3 for x in attempts))
+
+
+if __name__ == '__main__':
+    unittest.main()
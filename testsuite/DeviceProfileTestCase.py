@@ -0,0 +1,93 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+import os
+import sys
+import time
+import shutil
+import tempfile
+import unittest
+
+sys.path.insert(0, '..')
+
+from enigma2_http_api.controller import Enigma2APIController
+from enigma2_http_api.deviceprofile import DeviceProfile, ProfileStore
+from enigma2_http_api.fakebox import FakeBoxServer
+
+
+class DeviceProfileTestCase(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'profiles.json')
+        self.server = FakeBoxServer(bouquets=1,
+                                    services_per_bouquet=2).start()
+
+    def tearDown(self):
+        self.server.stop()
+        shutil.rmtree(self.directory)
+
+    def _controller(self):
+        return Enigma2APIController(remote_addr=self.server.remote_addr,
+                                    profile_cache=self.path)
+
+    def testProbeOnce(self):
+        eac = self._controller()
+        self.assertEqual(None, eac.profile)
+        self.assertTrue(eac.has_rest_support())
+        profile = eac.device_profile()
+        self.assertEqual('openwebif', profile.api_flavour)
+        self.assertEqual(4, profile.tuner_count)
+        self.assertTrue(profile.supports('currenttime'))
+        self.assertFalse(profile.supports('statusinfo'))
+        probes = sum(self.server.requests.values())
+
+        eac = self._controller()
+        self.assertEqual(profile.as_dict(), eac.profile.as_dict())
+        self.assertTrue(eac.has_rest_support())
+        self.assertTrue(eac.has_rest_support())
+        # only the software versions are checked
+        self.assertEqual(probes + 1, sum(self.server.requests.values()))
+
+    def testInvalidation(self):
+        eac = self._controller()
+        eac.device_profile()
+        self.server.box.api_about = lambda params: (
+            {'info': {'imagever': '2.0', 'webifver': 'OWIF 1.3.0'}}, 0)
+        eac.get_about()
+        self.assertEqual(None, eac.profile)
+        self.assertEqual(None, ProfileStore(self.path).get(
+            self.server.remote_addr))
+
+    def testInvalidationOnLoad(self):
+        self._controller().device_profile()
+        self.server.box.api_about = lambda params: (
+            {'info': {'imagever': '2.0', 'webifver': 'OWIF 1.3.0'}}, 0)
+        eac = self._controller()
+        self.assertNotEqual(None, eac.profile)
+        self.assertEqual('openwebif', eac.device_profile().api_flavour)
+        self.assertEqual(0, eac.device_profile().tuner_count)
+        self.assertEqual(
+            eac.profile.as_dict(),
+            ProfileStore(self.path).get(self.server.remote_addr).as_dict())
+
+    def testConcurrentStores(self):
+        first = ProfileStore(self.path)
+        second = ProfileStore(self.path)
+        self.assertEqual(None, first.get('box1'))
+        second.put(DeviceProfile(remote_addr='box2', probed_at=time.time()))
+        first.put(DeviceProfile(remote_addr='box1', probed_at=time.time()))
+        store = ProfileStore(self.path)
+        self.assertEqual('box1', store.get('box1').remote_addr)
+        self.assertEqual('box2', store.get('box2').remote_addr)
+
+        first.invalidate('box2')
+        self.assertEqual(None, ProfileStore(self.path).get('box2'))
+
+    def testExpiry(self):
+        self._controller().device_profile()
+        store = ProfileStore(self.path, max_age=60,
+                             clock=lambda: 10 ** 10)
+        self.assertEqual(None, store.get(self.server.remote_addr))
+
+
+if __name__ == '__main__':
+    unittest.main()
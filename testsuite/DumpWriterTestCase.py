@@ -0,0 +1,122 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+import os
+import sys
+import glob
+import shutil
+import tempfile
+import unittest
+
+sys.path.insert(0, '..')
+
+from enigma2_http_api.controller import Enigma2APIController
+from enigma2_http_api.dumpwriter import ArchiveDumpWriter, DumpRecord
+from enigma2_http_api.dumpwriter import _OPEN_WRITERS
+from enigma2_http_api.dumpwriter import iter_archive
+from enigma2_http_api.fakebox import FakeBoxServer
+from enigma2_http_api.jsonbackend import get_backend
+
+
+class DumpWriterTestCase(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.server = FakeBoxServer(bouquets=2, services_per_bouquet=3,
+                                    events_per_service=5).start()
+
+    def tearDown(self):
+        self.server.stop()
+        shutil.rmtree(self.directory)
+
+    def _controller(self, **kwargs):
+        return Enigma2APIController(remote_addr=self.server.remote_addr,
+                                    dump_requests=self.directory, **kwargs)
+
+    def _exercise(self, eac):
+        services = eac.get_bouquets_services()
+        ref = services[0][2][0]['servicereference']
+        events = eac.get_epgservice(ref)
+        streamed = [x.item_id for x in eac.iter_epgservice(ref)]
+        eac.close()
+        return services, events, streamed
+
+    def testFiles(self):
+        eac = self._controller()
+        self._exercise(eac)
+        self.assertEqual(5, len(glob.glob(
+            os.path.join(self.directory, 'eha_raw_*.json'))))
+        self.assertEqual(5, eac.dump_stats()['written'])
+
+    def testArchiveReplay(self):
+        eac = self._controller(dump_format='archive', dump_max_records=2)
+        services, events, streamed = self._exercise(eac)
+        eac.dump_writer.close()
+        self.assertEqual(3, eac.dump_stats()['archives'])
+
+        replayed = Enigma2APIController(remote_addr='offline.invalid',
+                                        replay=self.directory)
+        self.assertEqual(services, replayed.get_bouquets_services())
+        ref = services[0][2][0]['servicereference']
+        self.assertEqual(events, replayed.get_epgservice(ref))
+        self.assertEqual(streamed,
+                         [x.item_id for x in replayed.iter_epgservice(ref)])
+
+    def testArchiveReadableAfterClose(self):
+        eac = self._controller(dump_format='archive')
+        services = eac.get_bouquets_services()
+        eac.close()
+        self.assertFalse(eac.dump_writer._thread.is_alive())
+        self.assertNotIn(eac.dump_writer, _OPEN_WRITERS)
+
+        (filename, ) = glob.glob(os.path.join(self.directory, '*.gz'))
+        self.assertEqual(3, len(list(iter_archive(filename, get_backend()))))
+        replayed = Enigma2APIController(remote_addr='offline.invalid',
+                                        replay=self.directory)
+        self.assertEqual(services, replayed.get_bouquets_services())
+
+    def testSampling(self):
+        eac = self._controller(dump_format='archive',
+                               dump_sample_paths=['epgservice'])
+        self._exercise(eac)
+        stats = eac.dump_stats()
+        self.assertEqual(2, stats['written'])
+        self.assertEqual(3, stats['skipped'])
+
+    def testRawContent(self):
+        writer = ArchiveDumpWriter(self.directory, get_backend('json'))
+        writer.submit(DumpRecord(1, u'http://box/api/about', 'info',
+                                 '{"info":\n {"brand": "x"}}', None))
+        writer.close()
+        records = list(iter_archive(
+            glob.glob(os.path.join(self.directory, '*.gz'))[0], get_backend()))
+        self.assertEqual(1, len(records))
+        self.assertEqual({'info': {'brand': 'x'}}, records[0]['response'])
+        self.assertEqual(None, records[0]['_filter_key'])
+
+    def _archive(self, contents):
+        writer = ArchiveDumpWriter(self.directory, get_backend('json'))
+        for request_no, content in enumerate(contents):
+            writer.submit(DumpRecord(request_no, u'http://box/api/about',
+                                     None, content, None))
+        writer.close()
+        (filename, ) = glob.glob(os.path.join(self.directory, '*.gz'))
+        return filename
+
+    def testMalformedLine(self):
+        filename = self._archive(['{"n": 1}', '<html>', '{"n": 3}'])
+        self.assertEqual([1, 3], [x['response']['n'] for x in
+                                  iter_archive(filename, get_backend())])
+
+    def testTruncatedArchive(self):
+        filename = self._archive(['{{"n": {:d}, "pad": "{:s}"}}'.format(
+            x, os.urandom(64).encode('hex')) for x in range(100)])
+        with open(filename, 'r+b') as target:
+            target.truncate(os.path.getsize(filename) // 2)
+
+        records = list(iter_archive(filename, get_backend()))
+        self.assertTrue(0 < len(records) < 100, len(records))
+        self.assertEqual(range(len(records)),
+                         [x['response']['n'] for x in records])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,87 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+import sys
+import unittest
+
+import requests
+
+sys.path.insert(0, '..')
+
+from enigma2_http_api.controller import Enigma2APIController
+from enigma2_http_api.exporter import MetricsExporter, render_openmetrics
+from enigma2_http_api.exporter import OPENMETRICS_CONTENT_TYPE
+from enigma2_http_api.fakebox import FakeBoxServer
+from enigma2_http_api.fleet import FleetController
+from enigma2_http_api.metrics import RequestMetrics
+
+
+class ExporterTestCase(unittest.TestCase):
+    def setUp(self):
+        self.server = FakeBoxServer(bouquets=2, services_per_bouquet=3,
+                                    events_per_service=5).start()
+        self.eac = Enigma2APIController(remote_addr=self.server.remote_addr,
+                                        cache_ttl=True)
+
+    def tearDown(self):
+        self.eac.close()
+        self.server.stop()
+
+    def sample(self, text, name, **labels):
+        prefix = name + '{'
+        for line in text.splitlines():
+            if not line.startswith(prefix):
+                continue
+            if all('{:s}="{:s}"'.format(key, value) in line for
+                   key, value in labels.items()):
+                return float(line.rsplit(' ', 1)[1])
+        return None
+
+    def testRender(self):
+        self.eac.get_getallservices()
+        self.eac.get_getallservices()
+        text = render_openmetrics([self.eac])
+        self.assertTrue(text.endswith('# EOF\n'))
+        self.assertEqual(1, self.sample(text, 'enigma2_requests_total',
+                                        endpoint='getallservices'))
+        self.assertEqual(1, self.sample(
+            text, 'enigma2_call_duration_seconds_bucket',
+            endpoint='getallservices', le='+Inf'))
+        self.assertEqual(0, self.sample(text, 'enigma2_calls_in_flight',
+                                        endpoint='getallservices'))
+        self.assertEqual(0.5, self.sample(text, 'enigma2_cache_hit_ratio',
+                                          box=self.server.remote_addr))
+
+    def testSharedMetrics(self):
+        metrics = RequestMetrics()
+        fleet = FleetController([self.server.remote_addr], metrics=metrics)
+        other = Enigma2APIController(remote_addr=self.server.remote_addr,
+                                     metrics=metrics)
+        fleet.run('get_about')
+        other.get_about()
+        text = render_openmetrics([fleet, other])
+        self.assertEqual(1, text.count('enigma2_requests_total{'))
+        self.assertEqual(2, self.sample(text, 'enigma2_requests_total',
+                                        endpoint='about'))
+        fleet.close()
+        other.close()
+
+    def testListener(self):
+        exporter = MetricsExporter([self.eac], address=('127.0.0.1', 0))
+        exporter.start()
+        try:
+            self.eac.get_about()
+            response = requests.get(exporter.url)
+            self.assertEqual(200, response.status_code)
+            self.assertEqual(OPENMETRICS_CONTENT_TYPE,
+                             response.headers['Content-Type'])
+            self.assertEqual(1, self.sample(response.text,
+                                            'enigma2_requests_total',
+                                            endpoint='about'))
+            self.assertEqual(404, requests.get(
+                exporter.url + '/nothing').status_code)
+        finally:
+            exporter.stop()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,62 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+import sys
+import unittest
+
+sys.path.insert(0, '..')
+
+from enigma2_http_api.controller import Enigma2APIController
+from enigma2_http_api.fakebox import FakeBoxServer, SyntheticBox
+
+
+class FakeBoxTestCase(unittest.TestCase):
+    def setUp(self):
+        self.server = FakeBoxServer(bouquets=3, services_per_bouquet=5,
+                                    events_per_service=10, timers=2).start()
+        self.eac = Enigma2APIController(remote_addr=self.server.remote_addr)
+
+    def tearDown(self):
+        self.eac.close()
+        self.server.stop()
+
+    def testDeterministic(self):
+        box_a = SyntheticBox(seed=7, start=0)
+        box_b = SyntheticBox(seed=7, start=0)
+        ref = box_a.services[3]['servicereference']
+        self.assertEqual(box_a.api_epgservice({'sRef': ref}),
+                         box_b.api_epgservice({'sRef': ref}))
+        self.assertEqual(box_a.movies, box_b.movies)
+
+    def testServices(self):
+        bouquets = self.eac.get_bouquets_services()
+        self.assertEqual(3, len(bouquets))
+        for (_, _, services) in bouquets:
+            self.assertEqual(5, len(services))
+        self.assertEqual(3, len(self.eac.get_getallservices()))
+
+    def testEPG(self):
+        ref = self.server.box.services[0]['servicereference']
+        events = self.eac.get_epgservice(ref)
+        self.assertEqual(10, len(events))
+        self.assertEqual(ref, events[0]['sref'])
+        title = events[0]['title']
+        self.assertTrue(title in [x.title for x in self.eac.get_search(title)])
+
+    def testTimers(self):
+        self.assertEqual(2, len(self.eac.get_timerlist()))
+        ref = self.server.box.services[1]['servicereference']
+        event = self.eac.get_epgservice(ref)[2]
+        self.eac.get_timeraddbyeventid(ref, event['id'])
+        timers = self.eac.get_timerlist()
+        self.assertEqual(3, len(timers))
+        self.eac.get_timerdelete(ref, event['begin_timestamp'],
+                                 event['begin_timestamp'] +
+                                 event['duration_sec'])
+        self.assertEqual(2, len(self.eac.get_timerlist()))
+
+    def testRestSupport(self):
+        self.assertTrue(self.eac.has_rest_support())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,56 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+import sys
+import time
+import unittest
+
+sys.path.insert(0, '..')
+
+from enigma2_http_api.fakebox import FakeBoxServer, LatencyModel
+from enigma2_http_api.fleet import FleetController
+
+UNREACHABLE = '127.0.0.1:1'
+
+
+class FleetTestCase(unittest.TestCase):
+    def setUp(self):
+        self.servers = [
+            FakeBoxServer(seed=seed, bouquets=1, services_per_bouquet=4,
+                          events_per_service=6, timers=seed + 1, movies=2,
+                          latency=LatencyModel(base=0.3)).start()
+            for seed in range(3)]
+        self.remote_addrs = [x.remote_addr for x in self.servers]
+        self.fleet = FleetController(self.remote_addrs + [UNREACHABLE])
+
+    def tearDown(self):
+        self.fleet.close()
+        for server in self.servers:
+            server.stop()
+
+    def testRun(self):
+        started = time.time()
+        outcomes = self.fleet.run('get_about')
+        self.assertTrue(time.time() - started < 0.9)
+        self.assertEqual(self.remote_addrs + [UNREACHABLE], list(outcomes))
+        for remote_addr in self.remote_addrs:
+            self.assertEqual(None, outcomes[remote_addr].error)
+            self.assertEqual('fakebox',
+                             outcomes[remote_addr].result['info']['model'])
+        self.assertTrue(outcomes[UNREACHABLE].error is not None)
+
+    def testMergedTimers(self):
+        errors = dict()
+        timers = list(self.fleet.iter_timerlist(errors=errors))
+        self.assertEqual([UNREACHABLE], list(errors))
+        for seed, remote_addr in enumerate(self.remote_addrs):
+            self.assertEqual(seed + 1, len(
+                [x for x in timers if x.remote_addr == remote_addr]))
+
+    def testMergedMovies(self):
+        movies = list(self.fleet.iter_movielist())
+        self.assertEqual(6, len(movies))
+        self.assertTrue('filename' in movies[0].item)
+
+
+if __name__ == '__main__':
+    unittest.main()
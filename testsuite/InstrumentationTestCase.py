@@ -0,0 +1,92 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+import sys
+import unittest
+
+sys.path.insert(0, '..')
+
+from enigma2_http_api.controller import Enigma2APIController
+from enigma2_http_api.fakebox import FakeBoxServer
+from enigma2_http_api.metrics import LatencyHistogram
+
+
+class LatencyHistogramTestCase(unittest.TestCase):
+    def testEmpty(self):
+        histogram = LatencyHistogram()
+        self.assertEqual(None, histogram.percentile(50))
+        self.assertEqual(0, histogram.as_dict()['count'])
+
+    def testPercentiles(self):
+        histogram = LatencyHistogram()
+        for _ in range(99):
+            histogram.observe(0.01)
+        histogram.observe(9.0)
+        self.assertEqual(0.01, histogram.percentile(50))
+        self.assertEqual(0.01, histogram.percentile(95))
+        self.assertTrue(histogram.percentile(99.5) > 1.0)
+        self.assertEqual(9.0, histogram.percentile(100))
+
+    def testOverflow(self):
+        histogram = LatencyHistogram(buckets=(0.1, 1.0))
+        histogram.observe(5.0)
+        histogram.observe(7.0)
+        self.assertEqual([(0.1, 0), (1.0, 0), (float('inf'), 2)],
+                         histogram.cumulative_counts())
+        self.assertTrue(5.0 <= histogram.percentile(50) <= 7.0)
+
+
+class InstrumentationTestCase(unittest.TestCase):
+    def setUp(self):
+        self.server = FakeBoxServer(bouquets=2, services_per_bouquet=3,
+                                    events_per_service=5).start()
+        self.before = list()
+        self.after = list()
+        self.eac = Enigma2APIController(
+            remote_addr=self.server.remote_addr, cache_ttl=True,
+            before_hooks=[lambda *args: self.before.append(args)],
+            after_hooks=[self.after.append])
+
+    def tearDown(self):
+        self.eac.close()
+        self.server.stop()
+
+    def testHooks(self):
+        ref = self.server.box.services[0]['servicereference']
+        self.eac.get_epgservice(ref)
+        self.assertEqual([(self.server.remote_addr, 'epgservice',
+                           {'sRef': ref})], self.before)
+        (record, ) = self.after
+        self.assertEqual('epgservice', record.path)
+        self.assertEqual(200, record.status)
+        self.assertTrue(record.decoded_bytes > 0)
+        self.assertTrue(record.duration > 0)
+        self.assertFalse(record.cached)
+
+    def testStreamingHooks(self):
+        ref = self.server.box.services[0]['servicereference']
+        self.assertEqual(5, len(list(self.eac.iter_epgservice(ref))))
+        (record, ) = self.after
+        self.assertEqual(200, record.status)
+        self.assertTrue(record.wire_bytes > 0)
+
+    def testCacheHitsNotAccounted(self):
+        self.eac.get_getallservices()
+        self.eac.get_getallservices()
+        self.assertEqual([False, True], [x.cached for x in self.after])
+        self.assertEqual(None, self.after[1].status)
+        stats = self.eac.latency_stats()['getallservices']
+        self.assertEqual(1, stats['count'])
+        self.assertEqual(0, stats['errors'])
+        self.assertTrue(stats['p50'] <= stats['p99'] <= stats['max'])
+
+    def testFailingHook(self):
+        def broken(record):
+            raise ValueError(record)
+
+        self.eac.after_hooks.insert(0, broken)
+        self.eac.get_about()
+        self.assertEqual(1, len(self.after))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,52 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+import sys
+import unittest
+
+sys.path.insert(0, '..')
+
+from enigma2_http_api.controller import Enigma2APIController
+from enigma2_http_api.jsonbackend import PREFERRED_BACKENDS
+from enigma2_http_api.jsonbackend import available_backends, get_backend
+from httpstub import StubServer
+
+
+class JSONBackendTestCase(unittest.TestCase):
+    def testPreferredBackend(self):
+        available = available_backends()
+        self.assertTrue('json' in available)
+        self.assertEqual([x for x in PREFERRED_BACKENDS if x in available],
+                         available)
+        self.assertEqual(available[0], get_backend().name)
+
+    def testExplicitBackend(self):
+        backend = get_backend('json')
+        self.assertEqual('json', backend.name)
+        self.assertTrue(backend is get_backend('json'))
+
+    def testMissingBackend(self):
+        self.assertRaises(ImportError, get_backend, 'no_such_json_module')
+
+    def testRoundTrip(self):
+        data = {u'title': u'Tatort – Schüsse', u'events': [1, 2.5, None]}
+        for name in available_backends():
+            backend = get_backend(name)
+            self.assertEqual(data, backend.loads(backend.dumps(data)), name)
+            self.assertEqual(data, backend.loads(
+                backend.dumps(data, indent=2)), name)
+
+    def testController(self):
+        about = {u'info': {u'brand': u'Stub', u'model': u'Zwölf'}}
+        server = StubServer({'about': about}).start()
+        try:
+            for name in available_backends():
+                eac = Enigma2APIController(remote_addr=server.remote_addr,
+                                           json_backend=name)
+                self.assertEqual(name, eac.json.name)
+                self.assertEqual(about, eac.get_about())
+        finally:
+            server.stop()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,112 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+import sys
+import time
+import threading
+import unittest
+
+import requests
+
+sys.path.insert(0, '..')
+
+from enigma2_http_api.controller import Enigma2APIController
+from enigma2_http_api.controller import POWERSTATE_REBOOT
+from enigma2_http_api.controller import POWERSTATE_STANDBY
+from enigma2_http_api.fakebox import FakeBoxServer
+from enigma2_http_api.powerstate import PowerStateTracker
+from enigma2_http_api.powerstate import STATE_ON, STATE_STANDBY
+from enigma2_http_api.powerstate import STATE_NOT_READY, STATE_UNREACHABLE
+from enigma2_http_api.resilience import STATE_CLOSED, STATE_OPEN
+
+
+class PowerStateTestCase(unittest.TestCase):
+    def setUp(self):
+        self.server = FakeBoxServer(bouquets=1, services_per_bouquet=2,
+                                    events_per_service=2,
+                                    boot_time=0.5).start()
+        self.eac = Enigma2APIController(remote_addr=self.server.remote_addr)
+        self.changes = list()
+        self.tracker = PowerStateTracker(
+            self.eac, on_change=[
+                lambda controller, old, new: self.changes.append(new)])
+
+    def tearDown(self):
+        self.tracker.stop()
+        self.eac.close()
+        self.server.stop()
+
+    def testQuery(self):
+        self.assertEqual({'result': True, 'instandby': False},
+                         self.eac.get_powerstate())
+        self.assertEqual(STATE_ON, self.tracker.probe())
+        self.eac.get_powerstate(POWERSTATE_STANDBY)
+        self.assertEqual(STATE_STANDBY, self.tracker.probe())
+        self.assertEqual([STATE_ON, STATE_STANDBY], self.changes)
+        self.assertTrue(self.tracker.is_ready())
+        self.assertTrue(self.tracker.poll_interval() >
+                        PowerStateTracker(self.eac).intervals[STATE_ON])
+
+    def testWaitUntilReady(self):
+        self.eac.get_powerstate(POWERSTATE_REBOOT)
+        self.assertEqual(STATE_NOT_READY, self.tracker.probe())
+        started = time.time()
+        self.assertTrue(self.tracker.wait_until_ready(timeout=5, base=0.05))
+        elapsed = time.time() - started
+        self.assertTrue(0.3 < elapsed < 2.0, elapsed)
+        self.assertEqual(STATE_ON, self.tracker.state)
+
+    def testWaitTimeout(self):
+        self.eac.get_powerstate(POWERSTATE_REBOOT)
+        self.assertFalse(self.tracker.wait_until_ready(timeout=0.2,
+                                                       base=0.05))
+
+    def testWakeup(self):
+        self.eac.get_powerstate(POWERSTATE_STANDBY)
+        self.assertTrue(self.tracker.wakeup(timeout=2))
+        self.assertEqual(STATE_ON, self.tracker.state)
+
+    def testUnreachableBackoff(self):
+        self.server.stop()
+        tracker = PowerStateTracker(
+            self.eac, intervals={STATE_UNREACHABLE: 10.0},
+            max_unreachable_interval=25.0, probe_timeout=0.5)
+        intervals = list()
+        for _ in range(3):
+            self.assertEqual(STATE_UNREACHABLE, tracker.probe())
+            intervals.append(tracker.poll_interval())
+        self.assertEqual([10.0, 20.0, 25.0], intervals)
+        self.assertFalse(tracker.is_ready())
+        self.server = FakeBoxServer().start()
+
+    def testBreakerWhileBooting(self):
+        address = self.server.server_address[:2]
+        self.server.stop()
+        eac = Enigma2APIController(remote_addr=self.server.remote_addr,
+                                   circuit_breaker=True, failure_threshold=1,
+                                   reset_timeout=30)
+        self.assertRaises(requests.exceptions.ConnectionError,
+                          eac.get_about)
+        self.assertEqual(STATE_OPEN, eac.circuit_breaker.state)
+
+        booted = threading.Timer(0.5, lambda: setattr(
+            self, 'server', FakeBoxServer(address=address).start()))
+        booted.start()
+        started = time.time()
+        tracker = PowerStateTracker(eac, probe_timeout=0.5)
+        self.assertTrue(tracker.wait_until_ready(timeout=5, base=0.05))
+        booted.join()
+        self.assertTrue(time.time() - started < 2.0)
+        self.assertEqual(STATE_CLOSED, eac.circuit_breaker.state)
+        self.assertEqual('Synthetic', eac.get_about()['info']['brand'])
+
+    def testPolling(self):
+        self.tracker.intervals[STATE_ON] = 0.05
+        self.tracker.start()
+        time.sleep(0.3)
+        self.tracker.stop()
+        self.assertTrue(self.tracker.stats()['probes'] >= 3)
+        self.assertEqual([STATE_ON], self.changes)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,142 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+import sys
+import logging
+import logging.handlers
+import unittest
+
+sys.path.insert(0, '..')
+
+from enigma2_http_api.controller import Enigma2APIController
+from enigma2_http_api import ratelimit
+from enigma2_http_api.ratelimit import TokenBucket, get_token_bucket
+from enigma2_http_api.ratelimit import BUDGET_BULK, BUDGET_INTERACTIVE
+from httpstub import StubServer
+
+
+class FakeClock(object):
+    def __init__(self):
+        self.now = 1000.0
+        self.sleeps = list()
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+class TokenBucketTestCase(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+
+    def _bucket(self, rate=2, burst=4):
+        return TokenBucket(rate, burst=burst, clock=self.clock,
+                           sleep=self.clock.sleep)
+
+    def testBurst(self):
+        bucket = self._bucket()
+        self.assertEqual([True] * 4 + [False],
+                         [bucket.try_acquire() for _ in range(5)])
+        self.assertEqual(4, bucket.stats()['acquired'])
+
+    def testRefill(self):
+        bucket = self._bucket()
+        for _ in range(4):
+            bucket.try_acquire()
+        self.clock.now += 0.5
+        self.assertTrue(bucket.try_acquire())
+        self.assertFalse(bucket.try_acquire())
+
+        self.clock.now += 60
+        self.assertEqual([True] * 4 + [False],
+                         [bucket.try_acquire() for _ in range(5)])
+
+    def testAcquireWaits(self):
+        bucket = self._bucket()
+        for _ in range(4):
+            self.assertTrue(bucket.acquire())
+        self.assertEqual([], self.clock.sleeps)
+
+        self.assertTrue(bucket.acquire())
+        self.assertTrue(bucket.acquire())
+        self.assertEqual([0.5, 0.5], self.clock.sleeps)
+        stats = bucket.stats()
+        self.assertEqual(2, stats['delayed'])
+        self.assertEqual(1.0, stats['waited'])
+
+    def testTimeout(self):
+        bucket = self._bucket(rate=1, burst=1)
+        self.assertTrue(bucket.acquire())
+        self.assertFalse(bucket.acquire(timeout=0.5))
+        self.assertEqual([], self.clock.sleeps)
+        self.assertTrue(bucket.acquire(timeout=1))
+        self.assertEqual([1.0], self.clock.sleeps)
+
+    def testInvalidRate(self):
+        self.assertRaises(ValueError, TokenBucket, 0)
+
+    def testSharedPerDevice(self):
+        bucket = get_token_bucket('ratelimit.test', BUDGET_BULK, 5)
+        self.assertTrue(bucket is get_token_bucket('ratelimit.test',
+                                                   BUDGET_BULK, 10))
+        self.assertEqual(5, bucket.rate)
+        self.assertFalse(bucket is get_token_bucket(
+            'ratelimit.test', BUDGET_INTERACTIVE, 5))
+
+    def testConflictingRate(self):
+        handler = logging.handlers.BufferingHandler(10)
+        ratelimit.LOG.addHandler(handler)
+        try:
+            get_token_bucket('ratelimit.conflict', BUDGET_BULK, 5)
+            get_token_bucket('ratelimit.conflict', BUDGET_BULK, 5, burst=5)
+            self.assertEqual([], handler.buffer)
+            get_token_bucket('ratelimit.conflict', BUDGET_BULK, 5, burst=2)
+            self.assertEqual([logging.WARNING],
+                             [x.levelno for x in handler.buffer])
+        finally:
+            ratelimit.LOG.removeHandler(handler)
+
+
+class RateLimitControllerTestCase(unittest.TestCase):
+    def setUp(self):
+        self.server = StubServer({
+            'timerlist': {'timers': []},
+            'zap': {'result': True, 'message': 'zapped'},
+        }).start()
+        self.clock = FakeClock()
+
+    def tearDown(self):
+        self.server.stop()
+
+    def _controller(self, **kwargs):
+        return Enigma2APIController(remote_addr=self.server.remote_addr,
+                                    **kwargs)
+
+    def testSharedBudget(self):
+        eac = self._controller(rate_limit=5)
+        self.assertTrue(eac.rate_limiters[BUDGET_BULK] is
+                        eac.rate_limiters[BUDGET_INTERACTIVE])
+
+    def testInteractiveSplit(self):
+        eac = self._controller(rate_limit=1, interactive_rate_limit=1)
+        eac.rate_limiters = {
+            BUDGET_BULK: TokenBucket(1, burst=2, clock=self.clock,
+                                     sleep=self.clock.sleep),
+            BUDGET_INTERACTIVE: TokenBucket(1, burst=1, clock=self.clock,
+                                            sleep=self.clock.sleep),
+        }
+        for _ in range(4):
+            eac.get_timerlist()
+        eac.get_zap('1:0:19:7C:6:85:FFFF0000:0:0:0:')
+
+        self.assertEqual([1.0, 1.0], self.clock.sleeps)
+        stats = eac.rate_limit_stats()
+        self.assertEqual(4, stats[BUDGET_BULK]['acquired'])
+        self.assertEqual(2, stats[BUDGET_BULK]['delayed'])
+        self.assertEqual(1, stats[BUDGET_INTERACTIVE]['acquired'])
+        self.assertEqual(0, stats[BUDGET_INTERACTIVE]['delayed'])
+
+if __name__ == '__main__':
+    unittest.main()
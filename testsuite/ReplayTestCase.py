@@ -0,0 +1,97 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+import os
+import sys
+import json
+import shutil
+import tempfile
+import unittest
+
+sys.path.insert(0, '..')
+
+from enigma2_http_api.controller import Enigma2APIController
+from enigma2_http_api.jsonbackend import available_backends
+from enigma2_http_api.replay import ReplayMissError
+
+TD = os.path.abspath(
+    os.path.join(os.path.dirname(__file__), '../contrib/testdata'))
+
+BOUQUET_REF = '1:7:1:0:0:0:0:0:0:0:FROM BOUQUET "userbouquet.a.tv" ' \
+              'ORDER BY bouquet'
+
+
+class ReplayTestCase(unittest.TestCase):
+    def _load_raw(self, trunk):
+        with open(os.path.join(TD, trunk + '.json'), "rb") as src:
+            return json.load(src)
+
+    def _capture(self, url, response, filter_key=None):
+        self.capture_no += 1
+        filename = os.path.join(self.directory,
+                                'eha_raw_{:04d}.json'.format(self.capture_no))
+        with open(filename, "wb") as target:
+            json.dump({'url': url, '_filter_key': filter_key,
+                       'response': response}, target)
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.capture_no = 0
+        self.services = self._load_raw('getallservices')[0]['subservices']
+        self.events = self._load_raw('got')
+
+        self._capture('http://enigma2.local/api/movielist',
+                      self._load_raw('movielist'))
+        self._capture(
+            'http://enigma2.local/api/getservices?sRef=1%3A7%3A1%3A0%3A0%3A0'
+            '%3A0%3A0%3A0%3A0%3AFROM+BOUQUET+%22userbouquet.a.tv%22+ORDER+BY'
+            '+bouquet', self.services, 'services')
+        self._capture('http://enigma2.local/api/epgsearch?search=Thrones',
+                      self.events, 'events')
+
+        self.eac = Enigma2APIController(remote_addr='192.0.2.1',
+                                        replay=self.directory)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def testUnfilteredCapture(self):
+        self.assertEqual(3, len(self.eac.get_movielist()['movies']))
+
+    def testFilteredCaptureWithParams(self):
+        self.assertEqual(self.services, self.eac.get_getservices(BOUQUET_REF))
+
+    def testSearch(self):
+        events = self.eac.get_search('Thrones')
+        self.assertEqual(4, len(events))
+        self.assertEqual(events, list(self.eac.iter_search('Thrones')))
+
+    def testMiss(self):
+        with self.assertRaises(ReplayMissError):
+            self.eac.get_search('Dragons')
+        with self.assertRaises(ReplayMissError):
+            self.eac.get_about()
+
+    def testOffline(self):
+        requested = list()
+        self.eac.session.request = lambda *args, **kwargs: requested.append(
+            args)
+        with self.assertRaises(ReplayMissError):
+            self.eac.has_rest_support()
+        self.assertEqual([], requested)
+
+    def testJSONBackend(self):
+        for name in available_backends():
+            eac = Enigma2APIController(remote_addr='192.0.2.1',
+                                       replay=self.directory,
+                                       json_backend=name)
+            self.assertTrue(eac.replay.json is eac.json)
+            self.assertEqual(self.services,
+                             eac.get_getservices(BOUQUET_REF))
+
+    def testRepeatedCallsDoNotShareData(self):
+        self.eac.get_movielist()['movies'].pop()
+        self.assertEqual(3, len(self.eac.get_movielist()['movies']))
+
+
+if __name__ == '__main__':
+    unittest.main()
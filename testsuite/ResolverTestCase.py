@@ -0,0 +1,144 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+import os
+import sys
+import glob
+import json
+import shutil
+import socket
+import tempfile
+import unittest
+import urlparse
+
+import requests
+
+sys.path.insert(0, '..')
+
+from enigma2_http_api.controller import Enigma2APIController
+from enigma2_http_api.fakebox import FakeBoxServer
+from enigma2_http_api.resolver import CachingResolver
+
+
+class ResolverTestCase(unittest.TestCase):
+    def setUp(self):
+        self.now = 0
+        self.lookups = list()
+        self.addresses = ['127.0.0.1']
+
+    def _resolve(self, host):
+        self.lookups.append(host)
+        if host.endswith('.invalid'):
+            raise socket.gaierror(socket.EAI_NONAME, 'unknown')
+        return self.addresses
+
+    def _resolver(self, ttl=60):
+        return CachingResolver(ttl=ttl, clock=lambda: self.now,
+                               resolve_func=self._resolve)
+
+    def testTTL(self):
+        resolver = self._resolver()
+        for x in range(3):
+            self.assertEqual('127.0.0.1', resolver.resolve('enigma2.local'))
+        self.now = 61
+        resolver.resolve('enigma2.local')
+        self.assertEqual(['enigma2.local'] * 2, self.lookups)
+        stats = resolver.stats('enigma2.local')
+        self.assertEqual(2, stats['resolutions'])
+        self.assertEqual(2, stats['hits'])
+
+    def testFailure(self):
+        resolver = self._resolver()
+        self.assertEqual('box.invalid', resolver.resolve('box.invalid'))
+        self.assertEqual(1, resolver.stats('box.invalid')['failures'])
+
+    def testNegativeTTL(self):
+        resolver = CachingResolver(ttl=60, negative_ttl=5,
+                                   clock=lambda: self.now,
+                                   resolve_func=self._resolve)
+        for x in range(3):
+            self.assertEqual('box.invalid', resolver.resolve('box.invalid'))
+            resolver.invalidate('box.invalid')
+        self.assertEqual(['box.invalid'], self.lookups)
+        self.assertEqual(2, resolver.stats('box.invalid')['hits'])
+
+        self.now = 5
+        resolver.resolve('box.invalid')
+        self.assertEqual(2, len(self.lookups))
+        self.assertEqual(2, resolver.stats('box.invalid')['failures'])
+
+        self.addresses = ['fe80::1%eth0']
+        resolver.resolve('box.local')
+        resolver.resolve('box.local')
+        self.assertEqual(['box.invalid'] * 2 + ['box.local'], self.lookups)
+
+    def testScopedAddresses(self):
+        self.addresses = ['fe80::1%eth0', '127.0.0.1', '127.0.0.1', '::1']
+        resolver = self._resolver()
+        self.assertEqual(('127.0.0.1', '::1'),
+                         resolver.resolve_all('enigma2.local'))
+
+        self.addresses = ['fe80::1%eth0']
+        self.assertEqual(('box.local', ), resolver.resolve_all('box.local'))
+
+    def testDisabledByDefault(self):
+        self.assertEqual(None, Enigma2APIController().resolver)
+
+    def testLiteral(self):
+        resolver = self._resolver()
+        self.assertEqual('10.0.0.1', resolver.resolve('10.0.0.1'))
+        self.assertEqual([], self.lookups)
+
+    def testController(self):
+        server = FakeBoxServer(bouquets=2, services_per_bouquet=2).start()
+        try:
+            eac = Enigma2APIController(
+                remote_addr='enigma2.local:{:d}'.format(
+                    server.server_address[1]),
+                resolver=self._resolver())
+            self.assertEqual(2, len(eac.get_bouquets_services()))
+            self.assertEqual(['enigma2.local'], self.lookups)
+            self.assertEqual(1, eac.resolver_stats()['resolutions'])
+        finally:
+            server.stop()
+
+    def testAddressFallback(self):
+        server = FakeBoxServer(bouquets=2, services_per_bouquet=2).start()
+        directory = tempfile.mkdtemp()
+        try:
+            # nothing listens on 127.0.0.2, the server is bound to 127.0.0.1
+            self.addresses = ['127.0.0.2', '127.0.0.1']
+            eac = Enigma2APIController(
+                remote_addr='enigma2.local:{:d}'.format(
+                    server.server_address[1]),
+                resolver=self._resolver(), dump_requests=directory)
+            self.assertEqual('Synthetic', eac.get_about()['info']['brand'])
+            eac.close()
+            self.assertEqual(['enigma2.local'], self.lookups)
+            self.assertEqual(0, eac.resolver_stats()['invalidations'])
+
+            (filename, ) = glob.glob(os.path.join(directory, '*.json'))
+            with open(filename, "rb") as source:
+                self.assertEqual('enigma2.local', urlparse.urlsplit(
+                    json.load(source)['url']).hostname)
+        finally:
+            server.stop()
+            shutil.rmtree(directory)
+
+    def testReResolveOnConnectionFailure(self):
+        sock = socket.socket()
+        sock.bind(('127.0.0.1', 0))
+        port = sock.getsockname()[1]
+        sock.close()
+
+        eac = Enigma2APIController(
+            remote_addr='enigma2.local:{:d}'.format(port),
+            resolver=self._resolver())
+        for x in range(2):
+            self.assertRaises(requests.exceptions.ConnectionError,
+                              eac.get_about)
+        self.assertEqual(['enigma2.local'] * 2, self.lookups)
+        self.assertEqual(2, eac.resolver_stats()['invalidations'])
+
+
+if __name__ == '__main__':
+    unittest.main()
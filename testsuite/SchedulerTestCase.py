@@ -0,0 +1,134 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+import sys
+import time
+import logging
+import logging.handlers
+import threading
+import unittest
+
+import requests
+
+sys.path.insert(0, '..')
+
+from enigma2_http_api.controller import Enigma2APIController
+from enigma2_http_api.fakebox import FakeBoxServer, LatencyModel
+from enigma2_http_api import scheduler as scheduler_module
+from enigma2_http_api.scheduler import PriorityScheduler, get_scheduler
+from enigma2_http_api.scheduler import PRIORITY_BULK, PRIORITY_INTERACTIVE
+
+
+class PrioritySchedulerTestCase(unittest.TestCase):
+    def _waiter(self, scheduler, priority, admitted):
+        def run():
+            scheduler.acquire(priority)
+            admitted.append(priority)
+
+        thread = threading.Thread(target=run)
+        thread.start()
+        while scheduler.stats()[priority]['waiting'] == 0:
+            time.sleep(0.005)
+        return thread
+
+    def testInteractiveFirst(self):
+        scheduler = PriorityScheduler(max_concurrency=1)
+        admitted = list()
+        self.assertTrue(scheduler.acquire(PRIORITY_BULK))
+        threads = [self._waiter(scheduler, PRIORITY_BULK, admitted),
+                   self._waiter(scheduler, PRIORITY_INTERACTIVE, admitted)]
+        scheduler.release(PRIORITY_BULK)
+        threads[1].join()
+        self.assertEqual([PRIORITY_INTERACTIVE], admitted)
+        scheduler.release(PRIORITY_INTERACTIVE)
+        threads[0].join()
+        self.assertEqual([PRIORITY_INTERACTIVE, PRIORITY_BULK], admitted)
+
+    def testBulkCap(self):
+        scheduler = PriorityScheduler(max_concurrency=3, bulk_concurrency=2)
+        self.assertTrue(scheduler.acquire(PRIORITY_BULK))
+        self.assertTrue(scheduler.acquire(PRIORITY_BULK))
+        self.assertFalse(scheduler.acquire(PRIORITY_BULK, timeout=0.01))
+        self.assertTrue(scheduler.acquire(PRIORITY_INTERACTIVE, timeout=0))
+        stats = scheduler.stats()
+        self.assertEqual(2, stats[PRIORITY_BULK]['active'])
+        self.assertEqual(1, stats[PRIORITY_BULK]['timeouts'])
+        self.assertEqual(0, stats[PRIORITY_BULK]['waiting'])
+
+    def testConflictingLimits(self):
+        handler = logging.handlers.BufferingHandler(10)
+        scheduler_module.LOG.addHandler(handler)
+        try:
+            scheduler = get_scheduler('scheduler.conflict', max_concurrency=4)
+            self.assertTrue(scheduler is get_scheduler('scheduler.conflict',
+                                                       max_concurrency=4))
+            self.assertEqual([], handler.buffer)
+            self.assertTrue(scheduler is get_scheduler('scheduler.conflict',
+                                                       max_concurrency=2))
+            self.assertEqual([logging.WARNING],
+                             [x.levelno for x in handler.buffer])
+        finally:
+            scheduler_module.LOG.removeHandler(handler)
+
+
+class SchedulerControllerTestCase(unittest.TestCase):
+    def setUp(self):
+        self.server = FakeBoxServer(bouquets=1, services_per_bouquet=8,
+                                    events_per_service=5,
+                                    latency=LatencyModel(base=0.2)).start()
+        self.scheduler = PriorityScheduler(max_concurrency=2,
+                                           bulk_concurrency=1)
+        self.eac = Enigma2APIController(remote_addr=self.server.remote_addr,
+                                        scheduler=self.scheduler)
+
+    def tearDown(self):
+        self.eac.close()
+        self.server.stop()
+
+    def testZapDuringHarvest(self):
+        refs = [x['servicereference'] for x in self.server.box.services]
+        harvest = threading.Thread(
+            target=self.eac.get_epgservices, args=(refs, ),
+            kwargs={'concurrency': 4})
+        harvest.start()
+        while self.scheduler.stats()[PRIORITY_BULK]['waiting'] == 0:
+            time.sleep(0.005)
+
+        started = time.time()
+        self.eac.get_zap(refs[0])
+        elapsed = time.time() - started
+        harvest.join()
+
+        self.assertTrue(elapsed < 0.6, elapsed)
+        stats = self.eac.scheduler_stats()
+        self.assertEqual(8, stats[PRIORITY_BULK]['acquired'])
+        self.assertEqual(1, stats[PRIORITY_INTERACTIVE]['acquired'])
+
+    def testStreamedSlot(self):
+        self.server.latency = LatencyModel()
+        ref = self.server.box.services[0]['servicereference']
+
+        events = self.eac.iter_epgservice(ref)
+        next(events)
+        self.assertEqual(1, self.scheduler.stats()[PRIORITY_BULK]['active'])
+        events.close()
+        self.assertEqual(0, self.scheduler.stats()[PRIORITY_BULK]['active'])
+
+        events = self.eac.iter_epgservice(ref)
+        next(events)
+        del events
+        self.assertEqual(0, self.scheduler.stats()[PRIORITY_BULK]['active'])
+
+        self.assertEqual(5, len(list(self.eac.iter_epgservice(ref))))
+        self.assertEqual(0, self.scheduler.stats()[PRIORITY_BULK]['active'])
+
+    def testStreamedSlotReleasedOnFailure(self):
+        self.server.stop()
+        ref = self.server.box.services[0]['servicereference']
+        self.assertRaises(requests.exceptions.ConnectionError, list,
+                          self.eac.iter_epgservice(ref))
+        self.assertEqual(0, self.scheduler.stats()[PRIORITY_BULK]['active'])
+        self.server = FakeBoxServer().start()
+
+
+if __name__ == '__main__':
+    unittest.main()
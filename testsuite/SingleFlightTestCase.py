@@ -0,0 +1,133 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+import sys
+import time
+import threading
+import unittest
+
+sys.path.insert(0, '..')
+
+from enigma2_http_api.cache import SingleFlight
+from enigma2_http_api.controller import Enigma2APIController
+from enigma2_http_api.fakebox import FakeBoxServer, LatencyModel
+from enigma2_http_api.resilience import Deadline, DeadlineExceeded
+
+
+class SingleFlightTestCase(unittest.TestCase):
+    def setUp(self):
+        self.flights = SingleFlight()
+        self.release = threading.Event()
+        self.calls = []
+
+    def _slow_call(self):
+        self.calls.append(1)
+        self.release.wait(5)
+        return {'events': [{'id': 1}]}
+
+    def _run_concurrently(self, count):
+        results = [None] * count
+
+        def worker(index):
+            results[index] = self.flights.do(('epgbouquet', ()),
+                                             self._slow_call)
+
+        threads = [threading.Thread(target=worker, args=(x,))
+                   for x in range(count)]
+        for thread in threads:
+            thread.start()
+
+        while self.flights.stats()['coalesced'] < count - 1:
+            threading.Event().wait(0.01)
+
+        self.release.set()
+        for thread in threads:
+            thread.join(5)
+        return results
+
+    def testConcurrentCallsAreCoalesced(self):
+        results = self._run_concurrently(4)
+        self.assertEqual(1, len(self.calls))
+        self.assertEqual(1, self.flights.stats()['executed'])
+        self.assertEqual(3, self.flights.stats()['coalesced'])
+
+        for result in results:
+            self.assertEqual({'events': [{'id': 1}]}, result)
+
+        results[0]['events'].pop()
+        self.assertEqual([{'id': 1}], results[1]['events'])
+
+    def testErrorsArePropagated(self):
+        def failing():
+            raise ValueError("box unreachable")
+
+        with self.assertRaises(ValueError):
+            self.flights.do(('timerlist', ()), failing)
+
+        self.assertEqual(0, self.flights.stats()['in_flight'])
+
+    def testFollowerDeadline(self):
+        leader = threading.Thread(
+            target=self.flights.do, args=(('epgbouquet', ()),
+                                          self._slow_call))
+        leader.start()
+        while not self.calls:
+            time.sleep(0.005)
+
+        started = time.time()
+        with self.assertRaises(DeadlineExceeded):
+            self.flights.do_until(('epgbouquet', ()), Deadline(0.1),
+                                  self._slow_call)
+        self.assertTrue(time.time() - started < 0.5)
+
+        self.release.set()
+        leader.join(5)
+        self.assertEqual(1, len(self.calls))
+        self.assertEqual(0, self.flights.stats()['in_flight'])
+
+
+class SingleFlightControllerTestCase(unittest.TestCase):
+    def setUp(self):
+        self.server = FakeBoxServer(latency=LatencyModel(base=1.0)).start()
+        self.eac = Enigma2APIController(remote_addr=self.server.remote_addr)
+
+    def tearDown(self):
+        self.eac.close()
+        self.server.stop()
+
+    def testFollowerHonoursDeadline(self):
+        leader = threading.Thread(target=self.eac.get_about)
+        leader.start()
+        while self.eac.coalescing_stats()['in_flight'] == 0 and \
+                leader.is_alive():
+            time.sleep(0.005)
+
+        started = time.time()
+        with self.assertRaises(DeadlineExceeded):
+            self.eac._apicall('about', deadline=0.3)
+        elapsed = time.time() - started
+        leader.join()
+
+        self.assertTrue(0.25 < elapsed < 0.6, elapsed)
+        self.assertEqual(1, self.server.requests['about'])
+
+    def _concurrently(self, path, params=None):
+        threads = [threading.Thread(target=self.eac._apicall, args=(path, ),
+                                    kwargs=dict(params=params))
+                   for _ in range(3)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return self.server.requests[path]
+
+    def testQueriesAreCoalesced(self):
+        self.assertEqual(1, self._concurrently('powerstate'))
+        self.assertEqual(1, self._concurrently('vol'))
+
+    def testMutatingCallsAreNotCoalesced(self):
+        self.assertEqual(3, self._concurrently('vol', {'set': 'up'}))
+        self.assertEqual(65, self.server.box.volume)
+
+
+if __name__ == '__main__':
+    unittest.main()
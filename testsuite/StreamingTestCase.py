@@ -0,0 +1,50 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+import os
+import sys
+import json
+import unittest
+
+sys.path.insert(0, '..')
+
+from enigma2_http_api.streaming import iter_json_array
+
+TD = os.path.abspath(
+    os.path.join(os.path.dirname(__file__), '../contrib/testdata'))
+
+
+def chunked(data, size):
+    for offset in range(0, len(data), size):
+        yield data[offset:offset + size]
+
+
+class StreamingTestCase(unittest.TestCase):
+    def setUp(self):
+        with open(os.path.join(TD, "musikstunde.json"), "rb") as src:
+            self.events = json.load(src)
+        self.body = json.dumps(
+            {"result": True, "events": self.events}, indent=2,
+            ensure_ascii=False).encode("utf-8")
+
+    def testChunkBoundaries(self):
+        for size in (1, 2, 3, 17, 4096, len(self.body)):
+            result = list(iter_json_array(chunked(self.body, size), 'events'))
+            self.assertEqual(self.events, result)
+
+    def testNestedAndEscapedKeys(self):
+        body = json.dumps({
+            "nested": {"events": [1]},
+            "quoted \\\"events\\\"": ["events"],
+            "events": [{"title": "a \\\"]\\\" b"}, 2.5, [], u"é"],
+        })
+        result = list(iter_json_array(chunked(body, 3), 'events'))
+        self.assertEqual([{"title": "a \\\"]\\\" b"}, 2.5, [], u"é"],
+                         result)
+
+    def testTruncatedBody(self):
+        with self.assertRaises(ValueError):
+            list(iter_json_array(chunked(self.body[:-200], 64), 'events'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,74 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+import sys
+import unittest
+
+sys.path.insert(0, '..')
+
+from enigma2_http_api.cache import TTLCache, cache_key
+
+
+class FakeClock(object):
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class TTLCacheTestCase(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.cache = TTLCache(ttl={'about': 10, 'getservices': 60},
+                              max_entries=2, clock=self.clock)
+
+    def testExpiry(self):
+        key = cache_key('about')
+        self.cache.put(key, {'info': 1})
+        self.clock.now += 9
+        self.assertEqual({'info': 1}, self.cache.get(key))
+        self.clock.now += 1
+        self.assertEqual(None, self.cache.get(key))
+        self.assertEqual(1, self.cache.stats()['hits'])
+        self.assertEqual(1, self.cache.stats()['misses'])
+
+    def testLRUEviction(self):
+        key_a = cache_key('getservices', {'sRef': 'a'})
+        key_b = cache_key('getservices', {'sRef': 'b'})
+        key_c = cache_key('getservices', {'sRef': 'c'})
+        self.cache.put(key_a, 'a')
+        self.cache.put(key_b, 'b')
+        self.assertEqual('a', self.cache.get(key_a))
+        self.cache.put(key_c, 'c')
+
+        self.assertEqual(None, self.cache.get(key_b))
+        self.assertEqual('a', self.cache.get(key_a))
+        self.assertEqual('c', self.cache.get(key_c))
+        self.assertEqual(1, self.cache.stats()['evictions'])
+
+    def testMutatingPathsAreNeverCached(self):
+        cache = TTLCache(ttl={'zap': 60, 'timeradd': 60})
+        for path in ('zap', 'timeradd'):
+            key = cache_key(path, {'sRef': 'x'})
+            cache.put(key, 'result')
+            self.assertFalse(cache.is_cacheable(path))
+            self.assertEqual(None, cache.get(key))
+
+    def testMutatingParams(self):
+        cache = TTLCache(ttl={'vol': 60})
+        self.assertTrue(cache.is_cacheable('vol'))
+        self.assertFalse(cache.is_cacheable('vol', {'set': 'up'}))
+        key = cache_key('vol', {'set': 'up'})
+        cache.put(key, 'result')
+        self.assertEqual(None, cache.get(key))
+
+    def testInvalidate(self):
+        self.cache.put(cache_key('about'), 'about')
+        self.cache.put(cache_key('getservices'), 'services')
+        self.cache.invalidate('about')
+        self.assertEqual(None, self.cache.get(cache_key('about')))
+        self.assertEqual('services', self.cache.get(cache_key('getservices')))
+
+
+if __name__ == '__main__':
+    unittest.main()
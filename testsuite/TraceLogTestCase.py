@@ -0,0 +1,83 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+import os
+import sys
+import json
+import shutil
+import tempfile
+import unittest
+
+sys.path.insert(0, '..')
+
+from enigma2_http_api.controller import Enigma2APIController
+from enigma2_http_api.fakebox import FakeBoxServer
+from enigma2_http_api.tracelog import TraceLog, iter_trace, TRACE_PHASES
+
+
+class TraceLogTestCase(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.filename = os.path.join(self.directory, 'trace.jsonl')
+        self.server = FakeBoxServer(bouquets=2, services_per_bouquet=3,
+                                    events_per_service=5, timers=2).start()
+        self.eac = Enigma2APIController(remote_addr=self.server.remote_addr,
+                                        trace_log=self.filename,
+                                        cache_ttl=True)
+
+    def tearDown(self):
+        self.eac.close()
+        self.eac.trace_log.close()
+        self.server.stop()
+        shutil.rmtree(self.directory)
+
+    def lines(self):
+        self.eac.close()
+        return list(iter_trace(self.filename, json))
+
+    def testPhases(self):
+        self.assertEqual(2, len(self.eac.get_timerlist()))
+        (line, ) = self.lines()
+        self.assertEqual('timerlist', line['path'])
+        self.assertEqual(200, line['status'])
+        self.assertEqual(self.eac.correlation_id(1), line['id'])
+        self.assertTrue(line['decoded_bytes'] > 0)
+        self.assertTrue(line['connect'] > 0)
+        for phase in TRACE_PHASES:
+            self.assertTrue(line[phase] >= 0, phase)
+        self.assertTrue(line['duration'] >= line['ttfb'])
+
+    def testStreaming(self):
+        ref = self.server.box.services[0]['servicereference']
+        self.assertEqual(5, len(list(self.eac.iter_epgservice(ref))))
+        self.eac.get_about()
+        (streamed, about) = self.lines()
+        self.assertEqual({'sRef': ref}, streamed['params'])
+        self.assertTrue(streamed['models'] >= 0)
+        self.assertEqual(None, streamed['decode'])
+        self.assertEqual(None, about['models'])
+        self.assertNotEqual(streamed['id'], about['id'])
+
+    def testCached(self):
+        self.eac.get_getallservices()
+        self.eac.get_getallservices()
+        (fetched, cached) = self.lines()
+        self.assertFalse(fetched['cached'])
+        self.assertTrue(cached['cached'])
+        self.assertEqual(None, cached['id'])
+        self.assertEqual(None, cached['ttfb'])
+
+    def testRotation(self):
+        filename = os.path.join(self.directory, 'rotated.jsonl')
+        trace_log = TraceLog(filename, json, max_bytes=100, backup_count=2)
+        for index in range(5):
+            trace_log.submit({'id': index, 'padding': 'x' * 60})
+        trace_log.close()
+        self.assertEqual(4, trace_log.stats()['rotations'])
+        self.assertEqual([4], [x['id'] for x in iter_trace(filename, json)])
+        self.assertEqual([3], [x['id'] for x in
+                               iter_trace(filename + '.1', json)])
+        self.assertFalse(os.path.exists(filename + '.3'))
+
+
+if __name__ == '__main__':
+    unittest.main()
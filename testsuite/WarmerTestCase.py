@@ -0,0 +1,93 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+import sys
+import time
+import random
+import unittest
+
+sys.path.insert(0, '..')
+
+from enigma2_http_api.controller import Enigma2APIController
+from enigma2_http_api.fakebox import FakeBoxServer
+from enigma2_http_api.warmer import CacheWarmer, WarmDataset
+from enigma2_http_api.warmer import now_next_datasets
+
+
+class WarmerTestCase(unittest.TestCase):
+    def setUp(self):
+        self.server = FakeBoxServer(bouquets=2, services_per_bouquet=3,
+                                    events_per_service=5).start()
+        self.bouquet_ref = self.server.box.bouquets[0]['servicereference']
+        self.eac = None
+
+    def tearDown(self):
+        if self.eac is not None:
+            self.eac.close()
+        self.server.stop()
+
+    def wait_for_refreshes(self, count, timeout=5.0):
+        started = time.time()
+        while time.time() - started < timeout:
+            if all(x['refreshes'] >= count for x in self.eac.warmer_stats()):
+                return
+            time.sleep(0.01)
+        self.fail("datasets were not refreshed: {!r}".format(
+            self.eac.warmer_stats()))
+
+    def testWarm(self):
+        self.eac = Enigma2APIController(
+            remote_addr=self.server.remote_addr,
+            warm_datasets=(WarmDataset('getallservices', None, 60), ) +
+            now_next_datasets([self.bouquet_ref]),
+            warm_start_spread=0.1)
+        self.wait_for_refreshes(1)
+        requests = dict(self.server.requests)
+
+        self.assertEqual(2, len(self.eac.get_getallservices()))
+        self.assertEqual(3, len(self.eac.get_epgnow(self.bouquet_ref)))
+        self.assertTrue(self.eac.get_epgnext(self.bouquet_ref))
+        self.assertEqual(requests, self.server.requests)
+        self.assertEqual(3, self.eac.cache_stats()['hits'])
+        self.assertEqual(300, self.eac.cache.ttl['getallservices'])
+        self.assertEqual(90, self.eac.cache.ttl['epgnow'])
+
+    def testSchedule(self):
+        self.eac = Enigma2APIController(
+            remote_addr=self.server.remote_addr,
+            warm_datasets=[WarmDataset('timerlist', None, 0.05),
+                           WarmDataset('about', None, 0.05)],
+            warm_start_spread=0)
+        self.wait_for_refreshes(3)
+        self.eac.close()
+        stats = self.eac.warmer_stats()
+        self.assertEqual(0, sum(x['failures'] for x in stats))
+        self.assertTrue(self.server.requests['timerlist'] >= 3)
+        refreshes = [x['refreshes'] for x in stats]
+        time.sleep(0.2)
+        self.assertEqual(refreshes,
+                         [x['refreshes'] for x in self.eac.warmer_stats()])
+
+    def testJitter(self):
+        self.eac = Enigma2APIController(remote_addr=self.server.remote_addr,
+                                        cache_ttl=True)
+        warmer = CacheWarmer(self.eac, jitter=0.1, rng=random.Random(1))
+        delays = [warmer._next_delay(warmer.datasets[0]) for _ in range(50)]
+        self.assertTrue(all(216 <= x <= 264 for x in delays))
+        self.assertTrue(len(set(delays)) > 1)
+
+    def testCacheRequired(self):
+        self.eac = Enigma2APIController(remote_addr=self.server.remote_addr)
+        self.assertRaises(ValueError, CacheWarmer, self.eac)
+
+    def testRefreshBypassesCache(self):
+        self.eac = Enigma2APIController(remote_addr=self.server.remote_addr,
+                                        cache_ttl=True)
+        self.eac.get_about()
+        self.eac.refresh_cache('about')
+        self.eac.get_about()
+        self.assertEqual(2, self.server.requests['about'])
+        self.assertEqual(1, self.eac.cache_stats()['hits'])
+
+
+if __name__ == '__main__':
+    unittest.main()
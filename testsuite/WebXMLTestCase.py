@@ -0,0 +1,85 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+import sys
+import unittest
+
+sys.path.insert(0, '..')
+
+from enigma2_http_api.controller import Enigma2APIController
+from enigma2_http_api.fakebox import FakeBoxServer
+from enigma2_http_api.webxml import get_web_call, UnsupportedWebCall
+from enigma2_http_api.webxml import EVENT_FIELDS, TIMER_FIELDS
+
+
+def _chunked(document, size=7):
+    return [document[x:x + size] for x in range(0, len(document), size)]
+
+
+class WebXMLTestCase(unittest.TestCase):
+    def setUp(self):
+        self.server = FakeBoxServer(bouquets=2, services_per_bouquet=3,
+                                    events_per_service=20, timers=3).start()
+        self.api = Enigma2APIController(remote_addr=self.server.remote_addr)
+        self.web = Enigma2APIController(remote_addr=self.server.remote_addr,
+                                        backend='web')
+
+    def tearDown(self):
+        self.server.stop()
+
+    def _subset(self, items, fields):
+        keys = [x[0] for x in fields.values()]
+        return [dict((k, x.get(k)) for k in keys) for x in items]
+
+    def testServices(self):
+        self.assertEqual(self.api.get_services(), self.web.get_services())
+        api_all = self.api.get_getallservices()
+        web_all = self.web.get_getallservices()
+        self.assertEqual([x['servicename'] for x in api_all],
+                         [x['servicename'] for x in web_all])
+        self.assertEqual(
+            [x['servicereference'] for x in api_all[1]['subservices']],
+            [x['servicereference'] for x in web_all[1]['subservices']])
+
+    def testEvents(self):
+        ref = self.server.box.services[2]['servicereference']
+        self.assertEqual(
+            self._subset(self.api.get_epgservice(ref), EVENT_FIELDS),
+            self._subset(self.web.get_epgservice(ref), EVENT_FIELDS))
+        self.assertEqual(
+            [x.pseudo_id for x in self.api.iter_epgservice(ref)],
+            [x.pseudo_id for x in self.web.iter_epgservice(ref)])
+
+    def testTimers(self):
+        self.assertEqual([x.pseudo_id for x in self.api.get_timerlist()],
+                         [x.pseudo_id for x in self.web.get_timerlist()])
+
+    def testSimpleResult(self):
+        ref = self.server.box.services[1]['servicereference']
+        self.assertTrue(self.web.get_zap(ref).startswith(
+            u'Active service is now'))
+        self.assertEqual({'result': True, 'instandby': True},
+                         self.web.get_powerstate(5))
+
+    def testUnsupported(self):
+        self.assertRaises(UnsupportedWebCall, self.web._apicall,
+                          'getcurrlocation')
+        self.assertRaises(ValueError, get_web_call, 'getcurrlocation')
+
+    def testIncremental(self):
+        ref = self.server.box.services[0]['servicereference']
+        events = get_web_call('epgservice')
+        data = self.server.box.api_epgservice({'sRef': ref})[0]
+        decoded = events.decode(_chunked(events.render(data)))
+        self.assertEqual(self._subset(data['events'], EVENT_FIELDS),
+                         self._subset(decoded['events'], EVENT_FIELDS))
+        timers = get_web_call('timerlist')
+        data = self.server.box.api_timerlist({})[0]
+        self.assertEqual(
+            self._subset(data['timers'], TIMER_FIELDS),
+            self._subset(timers.decode(_chunked(timers.render(data),
+                                                size=1))['timers'],
+                         TIMER_FIELDS))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,100 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Threaded HTTP server answering ``/api/<path>`` requests with canned JSON
+documents. Used by test cases which need real (keep-alive, compressed or
+slow) connections.
+"""
+import gzip
+import json
+import time
+import threading
+import urlparse
+import BaseHTTPServer
+import SocketServer
+from cStringIO import StringIO
+
+#: size of the chunks sent if chunked transfer encoding is enabled
+CHUNK_SIZE = 512
+
+
+class StubRequestHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        name = urlparse.urlparse(self.path).path[len('/api/'):]
+        self.server.count_request(name)
+        if self.server.latency:
+            time.sleep(self.server.latency)
+
+        if name not in self.server.documents:
+            self.send_error(404)
+            return
+
+        body = json.dumps(self.server.documents[name])
+        accepted = self.headers.get('Accept-Encoding', '')
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        if self.server.compression and 'gzip' in accepted:
+            buf = StringIO()
+            with gzip.GzipFile(fileobj=buf, mode='wb') as target:
+                target.write(body)
+            body = buf.getvalue()
+            self.send_header('Content-Encoding', 'gzip')
+        if not self.server.chunked:
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            return
+
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+        for offset in range(0, len(body), CHUNK_SIZE):
+            chunk = body[offset:offset + CHUNK_SIZE]
+            self.wfile.write('{:x}\r\n{:s}\r\n'.format(len(chunk), chunk))
+        self.wfile.write('0\r\n\r\n')
+
+    def log_message(self, *args):
+        pass
+
+
+class StubServer(SocketServer.ThreadingMixIn, BaseHTTPServer.HTTPServer):
+    """
+    Serve *documents* (a dict mapping API path to the JSON document to be
+    returned) on a free local port, delaying each response by *latency*
+    seconds. Bodies are sent using chunked transfer encoding instead of a
+    Content-Length header if *chunked* is set.
+    """
+    daemon_threads = True
+
+    def __init__(self, documents, latency=0, compression=True,
+                 chunked=False):
+        self.documents = documents
+        self.latency = latency
+        self.compression = compression
+        self.chunked = chunked
+        self.requests = dict()
+        self._lock = threading.Lock()
+        self._thread = None
+        BaseHTTPServer.HTTPServer.__init__(self, ('127.0.0.1', 0),
+                                           StubRequestHandler)
+
+    @property
+    def remote_addr(self):
+        return '{:s}:{:d}'.format(*self.server_address[:2])
+
+    def count_request(self, name):
+        with self._lock:
+            self.requests[name] = self.requests.get(name, 0) + 1
+
+    def start(self):
+        self._thread = threading.Thread(target=self.serve_forever)
+        self._thread.daemon = True
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+        self._thread.join()